@@ -289,6 +289,9 @@ def inserir_no_sql(registros: List[Tuple], limpar_antes: bool = True):
 
         logging.info(f"[SQL] ✓ Total inserido com sucesso: {total_inserido} de {len(registros)} registros")
         
+        # Avisar os consumidores que a carga do dia terminou
+        registrar_carga(conn, registros[0][1], total_inserido)
+        
     except Exception as e:
         logging.error(f"[SQL] Erro geral ao inserir registros: {str(e)}")
         if conn:
@@ -304,7 +307,38 @@ def inserir_no_sql(registros: List[Tuple], limpar_antes: bool = True):
 
 
 # --------------------------------------------------
-# 7) FUNÇÃO PRINCIPAL AZURE FUNCTIONS
+# 7) REGISTRAR CARGA CONCLUÍDA
+# --------------------------------------------------
+def registrar_carga(conn, data_pregao, registros: int):
+    """
+    Grava em dbo.CargaPregao que a carga da data terminou. A API FastAPI
+    acompanha essa tabela e avisa os clientes (/api/events) sem que eles
+    precisem consultar as datas disponíveis.
+    
+    A tabela é da API (models.CargaPregao, criada na inicialização dela);
+    sem a API no ar não há a quem avisar.
+    """
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(
+            "INSERT INTO dbo.CargaPregao (data_pregao, registros, concluida_em) "
+            "VALUES (%s, %s, GETDATE())",
+            (data_pregao, registros)
+        )
+        conn.commit()
+        logging.info(f"[SQL] Carga de {data_pregao} registrada ({registros} registros)")
+        
+    except Exception as e:
+        # Os dados já foram gravados: falhar aqui só atrasa o aviso
+        logging.error(f"[SQL] Erro ao registrar carga: {str(e)}")
+        conn.rollback()
+    finally:
+        cursor.close()
+
+
+# --------------------------------------------------
+# 8) FUNÇÃO PRINCIPAL AZURE FUNCTIONS
 # --------------------------------------------------
 app = func.FunctionApp()
 
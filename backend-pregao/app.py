@@ -1,36 +1,276 @@
 """
 API Backend para Consulta de Ativos - Dados de Pregão B3
 """
-from flask import Flask, jsonify, request
+from flask import (
+    Flask,
+    g,
+    has_request_context,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import pymssql
 import os
-from datetime import datetime, timedelta
+import base64
+import binascii
+import math
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager
 from functools import wraps
 
+from cache_disco import CacheDisco
+from comparacao import ORDENACOES as ORDENACOES_COMPARACAO
+from comparacao import comparar as comparar_pregoes
+from comparacao import ordenar as ordenar_comparacao
+from compressao import (
+    TAMANHO_MINIMO,
+    ArmazemRespostas,
+    comprimir,
+    negociar_encoding,
+)
+from conexoes import PoolConexoes, PoolEsgotado
+from disjuntor import CircuitoAberto, Disjuntor, PrazoEsgotado
+from metricas import Registro
+from ranking import METRICAS as METRICAS_RANKING
+from ranking import CacheRankings, RankingDia
+from replica_local import ReplicaLocal
+from singleflight import SingleFlight
+from ultimas_cotacoes import UltimasCotacoes
+
+try:
+    import orjson
+except ImportError:  # Serializador rápido é opcional
+    orjson = None
+
+
+# --------------------------------------------------
+# SERIALIZAÇÃO JSON
+# --------------------------------------------------
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON do Flask que usa orjson quando disponível, gerando bytes
+    direto para a resposta. Sem orjson, mantém o comportamento padrão.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def response(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        if orjson is None:
+            resposta = super().response(*args, **kwargs)
+        else:
+            obj = self._prepare_response_obj(args, kwargs)
+            resposta = self._app.response_class(
+                orjson.dumps(obj, default=self.default),
+                mimetype=self.mimetype
+            )
+        if has_request_context():
+            serializacao_duracao.observar(
+                time.perf_counter() - inicio, rota=rota_atual()
+            )
+        return resposta
+
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)  # Permitir requisições do frontend
 
+# Limites do histórico em lote
+MAX_TICKERS_LOTE = 100
+MAX_REGISTROS_POR_TICKER = 1000
+
+# Tamanho máximo de página do histórico de um ativo
+MAX_PAGINA_HISTORICO = 500
+
+# Respostas imutáveis (datas já fechadas) guardadas já comprimidas
+armazem_respostas = ArmazemRespostas(
+    int(os.getenv("CACHE_RESPOSTAS_MB", "64")) * 1024 * 1024
+)
+
+# Últimas respostas de cada URL, servidas (marcadas como obsoletas) quando
+# o banco está indisponível
+respostas_recentes = ArmazemRespostas(
+    int(os.getenv("CACHE_OBSOLETAS_MB", "32")) * 1024 * 1024,
+    substituir=True
+)
+
+# Cache em disco compartilhado pelos workers do host, atrás do armazém em
+# memória: workers novos (deploy, reciclagem) já começam com as respostas
+# calculadas (CACHE_DISCO_MB=0 desativa)
+CACHE_DISCO_MB = int(os.getenv("CACHE_DISCO_MB", "256"))
+cache_disco = CacheDisco(
+    os.getenv(
+        "CACHE_DISCO_ARQUIVO",
+        os.path.join(tempfile.gettempdir(), "pregao-cache.db")
+    ),
+    CACHE_DISCO_MB * 1024 * 1024
+) if CACHE_DISCO_MB > 0 else None
+
+# Rotas de dados: só elas passam pelo cache em disco (consultá-lo exige a
+# versão dos dados, ou seja, uma ida ao banco) e pelas respostas obsoletas
+# (/health com o banco fora não pode responder que está tudo bem)
+PREFIXO_ROTAS_DADOS = '/api/'
+
+# --------------------------------------------------
+# MÉTRICAS (expostas em /metrics)
+# --------------------------------------------------
+metricas = Registro()
+requisicoes_duracao = metricas.histograma(
+    'pregao_http_duracao_segundos',
+    'Latência das requisições por rota',
+    ('rota', 'metodo')
+)
+requisicoes_total = metricas.contador(
+    'pregao_http_requisicoes_total',
+    'Requisições por rota, método e status',
+    ('rota', 'metodo', 'status')
+)
+requisicoes_em_andamento = metricas.medidor(
+    'pregao_http_em_andamento',
+    'Requisições em andamento no worker'
+)
+sql_duracao = metricas.histograma(
+    'pregao_sql_duracao_segundos',
+    'Tempo de execução e leitura das consultas SQL por rota',
+    ('rota',)
+)
+sql_linhas = metricas.contador(
+    'pregao_sql_linhas_total',
+    'Linhas lidas do banco por rota',
+    ('rota',)
+)
+serializacao_duracao = metricas.histograma(
+    'pregao_serializacao_segundos',
+    'Tempo de serialização JSON das respostas por rota',
+    ('rota',)
+)
+singleflight_executadas = metricas.contador(
+    'pregao_singleflight_executadas_total',
+    'Consultas executadas pelo single-flight'
+)
+singleflight_coalescidas = metricas.contador(
+    'pregao_singleflight_coalescidas_total',
+    'Requisições que reaproveitaram uma consulta em andamento'
+)
+pool_abertas = metricas.medidor(
+    'pregao_pool_conexoes_abertas',
+    'Conexões abertas no pool do worker, por destino',
+    ('destino',)
+)
+pool_em_uso = metricas.medidor(
+    'pregao_pool_conexoes_em_uso',
+    'Conexões do pool emprestadas a requisições, por destino',
+    ('destino',)
+)
+sql_destino = metricas.contador(
+    'pregao_sql_acessos_total',
+    'Acessos ao banco por destino (primario ou leitura)',
+    ('destino',)
+)
+disjuntor_estado = metricas.medidor(
+    'pregao_disjuntor_estado',
+    'Estado do disjuntor do banco (0 fechado, 1 meio-aberto, 2 aberto), por destino',
+    ('destino',)
+)
+disjuntor_recusadas = metricas.contador(
+    'pregao_disjuntor_recusadas_total',
+    'Chamadas ao banco recusadas com o disjuntor aberto, por destino',
+    ('destino',)
+)
+respostas_obsoletas = metricas.contador(
+    'pregao_respostas_obsoletas_total',
+    'Respostas obsoletas servidas com o banco indisponível, por rota',
+    ('rota',)
+)
+cache_disco_acertos = metricas.contador(
+    'pregao_cache_disco_acertos_total',
+    'Respostas servidas do cache em disco, por rota',
+    ('rota',)
+)
+replica_consultas = metricas.contador(
+    'pregao_replica_local_consultas_total',
+    'Consultas atendidas pela réplica local, por rota',
+    ('rota',)
+)
+
+# Consultas idênticas simultâneas (rankings, resumo) executadas uma vez
+singleflight = SingleFlight()
+
+# Rankings pré-calculados por pregão (quantidade de pregões em cache)
+rankings = CacheRankings(int(os.getenv("RANKING_CACHE_DIAS", "32")))
+
+# Por quanto tempo a última data de pregão consultada é reaproveitada
+ULTIMA_DATA_TTL = int(os.getenv("ULTIMA_DATA_TTL", "60"))
+
+# Réplica local dos últimos pregões (0 desativa)
+REPLICA_LOCAL_DIAS = int(os.getenv("REPLICA_LOCAL_DIAS", "30"))
+REPLICA_LOCAL_ARQUIVO = os.getenv("REPLICA_LOCAL_ARQUIVO", ":memory:")
+
 # --------------------------------------------------
 # CONFIGURAÇÃO DO BANCO DE DADOS
 # --------------------------------------------------
-def get_db_connection():
+# Tempo máximo para abrir uma conexão e para cada consulta (segundos)
+SQL_LOGIN_TIMEOUT = int(os.getenv("SQL_LOGIN_TIMEOUT", "5"))
+SQL_TIMEOUT = int(os.getenv("SQL_TIMEOUT", "30"))
+
+# Prazo de cada requisição para acessar o banco, contado do início da
+# requisição (segundos); rotas com consultas mais pesadas têm prazo maior
+SQL_PRAZO = float(os.getenv("SQL_PRAZO", "10"))
+PRAZOS_ROTA = {
+    '/health': 3.0,
+    '/api/historico': 20.0,
+    '/api/comparar': 15.0,
+    '/api/resumo': 20.0,
+}
+
+# Erros que indicam banco indisponível (e não erro na consulta)
+ERROS_BANCO = (pymssql.OperationalError, pymssql.InterfaceError)
+
+# Réplica de leitura (opcional): servidor secundário do Azure SQL
+# (geo-réplica ou réplica nomeada) configurado em SQL_SERVER_LEITURA. As
+# demais variáveis SQL_*_LEITURA repetem as do primário se ausentes.
+LEITURA_CONFIGURADA = bool(os.getenv("SQL_SERVER_LEITURA"))
+
+# Por quanto tempo a réplica de leitura pode ficar atrás do primário
+# (segundos) antes de as leituras voltarem para o primário, e de quanto
+# em quanto tempo isso é verificado
+LEITURA_MAX_ATRASO = float(os.getenv("LEITURA_MAX_ATRASO", "120"))
+LEITURA_VERIFICACAO = float(os.getenv("LEITURA_VERIFICACAO", "30"))
+
+
+def variavel_db(nome, padrao, leitura=False):
+    valor = os.getenv(f"{nome}_LEITURA") if leitura else None
+    return valor or os.getenv(nome, padrao)
+
+
+def get_db_connection(leitura=False):
     """
     Estabelece conexão com SQL Server usando variáveis de ambiente.
+    Com leitura=True conecta na réplica de leitura.
     """
-    server = os.getenv("SQL_SERVER", "sql-pregao-final.database.windows.net")
-    database = os.getenv("SQL_DATABASE", "pregao")
-    user = os.getenv("SQL_USER", "sqladmin")
-    password = os.getenv("SQL_PASSWORD", "Camila1412*")
+    server = variavel_db("SQL_SERVER", "sql-pregao-final.database.windows.net", leitura)
+    port = variavel_db("SQL_PORT", "1433", leitura)
+    database = variavel_db("SQL_DATABASE", "pregao", leitura)
+    user = variavel_db("SQL_USER", "sqladmin", leitura)
+    password = variavel_db("SQL_PASSWORD", "Camila1412*", leitura)
     
     try:
         conn = pymssql.connect(
             server=server,
+            port=port,
             user=user,
             password=password,
             database=database,
-            login_timeout=30,
-            timeout=30
+            login_timeout=SQL_LOGIN_TIMEOUT,
+            timeout=SQL_TIMEOUT
         )
         return conn
     except Exception as e:
@@ -38,14 +278,738 @@ def get_db_connection():
         raise
 
 
+def criar_pool(leitura=False):
+    """
+    Conexões reaproveitadas entre requisições; o tamanho deve acompanhar o
+    número de threads por worker do gunicorn.
+    """
+    return PoolConexoes(
+        lambda: get_db_connection(leitura),
+        tamanho=int(os.getenv("SQL_POOL_TAMANHO", "8")),
+        espera=float(os.getenv("SQL_POOL_ESPERA", "10"))
+    )
+
+
+def criar_disjuntor():
+    """
+    Abre após DISJUNTOR_LIMIAR chamadas seguidas com erro ou mais lentas
+    que DISJUNTOR_LENTA segundos; recusa chamadas por DISJUNTOR_ESPERA.
+    """
+    return Disjuntor(
+        limiar=int(os.getenv("DISJUNTOR_LIMIAR", "5")),
+        lenta=float(os.getenv("DISJUNTOR_LENTA", "5")),
+        espera=float(os.getenv("DISJUNTOR_ESPERA", "30"))
+    )
+
+
+# Cada destino (primário e réplica de leitura) tem pool e disjuntor próprios
+pool_conexoes = criar_pool()
+disjuntor = criar_disjuntor()
+pool_leitura = criar_pool(leitura=True) if LEITURA_CONFIGURADA else None
+disjuntor_leitura = criar_disjuntor() if LEITURA_CONFIGURADA else None
+
+
+def prazo_restante():
+    """
+    Segundos que restam à requisição atual para acessar o banco.
+    """
+    if not has_request_context() or 'inicio_requisicao' not in g:
+        return SQL_PRAZO
+    prazo = PRAZOS_ROTA.get(rota_atual(), SQL_PRAZO)
+    return prazo - (time.perf_counter() - g.inicio_requisicao)
+
+
+@contextmanager
+def cursor_db(destino=None):
+    """
+    Cursor de uma conexão emprestada do pool pelo bloco `with`; a conexão
+    volta ao pool no fim do bloco (ou é descartada se houve erro).
+    
+    As consultas da API só leem, então vão para a réplica de leitura
+    quando ela está disponível (ver leitura_disponivel); destino='primario'
+    ou 'leitura' força um dos dois.
+    
+    A espera pelo pool e as consultas ficam limitadas ao prazo restante da
+    requisição, e o resultado de cada bloco alimenta o disjuntor do destino.
+    """
+    prazo = prazo_restante()
+    if prazo <= 0:
+        raise PrazoEsgotado(f"Prazo da rota {rota_atual()} esgotado")
+    
+    permitido = False
+    if destino is None:
+        destino = 'primario'
+        if leitura_disponivel():
+            try:
+                disjuntor_leitura.permitir()
+                destino = 'leitura'
+                permitido = True
+            except CircuitoAberto:
+                pass  # Réplica recusada pelo disjuntor: lê do primário
+    
+    if destino == 'leitura':
+        pool, disjuntor_destino = pool_leitura, disjuntor_leitura
+    else:
+        pool, disjuntor_destino = pool_conexoes, disjuntor
+    if not permitido:
+        disjuntor_destino.permitir()
+    sql_destino.inc(destino=destino)
+    
+    inicio = time.monotonic()
+    falhou = False
+    try:
+        with pool.conexao(espera=min(prazo, pool.espera)) as conn:
+            # Timeout por consulta da conexão (pymssql._mssql)
+            conn._conn.query_timeout = max(1, min(SQL_TIMEOUT, math.ceil(prazo)))
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+    except ERROS_BANCO:
+        falhou = True
+        raise
+    finally:
+        disjuntor_destino.registrar(time.monotonic() - inicio, falhou)
+
+
+_leitura = {'usar': True, 'divergente_desde': None, 'expira': 0.0}
+_leitura_lock = threading.Lock()
+
+
+def leitura_disponivel():
+    """
+    Indica se as leituras podem ir para a réplica de leitura.
+    
+    A réplica é comparada com o primário a cada LEITURA_VERIFICACAO
+    segundos. Se a versão dos dados dela ficar diferente da do primário
+    (carga ainda não replicada) por mais de LEITURA_MAX_ATRASO segundos,
+    ou se ela não responder, as leituras vão para o primário até a próxima
+    verificação. Se o primário não responder, a réplica continua em uso.
+    """
+    if pool_leitura is None:
+        return False
+    
+    agora = time.monotonic()
+    if agora < _leitura['expira'] or not _leitura_lock.acquire(blocking=False):
+        return _leitura['usar']
+    try:
+        try:
+            versao_leitura = consultar_versao('leitura')
+        except BANCO_INDISPONIVEL as e:
+            print(f"Réplica de leitura indisponível: {str(e)}")
+            _leitura['usar'] = False
+        else:
+            try:
+                versao_primario = consultar_versao('primario')
+            except BANCO_INDISPONIVEL as e:
+                print(f"Primário indisponível, lendo da réplica: {str(e)}")
+                versao_primario = versao_leitura
+            
+            if versao_leitura == versao_primario:
+                _leitura['divergente_desde'] = None
+            elif _leitura['divergente_desde'] is None:
+                _leitura['divergente_desde'] = agora
+            divergente_desde = _leitura['divergente_desde']
+            _leitura['usar'] = (
+                divergente_desde is None
+                or agora - divergente_desde <= LEITURA_MAX_ATRASO
+            )
+        _leitura['expira'] = agora + LEITURA_VERIFICACAO
+        return _leitura['usar']
+    finally:
+        _leitura_lock.release()
+
+
+def rota_atual():
+    """
+    Regra da rota da requisição atual, usada como label nas métricas.
+    """
+    if not has_request_context():
+        return 'sem_requisicao'
+    return request.url_rule.rule if request.url_rule else 'desconhecida'
+
+
+def executar_consulta(cursor, sql, params=None):
+    """
+    Executa a consulta e lê todas as linhas, registrando o tempo de SQL e
+    as linhas lidas na rota atual.
+    """
+    inicio = time.perf_counter()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    rota = rota_atual()
+    sql_duracao.observar(time.perf_counter() - inicio, rota=rota)
+    sql_linhas.inc(len(rows), rota=rota)
+    return rows
+
+
+def consultar_versao(destino=None):
+    """
+    Consulta a versão dos dados no banco (ver versao_dados).
+    """
+    with cursor_db(destino) as cursor:
+        rows = executar_consulta(cursor, """
+            SELECT u.data_pregao, COUNT(*)
+            FROM dbo.DadosPregao d
+            JOIN (
+                SELECT MAX(data_pregao) AS data_pregao
+                FROM dbo.DadosPregao
+            ) u ON d.data_pregao = u.data_pregao
+            GROUP BY u.data_pregao
+        """)
+    
+    if rows:
+        return (rows[0][0].strftime('%Y-%m-%d'), rows[0][1])
+    return (None, 0)
+
+
+_versao_dados = {'valor': (None, 0), 'expira': 0.0}
+_versao_dados_lock = threading.Lock()
+
+
+def versao_dados():
+    """
+    Retorna a versão dos dados: (última data de pregão YYYY-MM-DD, linhas
+    dessa data). Muda quando um pregão novo é carregado e enquanto a carga
+    do último pregão avança. O valor é reaproveitado por ULTIMA_DATA_TTL
+    segundos.
+    """
+    with _versao_dados_lock:
+        if time.monotonic() < _versao_dados['expira']:
+            return _versao_dados['valor']
+
+        try:
+            versao = consultar_versao()
+        except BANCO_INDISPONIVEL as e:
+            # Com o banco fora, a última versão conhecida continua valendo
+            # e as rotas atendidas em memória seguem respondendo
+            if _versao_dados['valor'][0] is None:
+                raise
+            print(f"Erro ao atualizar versão dos dados: {str(e)}")
+            _versao_dados['expira'] = time.monotonic() + ULTIMA_DATA_TTL
+            return _versao_dados['valor']
+
+        if cache_disco is not None and versao != _versao_dados['valor']:
+            cache_disco.invalidar(texto_versao(versao))
+        _versao_dados['valor'] = versao
+        _versao_dados['expira'] = time.monotonic() + ULTIMA_DATA_TTL
+        return versao
+
+
+def texto_versao(versao):
+    return f"{versao[0]}/{versao[1]}"
+
+
+def versao_cache():
+    """
+    Versão atual dos dados como texto, gravada nas entradas do cache em
+    disco; None se não for possível obtê-la.
+    """
+    try:
+        versao = versao_dados()
+    except BANCO_INDISPONIVEL:
+        return None
+    return texto_versao(versao) if versao[0] else None
+
+
+def ultima_data_pregao():
+    """
+    Retorna a última data de pregão carregada (YYYY-MM-DD).
+    """
+    return versao_dados()[0]
+
+
+# --------------------------------------------------
+# RÉPLICA LOCAL DOS ÚLTIMOS PREGÕES
+# --------------------------------------------------
+def carregar_replica(desde):
+    """
+    Busca no Azure SQL as linhas para a réplica local: a partir de `desde`
+    ou, na primeira carga, os REPLICA_LOCAL_DIAS pregões mais recentes.
+    """
+    with cursor_db() as cursor:
+        if desde is None:
+            desde = executar_consulta(cursor, """
+                SELECT MIN(data_pregao)
+                FROM (
+                    SELECT DISTINCT TOP (%s) data_pregao
+                    FROM dbo.DadosPregao
+                    ORDER BY data_pregao DESC
+                ) d
+            """, (REPLICA_LOCAL_DIAS,))[0][0]
+
+        rows = executar_consulta(cursor, """
+            SELECT
+                ticker,
+                data_pregao,
+                preco_abertura,
+                preco_min,
+                preco_max,
+                preco_medio,
+                preco_ultimo,
+                quantidade_negociada,
+                data_insercao
+            FROM dbo.DadosPregao
+            WHERE data_pregao >= %s
+        """, (desde,))
+
+    return rows
+
+
+replica = (
+    ReplicaLocal(carregar_replica, REPLICA_LOCAL_DIAS, REPLICA_LOCAL_ARQUIVO)
+    if REPLICA_LOCAL_DIAS > 0 else None
+)
+
+
+def replica_para(data=None):
+    """
+    Retorna a réplica local se ela cobre a data (None = última data
+    carregada), sincronizando-a antes se houver um pregão novo. Retorna
+    None quando a consulta deve ir para o Azure SQL.
+    """
+    if replica is None:
+        return None
+
+    versao = versao_dados()
+    try:
+        replica.sincronizar(versao)
+    except Exception as e:
+        print(f"Erro ao sincronizar réplica local: {str(e)}")
+        return None
+
+    if not replica.cobre(data or versao[0]):
+        return None
+
+    replica_consultas.inc(rota=rota_atual())
+    return replica
+
+
+# --------------------------------------------------
+# SNAPSHOT DAS ÚLTIMAS COTAÇÕES
+# --------------------------------------------------
+def consultar_ultimas_cotacoes(desde=None, tickers=None):
+    """
+    Busca no Azure SQL a linha mais recente de cada ticker (opcionalmente
+    só dos tickers informados) ou, com `desde`, todas as linhas a partir
+    dessa data. Usada pelo snapshot e como fallback dele.
+    """
+    filtros = []
+    params = []
+    if desde is not None:
+        filtros.append("data_pregao >= %s")
+        params.append(desde)
+    if tickers:
+        filtros.append("ticker IN ({})".format(', '.join(['%s'] * len(tickers))))
+        params.extend(tickers)
+    where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+
+    with cursor_db() as cursor:
+        if desde is not None:
+            rows = executar_consulta(cursor, f"""
+                SELECT
+                    ticker,
+                    data_pregao,
+                    preco_abertura,
+                    preco_min,
+                    preco_max,
+                    preco_medio,
+                    preco_ultimo,
+                    quantidade_negociada,
+                    data_insercao
+                FROM dbo.DadosPregao
+                {where}
+            """, tuple(params))
+        else:
+            rows = executar_consulta(cursor, f"""
+                SELECT
+                    ticker,
+                    data_pregao,
+                    preco_abertura,
+                    preco_min,
+                    preco_max,
+                    preco_medio,
+                    preco_ultimo,
+                    quantidade_negociada,
+                    data_insercao
+                FROM (
+                    SELECT
+                        *,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY ticker
+                            ORDER BY data_pregao DESC
+                        ) AS posicao
+                    FROM dbo.DadosPregao
+                    {where}
+                ) u
+                WHERE posicao = 1
+            """, tuple(params))
+
+    return rows
+
+
+ultimas_cotacoes = UltimasCotacoes(consultar_ultimas_cotacoes)
+
+
+def snapshot_atualizado():
+    """
+    Retorna o snapshot das últimas cotações sincronizado com a versão atual
+    dos dados, ou None se ele não pôde ser carregado.
+    """
+    try:
+        ultimas_cotacoes.sincronizar(versao_dados())
+    except Exception as e:
+        print(f"Erro ao sincronizar últimas cotações: {str(e)}")
+    return ultimas_cotacoes if ultimas_cotacoes.carregado else None
+
+
+# --------------------------------------------------
+# MEDIÇÃO DAS REQUISIÇÕES
+# --------------------------------------------------
+# Registrados antes dos demais hooks: o before_request roda primeiro e o
+# after_request por último, medindo também cache e compressão.
+@app.before_request
+def iniciar_medicao():
+    g.inicio_requisicao = time.perf_counter()
+    requisicoes_em_andamento.inc()
+
+
+@app.after_request
+def registrar_medicao(response):
+    rota = rota_atual()
+    requisicoes_duracao.observar(
+        time.perf_counter() - g.inicio_requisicao,
+        rota=rota, metodo=request.method
+    )
+    requisicoes_total.inc(
+        rota=rota, metodo=request.method, status=response.status_code
+    )
+    return response
+
+
+@app.teardown_request
+def finalizar_medicao(exc):
+    if 'inicio_requisicao' in g:
+        requisicoes_em_andamento.dec()
+
+
+@metricas.coletor
+def coletar_singleflight():
+    singleflight_executadas.definir(singleflight.executadas)
+    singleflight_coalescidas.definir(singleflight.coalescidas)
+
+
+def destinos_db():
+    yield 'primario', pool_conexoes, disjuntor
+    if LEITURA_CONFIGURADA:
+        yield 'leitura', pool_leitura, disjuntor_leitura
+
+
+@metricas.coletor
+def coletar_disjuntor():
+    for destino, _, disjuntor_destino in destinos_db():
+        disjuntor_estado.definir(
+            {'fechado': 0, 'meio-aberto': 1, 'aberto': 2}[disjuntor_destino.estado],
+            destino=destino
+        )
+        disjuntor_recusadas.definir(disjuntor_destino.recusadas, destino=destino)
+
+
+@metricas.coletor
+def coletar_pool():
+    for destino, pool, _ in destinos_db():
+        pool_abertas.definir(pool.abertas, destino=destino)
+        pool_em_uso.definir(pool.em_uso, destino=destino)
+
+
+# --------------------------------------------------
+# RESPOSTAS IMUTÁVEIS E COMPRESSÃO
+# --------------------------------------------------
+def data_valida(data):
+    """
+    Indica se a data está no formato YYYY-MM-DD.
+    """
+    try:
+        datetime.strptime(data, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def data_fechada(data):
+    """
+    Indica se a data (YYYY-MM-DD) é anterior à última data carregada, ou
+    seja, se os dados dela não mudam mais. Datas mal formadas nunca são
+    fechadas (a comparação é de texto: "1" < "2024-01-02").
+    """
+    if not data_valida(data):
+        return False
+    ultima = ultima_data_pregao()
+    return bool(ultima and data < ultima)
+
+
+def marcar_imutavel():
+    """
+    Marca a resposta da requisição atual como imutável: ela será guardada
+    (já comprimida) e servida direto nas próximas requisições iguais.
+    """
+    g.resposta_imutavel = True
+
+
+@app.before_request
+def servir_resposta_armazenada():
+    """
+    Serve respostas imutáveis já armazenadas sem consultar o banco nem
+    comprimir novamente.
+    """
+    if request.method != 'GET':
+        return None
+
+    g.encoding = negociar_encoding(request.accept_encodings)
+    armazenada = armazem_respostas.obter(request.full_path, g.encoding)
+    if armazenada is None:
+        return servir_do_disco()
+
+    corpo, mimetype, encoding = armazenada
+    g.resposta_pronta = True
+    resposta = app.response_class(corpo, mimetype=mimetype)
+    if encoding:
+        resposta.headers['Content-Encoding'] = encoding
+    return resposta
+
+
+def usar_cache_disco():
+    """
+    Indica se a requisição atual usa o cache em disco: só rotas de dados,
+    e não com os disjuntores abertos (a versão dos dados iria ao banco
+    antes de a rota responder).
+    """
+    return (cache_disco is not None
+            and rota_atual().startswith(PREFIXO_ROTAS_DADOS)
+            and any(d.restante == 0 for _, _, d in destinos_db()))
+
+
+def servir_do_disco():
+    """
+    Procura a resposta no cache em disco. As imutáveis voltam para o
+    armazém em memória; as demais só são servidas se foram calculadas na
+    versão atual dos dados (e são comprimidas no after_request).
+    """
+    if not usar_cache_disco():
+        return None
+
+    entrada = cache_disco.obter(request.full_path, versao_cache())
+    if entrada is None:
+        return None
+
+    corpo, mimetype, imutavel = entrada
+    g.resposta_do_disco = True
+    cache_disco_acertos.inc(rota=rota_atual())
+    if imutavel:
+        armazem_respostas.guardar(request.full_path, corpo, mimetype)
+        armazenada = armazem_respostas.obter(request.full_path, g.encoding)
+        if armazenada is not None:
+            corpo, mimetype, encoding = armazenada
+            g.resposta_pronta = True
+            resposta = app.response_class(corpo, mimetype=mimetype)
+            if encoding:
+                resposta.headers['Content-Encoding'] = encoding
+            return resposta
+    return app.response_class(corpo, mimetype=mimetype)
+
+
+def guardar_no_disco(corpo, mimetype):
+    """
+    Grava no cache em disco a resposta calculada nesta requisição.
+    """
+    if g.get('resposta_do_disco') or not usar_cache_disco():
+        return
+    if g.get('resposta_imutavel'):
+        cache_disco.guardar(request.full_path, corpo, mimetype)
+        return
+    versao = versao_cache()
+    if versao:
+        cache_disco.guardar(request.full_path, corpo, mimetype, versao)
+
+
+@app.after_request
+def comprimir_resposta(response):
+    """
+    Comprime a resposta JSON conforme o Accept-Encoding do cliente e guarda
+    as respostas marcadas como imutáveis (e as das rotas de dados, para
+    quando o banco estiver indisponível).
+    """
+    response.vary.add('Accept-Encoding')
+
+    if (g.get('resposta_pronta')
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.status_code != 200
+            or not response.is_json
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    encoding = g.get('encoding')
+    corpo = response.get_data()
+    guardar_no_disco(corpo, response.mimetype)
+
+    armazenada = None
+    if g.get('resposta_imutavel'):
+        armazem_respostas.guardar(request.full_path, corpo, response.mimetype)
+        armazenada = armazem_respostas.obter(request.full_path, encoding)
+    elif rota_atual().startswith(PREFIXO_ROTAS_DADOS):
+        respostas_recentes.guardar(request.full_path, corpo, response.mimetype)
+
+    if armazenada is not None:
+        corpo, _, encoding = armazenada
+    elif encoding and len(corpo) >= TAMANHO_MINIMO:
+        corpo = comprimir(corpo, encoding)
+    else:
+        return response
+
+    response.set_data(corpo)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# --------------------------------------------------
+# FORMATAÇÃO DE LINHAS
+# --------------------------------------------------
+def linha_para_cotacao(row):
+    """
+    Converte uma linha (ticker, data_pregao, abertura, min, max, medio,
+    ultimo, quantidade) no dicionário usado nas respostas de cotação/histórico.
+    """
+    return {
+        'ticker': row[0],
+        'data': row[1].strftime('%Y-%m-%d'),
+        'abertura': float(row[2]),
+        'minimo': float(row[3]),
+        'maximo': float(row[4]),
+        'medio': float(row[5]),
+        'fechamento': float(row[6]),
+        'volume': int(row[7])
+    }
+
+
+# Datas no formato colunar são enviadas como dias desde 1970-01-01
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def linhas_para_colunas(rows):
+    """
+    Converte linhas de cotação no formato colunar compacto: um array por
+    campo e datas como deslocamento em dias desde 1970-01-01.
+    """
+    colunas = list(zip(*rows)) if rows else [()] * 8
+    return {
+        'data_base': '1970-01-01',
+        'ticker': list(colunas[0]),
+        'data': [d.toordinal() - EPOCH_ORDINAL for d in colunas[1]],
+        'abertura': list(colunas[2]),
+        'minimo': list(colunas[3]),
+        'maximo': list(colunas[4]),
+        'medio': list(colunas[5]),
+        'fechamento': list(colunas[6]),
+        'volume': list(colunas[7])
+    }
+
+
+def formatar_cotacoes(rows):
+    """
+    Formata as linhas de cotação conforme o query param "formato":
+    - linhas (default): lista de objetos, um por registro
+    - colunar: um array por campo (ver linhas_para_colunas)
+    """
+    if request.args.get('formato') == 'colunar':
+        return linhas_para_colunas(rows)
+    return [linha_para_cotacao(row) for row in rows]
+
+
+def parse_tickers(valor):
+    """
+    Lê uma lista de tickers separados por vírgula (ou parâmetros repetidos),
+    normalizando para maiúsculas e removendo duplicados mantendo a ordem.
+    """
+    tickers = []
+    for item in valor:
+        for ticker in item.split(','):
+            ticker = ticker.strip().upper()
+            if ticker and ticker not in tickers:
+                tickers.append(ticker)
+    return tickers
+
+
+def codificar_cursor(data_pregao):
+    """
+    Gera o token opaco de paginação a partir da última data da página.
+    """
+    valor = data_pregao.strftime('%Y-%m-%d')
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(token):
+    """
+    Lê o token de paginação e devolve a data (YYYY-MM-DD) em que a próxima
+    página começa. Lança ValueError se o token for inválido.
+    """
+    try:
+        padding = '=' * (-len(token) % 4)
+        valor = base64.urlsafe_b64decode(token + padding).decode()
+        return datetime.strptime(valor, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+
 # --------------------------------------------------
 # DECORATOR PARA TRATAMENTO DE ERROS
 # --------------------------------------------------
+# Banco fora do ar, lento demais ou recusado pelo disjuntor
+BANCO_INDISPONIVEL = ERROS_BANCO + (CircuitoAberto, PoolEsgotado, PrazoEsgotado)
+
+
+def resposta_banco_indisponivel(erro):
+    """
+    Serve a última resposta guardada da URL, marcada como obsoleta, ou
+    responde 503 para o cliente tentar de novo mais tarde.
+    """
+    armazenada = None
+    if request.method == 'GET':
+        armazenada = respostas_recentes.obter(request.full_path, g.get('encoding'))
+    
+    if armazenada is not None:
+        corpo, mimetype, encoding = armazenada
+        g.resposta_pronta = True
+        respostas_obsoletas.inc(rota=rota_atual())
+        resposta = app.response_class(corpo, mimetype=mimetype)
+        if encoding:
+            resposta.headers['Content-Encoding'] = encoding
+        resposta.headers['Warning'] = '110 - "Response is Stale"'
+        resposta.headers['X-Cache'] = 'STALE'
+        return resposta
+    
+    resposta = jsonify({
+        'error': True,
+        'message': str(erro)
+    })
+    resposta.status_code = 503
+    # A próxima tentativa possível é a do primeiro disjuntor a liberar
+    # (primário ou réplica de leitura)
+    restante = min(d.restante for _, _, d in destinos_db())
+    resposta.headers['Retry-After'] = str(max(1, math.ceil(restante)))
+    return resposta
+
+
 def handle_errors(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
             return f(*args, **kwargs)
+        except BANCO_INDISPONIVEL as e:
+            print(f"Banco indisponível: {str(e)}")
+            return resposta_banco_indisponivel(e)
         except Exception as e:
             return jsonify({
                 'error': True,
@@ -58,304 +1022,722 @@ def handle_errors(f):
 # ENDPOINTS DA API
 # --------------------------------------------------
 
-@app.route('/')
-def index():
-    """
-    Endpoint raiz - Documentação da API
-    """
-    return jsonify({
-        'api': 'API de Consulta de Ativos B3',
-        'version': '1.0',
-        'endpoints': {
-            '/': 'Documentação da API',
-            '/health': 'Status da API e conexão com banco',
-            '/api/tickers': 'Lista todos os tickers disponíveis',
-            '/api/datas': 'Lista todas as datas disponíveis',
-            '/api/ativo/<ticker>': 'Consulta dados de um ativo específico',
-            '/api/ativo/<ticker>/historico': 'Histórico completo de um ativo',
-            '/api/cotacao': 'Cotações por data (query params: data, ticker)',
-            '/api/top-volume': 'Top 10 ativos por volume (query param: data)',
-            '/api/resumo': 'Resumo do mercado por data (query param: data)'
-        }
-    })
+@app.route('/')
+def index():
+    """
+    Endpoint raiz - Documentação da API
+    """
+    return jsonify({
+        'api': 'API de Consulta de Ativos B3',
+        'version': '1.0',
+        'endpoints': {
+            '/': 'Documentação da API',
+            '/health': 'Status da API e conexão com banco',
+            '/api/tickers': 'Lista todos os tickers disponíveis',
+            '/api/datas': 'Lista todas as datas disponíveis',
+            '/api/ativo': 'Dados mais recentes de vários ativos (query param: tickers)',
+            '/api/ativo/<ticker>': 'Consulta dados de um ativo específico',
+            '/api/ativo/<ticker>/historico': 'Histórico paginado de um ativo (query params: limit, cursor, formato)',
+            '/api/historico': 'Histórico de vários ativos (query params: tickers, inicio, fim, limit, formato)',
+            '/api/cotacao': 'Cotações por data (query params: data, ticker, formato)',
+            '/api/comparar': 'Variações por ticker entre dois pregões (query params: de, ate, ordenar, ordem, n, formato)',
+            '/api/top-volume': 'Top 10 ativos por volume (query param: data)',
+            '/api/ranking': 'Top N ativos por métrica (query params: metrica, n, data)',
+            '/api/resumo': 'Resumo do mercado por data ou por período (query params: data, inicio, fim, granularidade)',
+            '/metrics': 'Métricas do worker (formato Prometheus)'
+        }
+    })
+
+
+@app.route('/health')
+@handle_errors
+def health():
+    """
+    Verifica status da API e conexão com banco. Com o banco indisponível
+    responde 503, nunca uma resposta guardada: é o que balanceadores e
+    monitores usam para tirar a instância de uso.
+    """
+    try:
+        with cursor_db() as cursor:
+            # Testar conexão
+            total_registros = executar_consulta(
+                cursor, "SELECT COUNT(*) FROM dbo.DadosPregao"
+            )[0][0]
+            
+            # Última data disponível
+            ultima_data = executar_consulta(cursor, """
+                SELECT MAX(data_pregao) 
+                FROM dbo.DadosPregao
+            """)[0][0]
+    except BANCO_INDISPONIVEL as e:
+        print(f"Banco indisponível: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'database': 'disconnected',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 503
+    
+    return jsonify({
+        'status': 'ok',
+        'database': 'connected',
+        'total_registros': total_registros,
+        'ultima_data': ultima_data.strftime('%Y-%m-%d') if ultima_data else None,
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/api/tickers')
+@handle_errors
+def get_tickers():
+    """
+    Lista todos os tickers disponíveis
+    """
+    with cursor_db() as cursor:
+        rows = executar_consulta(cursor, """
+            SELECT DISTINCT ticker
+            FROM dbo.DadosPregao
+            ORDER BY ticker
+        """)
+        
+        tickers = [row[0] for row in rows]
+    
+    return jsonify({
+        'total': len(tickers),
+        'tickers': tickers
+    })
+
+
+@app.route('/api/datas')
+@handle_errors
+def get_datas():
+    """
+    Lista todas as datas disponíveis
+    """
+    with cursor_db() as cursor:
+        rows = executar_consulta(cursor, """
+            SELECT DISTINCT data_pregao
+            FROM dbo.DadosPregao
+            ORDER BY data_pregao DESC
+        """)
+        
+        datas = [row[0].strftime('%Y-%m-%d') for row in rows]
+    
+    return jsonify({
+        'total': len(datas),
+        'datas': datas
+    })
+
+
+def linha_para_ativo(row):
+    """
+    Converte a linha mais recente de um ticker (com data_insercao) no
+    dicionário das respostas de /api/ativo.
+    """
+    return {
+        'ticker': row[0],
+        'data_pregao': row[1].strftime('%Y-%m-%d'),
+        'preco_abertura': float(row[2]),
+        'preco_minimo': float(row[3]),
+        'preco_maximo': float(row[4]),
+        'preco_medio': float(row[5]),
+        'preco_ultimo': float(row[6]),
+        'quantidade_negociada': int(row[7]),
+        'data_insercao': row[8].strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+@app.route('/api/ativo')
+@handle_errors
+def get_ativos():
+    """
+    Dados mais recentes de vários ativos de uma vez
+    Query param:
+    - tickers: lista de tickers separados por vírgula (ex: PETR4,VALE3)
+    """
+    tickers = parse_tickers(request.args.getlist('tickers'))
+    
+    if not tickers:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "tickers" é obrigatório (ex: PETR4,VALE3)'
+        }), 400
+    
+    if len(tickers) > MAX_TICKERS_LOTE:
+        return jsonify({
+            'error': True,
+            'message': f'Máximo de {MAX_TICKERS_LOTE} tickers por requisição'
+        }), 400
+    
+    snapshot = snapshot_atualizado()
+    if snapshot:
+        rows, nao_encontrados = snapshot.obter_varios(tickers)
+    else:
+        por_ticker = {
+            row[0]: row for row in consultar_ultimas_cotacoes(tickers=tickers)
+        }
+        rows = [por_ticker[t] for t in tickers if t in por_ticker]
+        nao_encontrados = [t for t in tickers if t not in por_ticker]
+    
+    return jsonify({
+        'total': len(rows),
+        'nao_encontrados': nao_encontrados,
+        'ativos': [linha_para_ativo(row) for row in rows]
+    })
+
+
+@app.route('/api/ativo/<ticker>')
+@handle_errors
+def get_ativo(ticker):
+    """
+    Consulta dados mais recentes de um ativo específico
+    """
+    snapshot = snapshot_atualizado()
+    if snapshot:
+        # Lookup no snapshot: ausência significa que o ticker não existe
+        row = snapshot.obter(ticker.upper())
+    else:
+        row = consultar_ativo(ticker)
+    
+    if not row:
+        return jsonify({
+            'error': True,
+            'message': f'Ticker {ticker} não encontrado'
+        }), 404
+    
+    return jsonify(linha_para_ativo(row))
+
+
+def consultar_ativo(ticker):
+    """
+    Busca no Azure SQL o registro mais recente do ticker, ou None.
+    """
+    with cursor_db() as cursor:
+        # Buscar dados mais recentes do ticker
+        rows = executar_consulta(cursor, """
+            SELECT TOP 1
+                ticker,
+                data_pregao,
+                preco_abertura,
+                preco_min,
+                preco_max,
+                preco_medio,
+                preco_ultimo,
+                quantidade_negociada,
+                data_insercao
+            FROM dbo.DadosPregao
+            WHERE ticker = %s
+            ORDER BY data_pregao DESC
+        """, (ticker.upper(),))
+    
+    return rows[0] if rows else None
+
+
+@app.route('/api/ativo/<ticker>/historico')
+@handle_errors
+def get_historico(ticker):
+    """
+    Histórico de um ativo, paginado por cursor (mais recente primeiro)
+    Query params:
+    - limit: número de registros por página (default: 30, máximo: 500)
+    - cursor: token "proximo_cursor" devolvido pela página anterior
+    - formato: "colunar" para resposta compacta (opcional)
+    """
+    limit = request.args.get('limit', 30, type=int)
+    cursor_token = request.args.get('cursor')
+
+    if limit < 1:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "limit" deve ser maior que zero'
+        }), 400
+    limit = min(limit, MAX_PAGINA_HISTORICO)
+
+    antes_de = None
+    if cursor_token:
+        try:
+            antes_de = decodificar_cursor(cursor_token)
+        except ValueError:
+            return jsonify({
+                'error': True,
+                'message': 'Parâmetro "cursor" inválido'
+            }), 400
+
+    # Paginação por chave: cada página é um seek no índice
+    # (ticker, data_pregao) a partir da última data da página anterior,
+    # independente da profundidade. Busca limit + 1 para saber se há mais.
+    filtros = ["ticker = %s"]
+    params = [ticker.upper()]
+    if antes_de:
+        filtros.append("data_pregao < %s")
+        params.append(antes_de)
+
+    with cursor_db() as cursor:
+        rows = executar_consulta(cursor, f"""
+            SELECT TOP (%s)
+                ticker,
+                data_pregao,
+                preco_abertura,
+                preco_min,
+                preco_max,
+                preco_medio,
+                preco_ultimo,
+                quantidade_negociada
+            FROM dbo.DadosPregao
+            WHERE {' AND '.join(filtros)}
+            ORDER BY data_pregao DESC
+        """, tuple([limit + 1] + params))
+
+    if not rows and not antes_de:
+        return jsonify({
+            'error': True,
+            'message': f'Nenhum dado encontrado para {ticker}'
+        }), 404
+
+    # Páginas a partir de um cursor contêm apenas datas já fechadas
+    if antes_de:
+        marcar_imutavel()
+
+    proximo_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        proximo_cursor = codificar_cursor(rows[-1][1])
+
+    return jsonify({
+        'ticker': ticker.upper(),
+        'total_registros': len(rows),
+        'limit': limit,
+        'proximo_cursor': proximo_cursor,
+        'historico': formatar_cotacoes(rows)
+    })
+
+
+@app.route('/api/historico')
+@handle_errors
+def get_historico_lote():
+    """
+    Histórico de vários ativos em uma única consulta
+    Query params:
+    - tickers: lista de tickers separados por vírgula (ex: PETR4,VALE3)
+    - inicio: data inicial no formato YYYY-MM-DD (opcional)
+    - fim: data final no formato YYYY-MM-DD (opcional)
+    - limit: número máximo de registros por ticker (default: 30 sem
+      período; com período, MAX_REGISTROS_POR_TICKER, que também é o
+      teto). Os tickers com mais registros no período que o limite vêm
+      em "truncados", com os mais recentes
+    - formato: "colunar" para resposta compacta (opcional)
+    """
+    tickers = parse_tickers(request.args.getlist('tickers'))
+    inicio = request.args.get('inicio')
+    fim = request.args.get('fim')
+    limit = request.args.get('limit', type=int)
+
+    if not tickers:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "tickers" é obrigatório (ex: PETR4,VALE3)'
+        }), 400
+
+    if len(tickers) > MAX_TICKERS_LOTE:
+        return jsonify({
+            'error': True,
+            'message': f'Máximo de {MAX_TICKERS_LOTE} tickers por requisição'
+        }), 400
+
+    try:
+        for data in (inicio, fim):
+            if data:
+                datetime.strptime(data, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetros "inicio" e "fim" devem estar no formato YYYY-MM-DD'
+        }), 400
+
+    if inicio and fim and inicio > fim:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "inicio" deve ser anterior a "fim"'
+        }), 400
+
+    if limit is None and not (inicio or fim):
+        limit = 30
+    if limit is None or limit > MAX_REGISTROS_POR_TICKER:
+        limit = MAX_REGISTROS_POR_TICKER
+    if limit < 1:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "limit" deve ser maior que zero'
+        }), 400
+
+    # Uma única consulta para todos os tickers: ROW_NUMBER particionado por
+    # ticker limita os N registros mais recentes de cada um usando o índice
+    # (ticker, data_pregao). Um registro a mais por ticker indica que o
+    # histórico dele foi truncado no limite.
+    filtros = ["ticker IN ({})".format(', '.join(['%s'] * len(tickers)))]
+    params = list(tickers)
+
+    if inicio:
+        filtros.append("data_pregao >= %s")
+        params.append(inicio)
+    if fim:
+        filtros.append("data_pregao <= %s")
+        params.append(fim)
+
+    params.append(limit + 1)
+
+    with cursor_db() as cursor:
+        rows = executar_consulta(cursor, f"""
+            SELECT
+                ticker,
+                data_pregao,
+                preco_abertura,
+                preco_min,
+                preco_max,
+                preco_medio,
+                preco_ultimo,
+                quantidade_negociada
+            FROM (
+                SELECT
+                    ticker,
+                    data_pregao,
+                    preco_abertura,
+                    preco_min,
+                    preco_max,
+                    preco_medio,
+                    preco_ultimo,
+                    quantidade_negociada,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY ticker
+                        ORDER BY data_pregao DESC
+                    ) AS posicao
+                FROM dbo.DadosPregao
+                WHERE {' AND '.join(filtros)}
+            ) h
+            WHERE posicao <= %s
+            ORDER BY ticker, data_pregao DESC
+        """, tuple(params))
+
+        historicos = {ticker: [] for ticker in tickers}
+        for row in rows:
+            historicos[row[0]].append(row)
+
+    truncados = [ticker for ticker in tickers if len(historicos[ticker]) > limit]
+    for ticker in truncados:
+        del historicos[ticker][limit:]
+    total_registros = sum(len(h) for h in historicos.values())
+    nao_encontrados = [ticker for ticker in tickers if not historicos[ticker]]
 
+    if data_fechada(fim):
+        marcar_imutavel()
 
-@app.route('/health')
-@handle_errors
-def health():
-    """
-    Verifica status da API e conexão com banco
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Testar conexão
-    cursor.execute("SELECT COUNT(*) FROM dbo.DadosPregao")
-    total_registros = cursor.fetchone()[0]
-    
-    # Última data disponível
-    cursor.execute("""
-        SELECT MAX(data_pregao) 
-        FROM dbo.DadosPregao
-    """)
-    ultima_data = cursor.fetchone()[0]
-    
-    cursor.close()
-    conn.close()
-    
     return jsonify({
-        'status': 'ok',
-        'database': 'connected',
+        'tickers': tickers,
+        'inicio': inicio,
+        'fim': fim,
+        'limit': limit,
         'total_registros': total_registros,
-        'ultima_data': ultima_data.strftime('%Y-%m-%d') if ultima_data else None,
-        'timestamp': datetime.now().isoformat()
+        'nao_encontrados': nao_encontrados,
+        'truncados': truncados,
+        'historicos': {t: formatar_cotacoes(h) for t, h in historicos.items() if h}
     })
 
 
-@app.route('/api/tickers')
+@app.route('/api/cotacao')
 @handle_errors
-def get_tickers():
+def get_cotacao():
     """
-    Lista todos os tickers disponíveis
+    Consulta cotações por data e/ou ticker
+    Query params:
+    - data: data no formato YYYY-MM-DD
+    - ticker: código do ativo (opcional)
+    - formato: "colunar" para resposta compacta (opcional)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    data = request.args.get('data')
+    ticker = request.args.get('ticker')
+    
+    if not data:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "data" é obrigatório (formato: YYYY-MM-DD)'
+        }), 400
     
-    cursor.execute("""
-        SELECT DISTINCT ticker
-        FROM dbo.DadosPregao
-        ORDER BY ticker
-    """)
+    local = replica_para(data)
+    if local:
+        rows = local.cotacoes(data, ticker.upper() if ticker else None)
+    else:
+        rows = consultar_cotacoes(data, ticker)
     
-    tickers = [row[0] for row in cursor.fetchall()]
+    if not rows:
+        return jsonify({
+            'error': True,
+            'message': f'Nenhuma cotação encontrada para a data {data}'
+        }), 404
     
-    cursor.close()
-    conn.close()
+    if data_fechada(data):
+        marcar_imutavel()
     
     return jsonify({
-        'total': len(tickers),
-        'tickers': tickers
+        'data': data,
+        'ticker': ticker.upper() if ticker else 'todos',
+        'total': len(rows),
+        'cotacoes': formatar_cotacoes(rows)
     })
 
 
-@app.route('/api/datas')
-@handle_errors
-def get_datas():
+def consultar_cotacoes(data, ticker=None):
     """
-    Lista todas as datas disponíveis
+    Busca no Azure SQL as cotações da data (de um ticker ou de todos).
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with cursor_db() as cursor:
+        if ticker:
+            # Consulta específica para um ticker
+            rows = executar_consulta(cursor, """
+                SELECT 
+                    ticker,
+                    data_pregao,
+                    preco_abertura,
+                    preco_min,
+                    preco_max,
+                    preco_medio,
+                    preco_ultimo,
+                    quantidade_negociada
+                FROM dbo.DadosPregao
+                WHERE data_pregao = %s
+                AND ticker = %s
+            """, (data, ticker.upper()))
+        else:
+            # Consulta todos os tickers da data
+            rows = executar_consulta(cursor, """
+                SELECT 
+                    ticker,
+                    data_pregao,
+                    preco_abertura,
+                    preco_min,
+                    preco_max,
+                    preco_medio,
+                    preco_ultimo,
+                    quantidade_negociada
+                FROM dbo.DadosPregao
+                WHERE data_pregao = %s
+                ORDER BY ticker
+            """, (data,))
     
-    cursor.execute("""
-        SELECT DISTINCT data_pregao
-        FROM dbo.DadosPregao
-        ORDER BY data_pregao DESC
-    """)
-    
-    datas = [row[0].strftime('%Y-%m-%d') for row in cursor.fetchall()]
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify({
-        'total': len(datas),
-        'datas': datas
-    })
+    return rows
 
 
-@app.route('/api/ativo/<ticker>')
+@app.route('/api/comparar')
 @handle_errors
-def get_ativo(ticker):
+def get_comparacao():
     """
-    Consulta dados mais recentes de um ativo específico
+    Compara por ticker dois pregões: variação do fechamento, variação
+    percentual, razão de volume e tickers novos ou removidos
+    Query params:
+    - de: data base no formato YYYY-MM-DD
+    - ate: data comparada no formato YYYY-MM-DD
+    - ordenar: variacao_pct, variacao, razao_volume, volume ou ticker (default: variacao_pct)
+    - ordem: asc ou desc (opcional, default do critério)
+    - n: retorna só os N primeiros (opcional)
+    - formato: "ndjson" para resposta em streaming, um ticker por linha (opcional)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Buscar dados mais recentes do ticker
-    cursor.execute("""
-        SELECT TOP 1
-            ticker,
-            data_pregao,
-            preco_abertura,
-            preco_min,
-            preco_max,
-            preco_medio,
-            preco_ultimo,
-            quantidade_negociada,
-            data_insercao
-        FROM dbo.DadosPregao
-        WHERE ticker = %s
-        ORDER BY data_pregao DESC
-    """, (ticker.upper(),))
-    
-    row = cursor.fetchone()
+    de = request.args.get('de')
+    ate = request.args.get('ate')
+    ordenacao = request.args.get('ordenar', 'variacao_pct')
+    ordem = request.args.get('ordem')
+    n = request.args.get('n', type=int)
     
-    if not row:
-        cursor.close()
-        conn.close()
+    try:
+        datetime.strptime(de, '%Y-%m-%d')
+        datetime.strptime(ate, '%Y-%m-%d')
+    except (TypeError, ValueError):
         return jsonify({
             'error': True,
-            'message': f'Ticker {ticker} não encontrado'
-        }), 404
-    
-    resultado = {
-        'ticker': row[0],
-        'data_pregao': row[1].strftime('%Y-%m-%d'),
-        'preco_abertura': float(row[2]),
-        'preco_minimo': float(row[3]),
-        'preco_maximo': float(row[4]),
-        'preco_medio': float(row[5]),
-        'preco_ultimo': float(row[6]),
-        'quantidade_negociada': int(row[7]),
-        'data_insercao': row[8].strftime('%Y-%m-%d %H:%M:%S')
-    }
+            'message': 'Parâmetros "de" e "ate" são obrigatórios (formato: YYYY-MM-DD)'
+        }), 400
     
-    cursor.close()
-    conn.close()
+    if ordenacao not in ORDENACOES_COMPARACAO:
+        return jsonify({
+            'error': True,
+            'message': f'Parâmetro "ordenar" deve ser um de: {", ".join(ORDENACOES_COMPARACAO)}'
+        }), 400
     
-    return jsonify(resultado)
-
-
-@app.route('/api/ativo/<ticker>/historico')
-@handle_errors
-def get_historico(ticker):
-    """
-    Histórico completo de um ativo
-    Query params:
-    - limit: número de registros (default: 30)
-    """
-    limit = request.args.get('limit', 30, type=int)
+    if ordem not in (None, 'asc', 'desc'):
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "ordem" deve ser asc ou desc'
+        }), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(f"""
-        SELECT TOP {limit}
-            ticker,
-            data_pregao,
-            preco_abertura,
-            preco_min,
-            preco_max,
-            preco_medio,
-            preco_ultimo,
-            quantidade_negociada
-        FROM dbo.DadosPregao
-        WHERE ticker = %s
-        ORDER BY data_pregao DESC
-    """, (ticker.upper(),))
-    
-    historico = []
-    for row in cursor.fetchall():
-        historico.append({
-            'ticker': row[0],
-            'data': row[1].strftime('%Y-%m-%d'),
-            'abertura': float(row[2]),
-            'minimo': float(row[3]),
-            'maximo': float(row[4]),
-            'medio': float(row[5]),
-            'fechamento': float(row[6]),
-            'volume': int(row[7])
-        })
+    if n is not None and n < 1:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "n" deve ser maior que zero'
+        }), 400
     
-    cursor.close()
-    conn.close()
+    local = replica_para(min(de, ate))
+    if local and local.cobre(max(de, ate)):
+        rows = local.comparacao(de, ate)
+    else:
+        rows = consultar_comparacao(de, ate)
     
-    if not historico:
+    if not rows:
         return jsonify({
             'error': True,
-            'message': f'Nenhum dado encontrado para {ticker}'
+            'message': f'Nenhuma cotação encontrada para as datas {de} e {ate}'
         }), 404
     
+    itens = comparar_pregoes(rows)
+    total_ativos = len(itens)
+    novos = sum(1 for item in itens if item['situacao'] == 'novo')
+    removidos = sum(1 for item in itens if item['situacao'] == 'removido')
+    
+    decrescente = None if ordem is None else ordem == 'desc'
+    itens = ordenar_comparacao(itens, ordenacao, decrescente, n)
+    
+    if request.args.get('formato') == 'ndjson':
+        # Um objeto por linha, serializado à medida que é enviado
+        def gerar():
+            for item in itens:
+                yield app.json.dumps(item) + '\n'
+        
+        return app.response_class(
+            stream_with_context(gerar()),
+            mimetype='application/x-ndjson'
+        )
+    
+    if data_fechada(max(de, ate)):
+        marcar_imutavel()
+    
     return jsonify({
-        'ticker': ticker.upper(),
-        'total_registros': len(historico),
-        'historico': historico
+        'de': de,
+        'ate': ate,
+        'ordenar': ordenacao,
+        'total_ativos': total_ativos,
+        'novos': novos,
+        'removidos': removidos,
+        'total': len(itens),
+        'comparacao': itens
     })
 
 
-@app.route('/api/cotacao')
-@handle_errors
-def get_cotacao():
+def consultar_comparacao(de, ate):
     """
-    Consulta cotações por data e/ou ticker
-    Query params:
-    - data: data no formato YYYY-MM-DD
-    - ticker: código do ativo (opcional)
+    Busca no Azure SQL os dois pregões já unidos por ticker em uma única
+    consulta: (ticker, fechamento_de, fechamento_ate, volume_de, volume_ate).
     """
-    data = request.args.get('data')
-    ticker = request.args.get('ticker')
-    
-    if not data:
-        return jsonify({
-            'error': True,
-            'message': 'Parâmetro "data" é obrigatório (formato: YYYY-MM-DD)'
-        }), 400
+    with cursor_db() as cursor:
+        rows = executar_consulta(cursor, """
+            SELECT
+                COALESCE(a.ticker, b.ticker) AS ticker,
+                a.preco_ultimo,
+                b.preco_ultimo,
+                a.quantidade_negociada,
+                b.quantidade_negociada
+            FROM (
+                SELECT ticker, preco_ultimo, quantidade_negociada
+                FROM dbo.DadosPregao
+                WHERE data_pregao = %s
+            ) a
+            FULL OUTER JOIN (
+                SELECT ticker, preco_ultimo, quantidade_negociada
+                FROM dbo.DadosPregao
+                WHERE data_pregao = %s
+            ) b ON b.ticker = a.ticker
+        """, (de, ate))
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    return rows
+
+
+def consultar_pregao(data):
+    """
+    Busca as linhas do pregão usadas nos rankings: (ticker, abertura,
+    minimo, maximo, fechamento, quantidade).
+    """
+    local = replica_para(data)
+    if local:
+        return local.pregao(data)
     
-    if ticker:
-        # Consulta específica para um ticker
-        cursor.execute("""
-            SELECT 
-                ticker,
-                data_pregao,
-                preco_abertura,
-                preco_min,
-                preco_max,
-                preco_medio,
-                preco_ultimo,
-                quantidade_negociada
-            FROM dbo.DadosPregao
-            WHERE data_pregao = %s
-            AND ticker = %s
-        """, (data, ticker.upper()))
-    else:
-        # Consulta todos os tickers da data
-        cursor.execute("""
-            SELECT 
+    with cursor_db() as cursor:
+        rows = executar_consulta(cursor, """
+            SELECT
                 ticker,
-                data_pregao,
                 preco_abertura,
                 preco_min,
                 preco_max,
-                preco_medio,
                 preco_ultimo,
                 quantidade_negociada
             FROM dbo.DadosPregao
             WHERE data_pregao = %s
-            ORDER BY ticker
         """, (data,))
     
-    cotacoes = []
-    for row in cursor.fetchall():
-        cotacoes.append({
-            'ticker': row[0],
-            'data': row[1].strftime('%Y-%m-%d'),
-            'abertura': float(row[2]),
-            'minimo': float(row[3]),
-            'maximo': float(row[4]),
-            'medio': float(row[5]),
-            'fechamento': float(row[6]),
-            'volume': int(row[7])
-        })
+    return rows
+
+
+def ranking_do_dia(data=None):
+    """
+    Retorna o RankingDia da data (None = última data), calculado uma vez
+    por pregão e mantido em cache. O ranking da última data é refeito
+    quando a versão dos dados muda (carga em andamento).
+    """
+    versao = versao_dados()
+    data = data or versao[0]
+    if not data:
+        return None
+    
+    chave = (data, versao) if versao[0] and data >= versao[0] else (data, None)
+    ranking = rankings.obter(chave)
+    if ranking is None:
+        ranking = singleflight.executar(
+            ('ranking',) + chave,
+            lambda: RankingDia(data, consultar_pregao(data))
+        )
+        rankings.guardar(chave, ranking)
+    return ranking
+
+
+@app.route('/api/ranking')
+@handle_errors
+def get_ranking():
+    """
+    Top N ativos do pregão por métrica
+    Query params:
+    - metrica: volume, volume_financeiro, alta, baixa ou amplitude (default: volume)
+    - n: quantidade de ativos (default: 10)
+    - data: data no formato YYYY-MM-DD (opcional, usa última data se não informado)
+    """
+    metrica = request.args.get('metrica', 'volume')
+    n = request.args.get('n', 10, type=int)
+    data = request.args.get('data')
+    
+    if metrica not in METRICAS_RANKING:
+        return jsonify({
+            'error': True,
+            'message': f'Parâmetro "metrica" deve ser um de: {", ".join(METRICAS_RANKING)}'
+        }), 400
     
-    cursor.close()
-    conn.close()
+    if n < 1:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "n" deve ser maior que zero'
+        }), 400
     
-    if not cotacoes:
+    ranking = ranking_do_dia(data)
+    if ranking is None or not ranking.total:
         return jsonify({
             'error': True,
             'message': f'Nenhuma cotação encontrada para a data {data}'
         }), 404
     
+    if data_fechada(ranking.data):
+        marcar_imutavel()
+    
+    itens = ranking.top(metrica, n)
+    
     return jsonify({
-        'data': data,
-        'ticker': ticker.upper() if ticker else 'todos',
-        'total': len(cotacoes),
-        'cotacoes': cotacoes
+        'data': ranking.data,
+        'metrica': metrica,
+        'total_ativos': ranking.total,
+        'total': len(itens),
+        'ranking': itens
     })
 
 
@@ -369,76 +1751,71 @@ def get_top_volume():
     """
     data = request.args.get('data')
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if data and not data_valida(data):
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "data" deve estar no formato YYYY-MM-DD'
+        }), 400
     
-    if not data:
-        # Buscar última data disponível
-        cursor.execute("SELECT MAX(data_pregao) FROM dbo.DadosPregao")
-        data = cursor.fetchone()[0].strftime('%Y-%m-%d')
-    
-    cursor.execute("""
-        SELECT TOP 10
-            ticker,
-            preco_ultimo,
-            quantidade_negociada,
-            (preco_ultimo * quantidade_negociada) as volume_financeiro
-        FROM dbo.DadosPregao
-        WHERE data_pregao = %s
-        ORDER BY quantidade_negociada DESC
-    """, (data,))
+    # Servido pelo ranking pré-calculado do pregão
+    ranking = ranking_do_dia(data)
+    
+    # Só um pregão carregado tem resposta definitiva
+    if ranking and ranking.total and data_fechada(ranking.data):
+        marcar_imutavel()
     
     top_ativos = []
-    for row in cursor.fetchall():
+    for item in ranking.top('volume', 10) if ranking else []:
         top_ativos.append({
-            'ticker': row[0],
-            'preco': float(row[1]),
-            'quantidade': int(row[2]),
-            'volume_financeiro': float(row[3])
+            'ticker': item['ticker'],
+            'preco': item['fechamento'],
+            'quantidade': item['volume'],
+            'volume_financeiro': item['volume_financeiro']
         })
     
-    cursor.close()
-    conn.close()
-    
     return jsonify({
-        'data': data,
+        'data': ranking.data if ranking else data,
         'top_10_volume': top_ativos
     })
 
 
-@app.route('/api/resumo')
-@handle_errors
-def get_resumo():
+def consultar_resumo(data):
     """
-    Resumo do mercado por data
-    Query param:
-    - data: data no formato YYYY-MM-DD (opcional, usa última data se não informado)
+    Calcula o resumo do mercado na data (None = última data); None se não
+    houver cotações na data.
     """
-    data = request.args.get('data')
+    local = replica_para(data)
+    if local:
+        data = data or local.ultima_data
+        row = local.resumo(data)
+        return montar_resumo(data, row) if row[0] else None
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with cursor_db() as cursor:
+        if not data:
+            # Buscar última data disponível
+            data = executar_consulta(
+                cursor, "SELECT MAX(data_pregao) FROM dbo.DadosPregao"
+            )[0][0].strftime('%Y-%m-%d')
+        
+        # Estatísticas gerais
+        row = executar_consulta(cursor, """
+            SELECT 
+                COUNT(*) as total_ativos,
+                SUM(quantidade_negociada) as volume_total,
+                AVG(preco_ultimo) as preco_medio,
+                MAX(preco_ultimo) as maior_preco,
+                MIN(preco_ultimo) as menor_preco
+            FROM dbo.DadosPregao
+            WHERE data_pregao = %s
+        """, (data,))[0]
     
-    if not data:
-        # Buscar última data disponível
-        cursor.execute("SELECT MAX(data_pregao) FROM dbo.DadosPregao")
-        data = cursor.fetchone()[0].strftime('%Y-%m-%d')
-    
-    # Estatísticas gerais
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as total_ativos,
-            SUM(quantidade_negociada) as volume_total,
-            AVG(preco_ultimo) as preco_medio,
-            MAX(preco_ultimo) as maior_preco,
-            MIN(preco_ultimo) as menor_preco
-        FROM dbo.DadosPregao
-        WHERE data_pregao = %s
-    """, (data,))
-    
-    row = cursor.fetchone()
-    
-    resumo = {
+    if not row[0]:
+        return None
+    return montar_resumo(data, row)
+
+
+def montar_resumo(data, row):
+    return {
         'data': data,
         'total_ativos_negociados': int(row[0]),
         'volume_total': int(row[1]),
@@ -446,13 +1823,164 @@ def get_resumo():
         'maior_preco': float(row[3]),
         'menor_preco': float(row[4])
     }
+
+
+# Agrupamento da série do resumo por granularidade. Semana começa na
+# segunda-feira (DATEDIFF(week) conta domingos, daí o -1 dia).
+PERIODOS_RESUMO = {
+    'dia': "data_pregao",
+    'semana': "CAST(DATEADD(week, DATEDIFF(week, 0, DATEADD(day, -1, data_pregao)), 0) AS DATE)",
+    'mes': "DATEFROMPARTS(YEAR(data_pregao), MONTH(data_pregao), 1)",
+}
+
+
+def consultar_serie_resumo(inicio, fim, granularidade):
+    """
+    Calcula o resumo do mercado por período entre inicio e fim em uma única
+    consulta agrupada.
+    """
+    periodo = PERIODOS_RESUMO[granularidade]
+    
+    with cursor_db() as cursor:
+        rows = executar_consulta(cursor, f"""
+            SELECT
+                {periodo} AS periodo,
+                COUNT(DISTINCT data_pregao) AS pregoes,
+                COUNT(DISTINCT ticker) AS total_ativos,
+                SUM(quantidade_negociada) AS volume_total,
+                AVG(preco_ultimo) AS preco_medio,
+                MAX(preco_ultimo) AS maior_preco,
+                MIN(preco_ultimo) AS menor_preco
+            FROM dbo.DadosPregao
+            WHERE data_pregao >= %s
+            AND data_pregao <= %s
+            GROUP BY {periodo}
+            ORDER BY periodo
+        """, (inicio, fim))
+    
+    serie = []
+    for row in rows:
+        serie.append({
+            'periodo': row[0].strftime('%Y-%m-%d'),
+            'pregoes': int(row[1]),
+            'total_ativos_negociados': int(row[2]),
+            'volume_total': int(row[3]),
+            'preco_medio': float(row[4]),
+            'maior_preco': float(row[5]),
+            'menor_preco': float(row[6])
+        })
+    
+    return {
+        'inicio': inicio,
+        'fim': fim,
+        'granularidade': granularidade,
+        'total': len(serie),
+        'serie': serie
+    }
+
+
+@app.route('/api/resumo')
+@handle_errors
+def get_resumo():
+    """
+    Resumo do mercado por data ou série de resumos por período
+    Query params:
+    - data: data no formato YYYY-MM-DD (opcional, usa última data se não informado)
+    - inicio: data inicial da série (YYYY-MM-DD); quando informado, retorna
+      a série entre inicio e fim
+    - fim: data final da série (opcional, usa última data se não informado)
+    - granularidade: dia, semana ou mes (default: dia)
+    """
+    inicio = request.args.get('inicio')
+    if inicio:
+        return get_serie_resumo(inicio)
+    
+    data = request.args.get('data')
+    
+    if data and not data_valida(data):
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "data" deve estar no formato YYYY-MM-DD'
+        }), 400
+    
+    # Requisições simultâneas para a mesma data compartilham uma consulta
+    resumo = singleflight.executar(
+        ('resumo', data),
+        lambda: consultar_resumo(data)
+    )
+    
+    if resumo is None:
+        return jsonify({
+            'error': True,
+            'message': f'Nenhuma cotação encontrada para a data {data}'
+        }), 404
     
-    cursor.close()
-    conn.close()
+    if data_fechada(resumo['data']):
+        marcar_imutavel()
     
     return jsonify(resumo)
 
 
+def get_serie_resumo(inicio):
+    """
+    Série do resumo do mercado entre inicio e fim (ver get_resumo).
+    """
+    fim = request.args.get('fim') or ultima_data_pregao()
+    granularidade = request.args.get('granularidade', 'dia')
+    
+    if fim is None:
+        # Sem "fim" e sem nenhum pregão carregado
+        return jsonify({
+            'error': True,
+            'message': 'Nenhuma cotação encontrada (sem dados carregados)'
+        }), 404
+    
+    if granularidade not in PERIODOS_RESUMO:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "granularidade" deve ser dia, semana ou mes'
+        }), 400
+    
+    try:
+        datetime.strptime(inicio, '%Y-%m-%d')
+        datetime.strptime(fim, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetros "inicio" e "fim" devem estar no formato YYYY-MM-DD'
+        }), 400
+    
+    if inicio > fim:
+        return jsonify({
+            'error': True,
+            'message': 'Parâmetro "inicio" deve ser anterior a "fim"'
+        }), 400
+    
+    serie = singleflight.executar(
+        ('resumo-serie', inicio, fim, granularidade),
+        lambda: consultar_serie_resumo(inicio, fim, granularidade)
+    )
+    
+    # Séries que terminam antes da última data não mudam mais
+    if serie['serie'] and data_fechada(fim):
+        marcar_imutavel()
+    
+    return jsonify(serie)
+
+
+@app.route('/metrics')
+def metrics():
+    """
+    Métricas do worker no formato texto do Prometheus: latência, status e
+    requisições em andamento por rota, tempo de SQL, linhas lidas e tempo
+    de serialização por rota, e contadores do single-flight
+    """
+    return app.response_class(
+        metricas.exportar(),
+        mimetype='text/plain; version=0.0.4'
+    )
+
+
 # --------------------------------------------------
 # EXECUTAR APLICAÇÃO
 # --------------------------------------------------
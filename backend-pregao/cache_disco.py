@@ -0,0 +1,124 @@
+"""
+Cache de respostas em disco (SQLite) compartilhado pelos workers do host
+
+Sobrevive a reciclagem de workers e deploys: workers novos começam com as
+respostas já calculadas pelos anteriores.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+# Intervalo mínimo entre atualizações do último acesso de uma entrada
+# (evita uma escrita no arquivo a cada leitura)
+INTERVALO_ACESSO = 60.0
+
+
+class CacheDisco:
+    """
+    Respostas por chave em um arquivo SQLite (modo WAL, acessado por
+    vários processos), limitado a `max_bytes`: ao passar do limite as
+    entradas acessadas há mais tempo são removidas.
+
+    Cada entrada guarda a versão dos dados com que foi calculada. Entradas
+    sem versão são imutáveis e sempre valem; as demais só valem na mesma
+    versão e são apagadas por `invalidar` quando a versão muda.
+
+    Erros do SQLite (arquivo travado, disco cheio) nunca chegam à
+    requisição: a operação é ignorada como um cache miss.
+    """
+
+    def __init__(self, caminho, max_bytes):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._executar(lambda conn: conn.executescript("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                versao TEXT,
+                mimetype TEXT NOT NULL,
+                corpo BLOB NOT NULL,
+                tamanho INTEGER NOT NULL,
+                acesso REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_respostas_acesso
+                ON respostas (acesso);
+        """))
+
+    def _conexao(self):
+        # Uma conexão por thread e por processo (não atravessa o fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _executar(self, funcao):
+        try:
+            return funcao(self._conexao())
+        except sqlite3.Error as e:
+            print(f"Erro no cache em disco: {str(e)}")
+            return None
+
+    def obter(self, chave, versao):
+        """
+        Retorna (corpo, mimetype, imutavel) ou None se a chave não está no
+        cache ou foi guardada em outra versão dos dados.
+        """
+        def obter(conn):
+            row = conn.execute(
+                "SELECT versao, mimetype, corpo, acesso FROM respostas WHERE chave = ?",
+                (chave,)
+            ).fetchone()
+            if row is None or (row[0] is not None and row[0] != versao):
+                return None
+            agora = time.time()
+            if agora - row[3] > INTERVALO_ACESSO:
+                conn.execute(
+                    "UPDATE respostas SET acesso = ? WHERE chave = ?", (agora, chave)
+                )
+            return bytes(row[2]), row[1], row[0] is None
+        return self._executar(obter)
+
+    def guardar(self, chave, corpo, mimetype, versao=None):
+        """
+        Guarda a resposta; versao=None marca a entrada como imutável.
+        """
+        if len(corpo) > self.max_bytes:
+            return
+
+        def guardar(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, versao, mimetype, corpo, len(corpo), time.time())
+            )
+            self._liberar_espaco(conn)
+        self._executar(guardar)
+
+    def _liberar_espaco(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Remove as menos acessadas até ficar em 90% do limite
+        excesso = total - int(self.max_bytes * 0.9)
+        remover = []
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY acesso"
+        ):
+            remover.append((chave,))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        conn.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+
+    def invalidar(self, versao):
+        """
+        Apaga as entradas não imutáveis de versões diferentes de `versao`.
+        """
+        self._executar(lambda conn: conn.execute(
+            "DELETE FROM respostas WHERE versao IS NOT NULL AND versao != ?",
+            (versao,)
+        ))
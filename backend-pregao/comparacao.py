@@ -0,0 +1,84 @@
+"""
+Comparação por ticker entre dois pregões
+"""
+import heapq
+
+# Critério de ordenação -> (campo do item, ordem decrescente por padrão)
+ORDENACOES = {
+    'variacao_pct': ('variacao_pct', True),
+    'variacao': ('variacao', True),
+    'razao_volume': ('razao_volume', True),
+    'volume': ('volume_ate', True),
+    'ticker': ('ticker', False),
+}
+
+
+def comparar(rows):
+    """
+    Monta a comparação a partir das linhas do join dos dois pregões:
+    (ticker, fechamento_de, fechamento_ate, volume_de, volume_ate), com
+    None do lado em que o ticker não negociou.
+
+    Tickers presentes só no segundo pregão têm situação "novo" e só no
+    primeiro, "removido"; para eles as variações ficam None.
+    """
+    itens = []
+    for ticker, fechamento_de, fechamento_ate, volume_de, volume_ate in rows:
+        if fechamento_de is None:
+            situacao = 'novo'
+        elif fechamento_ate is None:
+            situacao = 'removido'
+        else:
+            situacao = 'mantido'
+
+        fechamento_de = float(fechamento_de) if fechamento_de is not None else None
+        fechamento_ate = float(fechamento_ate) if fechamento_ate is not None else None
+        volume_de = int(volume_de) if volume_de is not None else None
+        volume_ate = int(volume_ate) if volume_ate is not None else None
+
+        variacao = variacao_pct = razao_volume = None
+        if situacao == 'mantido':
+            variacao = fechamento_ate - fechamento_de
+            if fechamento_de > 0:
+                variacao_pct = (fechamento_ate / fechamento_de - 1) * 100
+            if volume_de > 0:
+                razao_volume = volume_ate / volume_de
+
+        itens.append({
+            'ticker': ticker,
+            'situacao': situacao,
+            'fechamento_de': fechamento_de,
+            'fechamento_ate': fechamento_ate,
+            'variacao': variacao,
+            'variacao_pct': variacao_pct,
+            'volume_de': volume_de,
+            'volume_ate': volume_ate,
+            'razao_volume': razao_volume,
+        })
+    return itens
+
+
+def ordenar(itens, ordenacao, decrescente=None, n=None):
+    """
+    Ordena os itens pelo critério (ver ORDENACOES). Itens sem valor no
+    campo (tickers novos/removidos nas variações) vão para o final, em
+    ordem de ticker. Com n, só os n primeiros são ordenados e retornados.
+    """
+    campo, padrao = ORDENACOES[ordenacao]
+    if decrescente is None:
+        decrescente = padrao
+
+    com_valor = [item for item in itens if item[campo] is not None]
+    sem_valor = [item for item in itens if item[campo] is None]
+
+    chave = lambda item: item[campo]
+    if n is None:
+        com_valor.sort(key=chave, reverse=decrescente)
+    elif decrescente:
+        com_valor = heapq.nlargest(n, com_valor, key=chave)
+    else:
+        com_valor = heapq.nsmallest(n, com_valor, key=chave)
+
+    sem_valor.sort(key=lambda item: item['ticker'])
+    ordenados = com_valor + sem_valor
+    return ordenados[:n] if n is not None else ordenados
@@ -0,0 +1,119 @@
+"""
+Compressão de respostas e armazenamento de respostas imutáveis já comprimidas
+"""
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional, gzip sempre disponível
+    brotli = None
+
+
+# Respostas menores que isso não compensam a compressão
+TAMANHO_MINIMO = 1024
+
+# Encodings suportados, em ordem de preferência
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negociar_encoding(accept_encodings):
+    """
+    Escolhe o melhor encoding suportado a partir do Accept-Encoding do
+    cliente (objeto Accept do Werkzeug). Retorna None para sem compressão.
+    """
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def comprimir(corpo, encoding, maxima=False):
+    """
+    Comprime o corpo no encoding informado.
+
+    Respostas comprimidas a cada requisição usam nível rápido; respostas
+    que serão armazenadas (maxima=True) usam o nível máximo, pois o custo
+    é pago uma única vez.
+    """
+    if encoding == 'br':
+        return brotli.compress(corpo, quality=11 if maxima else 4)
+    if encoding == 'gzip':
+        return gzip.compress(corpo, compresslevel=9 if maxima else 6)
+    return corpo
+
+
+class ArmazemRespostas:
+    """
+    Armazém LRU, limitado em bytes, de respostas imutáveis.
+
+    Cada entrada guarda o corpo original e as variantes comprimidas, geradas
+    uma única vez na primeira requisição que pedir cada encoding.
+
+    Com substituir=True cada `guardar` troca a entrada da chave (e descarta
+    as variantes comprimidas): o armazém passa a ter sempre a resposta mais
+    recente de cada chave, não a primeira.
+    """
+
+    def __init__(self, max_bytes, substituir=False):
+        self.max_bytes = max_bytes
+        self.substituir = substituir
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def guardar(self, chave, corpo, mimetype):
+        """
+        Armazena o corpo original de uma resposta.
+        """
+        if len(corpo) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.get(chave)
+            if anterior is not None:
+                if not self.substituir:
+                    return
+                del self._entradas[chave]
+                self._bytes -= self._tamanho(anterior)
+            self._entradas[chave] = {'mimetype': mimetype, None: corpo}
+            self._bytes += len(corpo)
+            self._liberar_espaco()
+
+    def obter(self, chave, encoding):
+        """
+        Retorna (corpo, mimetype, encoding) da resposta armazenada, ou None.
+        O encoding retornado é None quando a resposta é pequena demais para
+        valer a compressão.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            self._entradas.move_to_end(chave)
+            original = entrada[None]
+            mimetype = entrada['mimetype']
+            if encoding is None or len(original) < TAMANHO_MINIMO:
+                return original, mimetype, None
+            corpo = entrada.get(encoding)
+            if corpo is not None:
+                return corpo, mimetype, encoding
+
+        # Comprimir fora do lock: outras requisições não esperam por isso
+        corpo = comprimir(original, encoding, maxima=True)
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            # A entrada pode ter sido substituída enquanto comprimia
+            if (entrada is not None and entrada[None] is original
+                    and encoding not in entrada):
+                entrada[encoding] = corpo
+                self._bytes += len(corpo)
+                self._liberar_espaco()
+        return corpo, mimetype, encoding
+
+    @staticmethod
+    def _tamanho(entrada):
+        return sum(len(v) for k, v in entrada.items() if k != 'mimetype')
+
+    def _liberar_espaco(self):
+        while self._bytes > self.max_bytes and self._entradas:
+            _, entrada = self._entradas.popitem(last=False)
+            self._bytes -= self._tamanho(entrada)
@@ -0,0 +1,86 @@
+"""
+Pool de conexões thread-safe para o SQL Server
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolEsgotado(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera"""
+
+
+class PoolConexoes:
+    """
+    Pool de conexões pymssql compartilhado pelas threads de um worker.
+
+    Cada conexão é usada por uma thread de cada vez. No máximo `tamanho`
+    conexões existem ao mesmo tempo; as livres são reaproveitadas (a mais
+    recente primeiro) e descartadas se ficaram ociosas por mais de
+    `max_ociosa` segundos, antes que o servidor as derrube. Uma conexão em
+    que ocorreu erro é fechada em vez de voltar ao pool.
+    """
+
+    def __init__(self, criar, tamanho=8, espera=10.0, max_ociosa=300.0):
+        self.criar = criar
+        self.tamanho = tamanho
+        self.espera = espera
+        self.max_ociosa = max_ociosa
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._lock = threading.Lock()
+        self.abertas = 0
+        self.em_uso = 0
+
+    def _obter_livre(self):
+        while True:
+            try:
+                conn, ultimo_uso = self._livres.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - ultimo_uso <= self.max_ociosa:
+                return conn
+            self._fechar(conn)
+
+    def _fechar(self, conn):
+        with self._lock:
+            self.abertas -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def conexao(self, espera=None):
+        """
+        Empresta uma conexão do pool pelo bloco `with`, esperando até
+        `espera` segundos (default: o do pool) por uma conexão livre.
+        """
+        espera = self.espera if espera is None else espera
+        if not self._vagas.acquire(timeout=espera):
+            raise PoolEsgotado(
+                f"Nenhuma conexão livre em {espera:.0f}s "
+                f"({self.tamanho} em uso)"
+            )
+        try:
+            conn = self._obter_livre()
+            if conn is None:
+                conn = self.criar()
+                with self._lock:
+                    self.abertas += 1
+
+            with self._lock:
+                self.em_uso += 1
+            try:
+                yield conn
+            except BaseException:
+                self._fechar(conn)
+                raise
+            else:
+                self._livres.put((conn, time.monotonic()))
+            finally:
+                with self._lock:
+                    self.em_uso -= 1
+        finally:
+            self._vagas.release()
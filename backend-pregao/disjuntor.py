@@ -0,0 +1,81 @@
+"""
+Disjuntor (circuit breaker) para o acesso ao banco
+"""
+import threading
+import time
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio-aberto'
+
+
+class CircuitoAberto(Exception):
+    """O banco está indisponível e as chamadas estão sendo recusadas"""
+
+
+class PrazoEsgotado(Exception):
+    """O prazo da requisição para acessar o banco já terminou"""
+
+
+class Disjuntor:
+    """
+    Conta chamadas ao banco que falharam ou demoraram mais que `lenta`
+    segundos. Após `limiar` chamadas ruins seguidas o circuito abre e as
+    chamadas são recusadas na hora (CircuitoAberto) por `espera` segundos.
+    Depois disso o circuito fica meio-aberto: uma única chamada de teste
+    passa; se ela for boa o circuito fecha, senão abre de novo.
+    """
+
+    def __init__(self, limiar=5, lenta=5.0, espera=30.0):
+        self.limiar = limiar
+        self.lenta = lenta
+        self.espera = espera
+        self.estado = FECHADO
+        self.recusadas = 0
+        self._ruins = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """
+        Deve ser chamado antes de cada chamada ao banco; levanta
+        CircuitoAberto se ela não deve ser feita.
+        """
+        with self._lock:
+            if self.estado == FECHADO:
+                return
+            if (self.estado == ABERTO
+                    and time.monotonic() - self._aberto_em >= self.espera):
+                self.estado = MEIO_ABERTO
+            if self.estado == MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return
+            self.recusadas += 1
+            restante = max(0.0, self.espera - (time.monotonic() - self._aberto_em))
+        raise CircuitoAberto(
+            f"Banco de dados indisponível; nova tentativa em {restante:.0f}s"
+        )
+
+    def registrar(self, duracao, falhou=False):
+        """
+        Registra o resultado de uma chamada permitida.
+        """
+        ruim = falhou or duracao > self.lenta
+        with self._lock:
+            self._teste_em_andamento = False
+            if not ruim:
+                self._ruins = 0
+                self.estado = FECHADO
+                return
+            self._ruins += 1
+            if self.estado == MEIO_ABERTO or self._ruins >= self.limiar:
+                self.estado = ABERTO
+                self._aberto_em = time.monotonic()
+
+    @property
+    def restante(self):
+        """Segundos até a próxima chamada de teste (0 se fechado)"""
+        if self.estado != ABERTO:
+            return 0.0
+        return max(0.0, self.espera - (time.monotonic() - self._aberto_em))
@@ -0,0 +1,171 @@
+"""
+Teste de carga do backend-pregao
+
+Mede vazão e latência (p50/p95/p99) da API com N clientes concorrentes,
+cada um em uma thread com conexão keep-alive, pelo tempo pedido.
+
+Roteiro para comparar os workers sync (configuração anterior) com os
+workers gthread do Procfile, com o banco local atrás do toxiproxy, que
+adiciona a latência de rede do Azure SQL:
+
+    cd backend-pregao
+    docker compose -f loadtest/docker-compose.yml up -d
+    python loadtest/preparar.py
+
+    export SQL_SERVER=localhost SQL_PORT=1434 SQL_USER=sa
+    export SQL_PASSWORD='Carga#Local123' SQL_DATABASE=pregao
+    export REPLICA_LOCAL_DIAS=0    # todas as consultas vão ao banco
+
+    # antes: 2 workers sync
+    gunicorn app:app --bind 0.0.0.0:8000 --workers 2
+    python loadtest/carga.py --concorrencia 32 --duracao 60
+
+    # depois: 2 workers gthread com 8 threads (Procfile)
+    gunicorn app:app --bind 0.0.0.0:8000 --workers 2 \\
+        --worker-class gthread --threads 8
+    python loadtest/carga.py --concorrencia 32 --duracao 60
+
+Com os workers sync a vazão fica limitada a 2 requisições em andamento e
+o p99 cresce com a fila; com gthread cada worker atende até 8 ao mesmo
+tempo, cada thread com uma conexão do pool (SQL_POOL_TAMANHO).
+
+Os números medidos vão em loadtest/RESULTADOS.md.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def cenario_banco(tickers, datas, aleatorio):
+    """Rotas que consultam o banco a cada requisição"""
+    ticker = aleatorio.choice(tickers)
+    data = aleatorio.choice(datas[:30])
+    return aleatorio.choice([
+        f"/api/ativo/{ticker}/historico?limit={aleatorio.randint(20, 60)}",
+        f"/api/historico?tickers={','.join(aleatorio.sample(tickers, 3))}&limit=30",
+        f"/api/cotacao?data={data}&ticker={ticker}",
+        f"/api/cotacao?data={data}&ticker={aleatorio.choice(tickers)}",
+    ])
+
+
+def cenario_misto(tickers, datas, aleatorio):
+    """Mistura de um dashboard: resumo, rankings, ativo e cotações"""
+    ticker = aleatorio.choice(tickers)
+    data = aleatorio.choice(datas[:30])
+    return aleatorio.choice([
+        f"/api/resumo?data={data}",
+        f"/api/top-volume?data={data}",
+        f"/api/ranking?metrica=alta&data={data}",
+        f"/api/ativo/{ticker}",
+        f"/api/ativo/{ticker}/historico?limit=30",
+        f"/api/cotacao?data={data}&ticker={ticker}",
+    ])
+
+
+CENARIOS = {
+    'banco': cenario_banco,
+    'misto': cenario_misto,
+}
+
+
+def get_json(url, caminho):
+    partes = urlsplit(url)
+    conn = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=60)
+    conn.request('GET', caminho)
+    resposta = conn.getresponse()
+    corpo = json.loads(resposta.read())
+    conn.close()
+    return corpo
+
+
+def cliente(url, gerar, tickers, datas, fim, semente, resultados):
+    partes = urlsplit(url)
+    aleatorio = random.Random(semente)
+    conn = None
+    latencias = []
+    erros = 0
+
+    while time.monotonic() < fim:
+        caminho = gerar(tickers, datas, aleatorio)
+        inicio = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(
+                    partes.hostname, partes.port or 80, timeout=60
+                )
+            conn.request('GET', caminho)
+            resposta = conn.getresponse()
+            resposta.read()
+            if resposta.status >= 500:
+                erros += 1
+            else:
+                latencias.append(time.perf_counter() - inicio)
+        except (OSError, http.client.HTTPException):
+            erros += 1
+            if conn is not None:
+                conn.close()
+            conn = None
+
+    if conn is not None:
+        conn.close()
+    resultados.append((latencias, erros))
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def executar(args):
+    tickers = get_json(args.url, '/api/tickers')['tickers']
+    datas = get_json(args.url, '/api/datas')['datas']
+    if not tickers or not datas:
+        raise SystemExit("❌ API sem dados: rode loadtest/preparar.py")
+
+    gerar = CENARIOS[args.cenario]
+    resultados = []
+    inicio = time.monotonic()
+    fim = inicio + args.duracao
+    threads = [
+        threading.Thread(
+            target=cliente,
+            args=(args.url, gerar, tickers, datas, fim, i, resultados)
+        )
+        for i in range(args.concorrencia)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.monotonic() - inicio
+
+    latencias = sorted(l for parcial, _ in resultados for l in parcial)
+    erros = sum(e for _, e in resultados)
+
+    print(f"Cenário: {args.cenario}  |  Clientes: {args.concorrencia}  |  "
+          f"Duração: {duracao:.1f}s")
+    print(f"Requisições: {len(latencias)}  |  Erros: {erros}")
+    print(f"Vazão: {len(latencias) / duracao:.1f} req/s")
+    for p in (50, 95, 99):
+        print(f"p{p}: {percentil(latencias, p) * 1000:.1f} ms")
+    if latencias:
+        print(f"máx: {latencias[-1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--cenario', choices=sorted(CENARIOS), default='banco')
+    parser.add_argument('--concorrencia', type=int, default=32)
+    parser.add_argument('--duracao', type=float, default=30.0,
+                        help='segundos de carga')
+    executar(parser.parse_args())
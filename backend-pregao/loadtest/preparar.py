@@ -0,0 +1,169 @@
+"""
+Prepara o banco local do teste de carga (ver carga.py)
+
+Cria o banco e a tabela dbo.DadosPregao (mesma DDL da Azure Function),
+insere pregões sintéticos e configura a latência do toxiproxy.
+"""
+import argparse
+import json
+import random
+import urllib.request
+from datetime import date, timedelta
+
+import pymssql
+
+CREATE_SQL = """
+    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='DadosPregao' AND xtype='U')
+    CREATE TABLE dbo.DadosPregao (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        ticker VARCHAR(20) NOT NULL,
+        data_pregao DATE NOT NULL,
+        preco_abertura FLOAT NOT NULL,
+        preco_min FLOAT NOT NULL,
+        preco_max FLOAT NOT NULL,
+        preco_medio FLOAT NOT NULL,
+        preco_ultimo FLOAT NOT NULL,
+        quantidade_negociada BIGINT NOT NULL,
+        data_insercao DATETIME DEFAULT GETDATE(),
+        INDEX idx_ticker_data (ticker, data_pregao)
+    )
+"""
+
+INSERT_SQL = """
+    INSERT INTO dbo.DadosPregao
+    (ticker, data_pregao, preco_abertura, preco_min, preco_max,
+     preco_medio, preco_ultimo, quantidade_negociada)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def dias_uteis(quantidade, fim):
+    dias = []
+    dia = fim
+    while len(dias) < quantidade:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia -= timedelta(days=1)
+    return sorted(dias)
+
+
+def gerar_linhas(tickers, dias):
+    aleatorio = random.Random(42)
+    precos = {ticker: aleatorio.uniform(5, 120) for ticker in tickers}
+    for dia in dias:
+        for ticker in tickers:
+            abertura = precos[ticker]
+            fechamento = max(0.5, abertura * (1 + aleatorio.gauss(0, 0.02)))
+            minimo = min(abertura, fechamento) * (1 - aleatorio.uniform(0, 0.01))
+            maximo = max(abertura, fechamento) * (1 + aleatorio.uniform(0, 0.01))
+            precos[ticker] = fechamento
+            yield (
+                ticker,
+                dia,
+                round(abertura, 2),
+                round(minimo, 2),
+                round(maximo, 2),
+                round((minimo + maximo) / 2, 2),
+                round(fechamento, 2),
+                aleatorio.randint(100, 5_000_000),
+            )
+
+
+def popular(args):
+    conn = pymssql.connect(
+        server=args.servidor,
+        port=args.porta,
+        user=args.usuario,
+        password=args.senha,
+        autocommit=True
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"IF DB_ID('{args.banco}') IS NULL CREATE DATABASE {args.banco}")
+    conn.close()
+
+    conn = pymssql.connect(
+        server=args.servidor,
+        port=args.porta,
+        user=args.usuario,
+        password=args.senha,
+        database=args.banco
+    )
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SQL)
+    cursor.execute("DELETE FROM dbo.DadosPregao")
+    conn.commit()
+
+    tickers = [f"TK{i:04d}3" for i in range(args.tickers)]
+    dias = dias_uteis(args.dias, date.today())
+
+    lote = []
+    total = 0
+    for linha in gerar_linhas(tickers, dias):
+        lote.append(linha)
+        if len(lote) >= 1000:
+            cursor.executemany(INSERT_SQL, lote)
+            conn.commit()
+            total += len(lote)
+            lote = []
+            print(f"   {total} linhas inseridas", end='\r')
+    if lote:
+        cursor.executemany(INSERT_SQL, lote)
+        conn.commit()
+        total += len(lote)
+
+    cursor.close()
+    conn.close()
+    print(f"✅ {total} linhas ({len(tickers)} tickers x {len(dias)} pregões)")
+
+
+def configurar_latencia(args):
+    """
+    Substitui o toxic de latência do proxy 'mssql' (API HTTP do toxiproxy).
+    """
+    base = f"{args.toxiproxy}/proxies/mssql/toxics"
+    try:
+        urllib.request.urlopen(
+            urllib.request.Request(f"{base}/latencia", method='DELETE')
+        )
+    except urllib.error.HTTPError:
+        pass  # toxic ainda não existe
+
+    if args.latencia <= 0:
+        print("✅ Latência do proxy removida")
+        return
+
+    corpo = json.dumps({
+        'name': 'latencia',
+        'type': 'latency',
+        'stream': 'downstream',
+        'attributes': {'latency': args.latencia, 'jitter': args.jitter},
+    }).encode()
+    urllib.request.urlopen(urllib.request.Request(
+        base,
+        data=corpo,
+        method='POST',
+        headers={'Content-Type': 'application/json'}
+    ))
+    print(f"✅ Latência do proxy: {args.latencia}ms ± {args.jitter}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--servidor', default='localhost')
+    parser.add_argument('--porta', type=int, default=1433)
+    parser.add_argument('--usuario', default='sa')
+    parser.add_argument('--senha', default='Carga#Local123')
+    parser.add_argument('--banco', default='pregao')
+    parser.add_argument('--tickers', type=int, default=400)
+    parser.add_argument('--dias', type=int, default=250)
+    parser.add_argument('--toxiproxy', default='http://localhost:8474')
+    parser.add_argument('--latencia', type=int, default=30,
+                        help='latência adicionada pelo proxy, em ms')
+    parser.add_argument('--jitter', type=int, default=5)
+    parser.add_argument('--so-latencia', action='store_true',
+                        help='apenas reconfigura a latência do proxy')
+    args = parser.parse_args()
+
+    if not args.so_latencia:
+        popular(args)
+    configurar_latencia(args)
@@ -0,0 +1,165 @@
+"""
+Métricas em memória (contadores, medidores e histogramas) exportadas no
+formato texto do Prometheus
+
+Cada worker do gunicorn mantém as próprias métricas; o Prometheus deve
+coletar cada instância/worker separadamente ou somar as séries.
+"""
+import bisect
+import threading
+
+
+# Limites (em segundos) dos histogramas de latência
+BUCKETS_LATENCIA = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _escapar(valor):
+    return (str(valor)
+            .replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _formatar_labels(nomes, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class _Metrica:
+    """Base das métricas: nome, descrição, labels e lock próprio"""
+
+    tipo = None
+
+    def __init__(self, nome, descricao, labels=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.labels = tuple(labels)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, labels):
+        return tuple(labels.get(n, '') for n in self.labels)
+
+    def definir(self, valor, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            self._valores[chave] = valor
+
+    def exportar(self):
+        linhas = [
+            f'# HELP {self.nome} {self.descricao}',
+            f'# TYPE {self.nome} {self.tipo}',
+        ]
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            linhas.append(
+                f'{self.nome}{_formatar_labels(self.labels, chave)} {valor}'
+            )
+        return linhas
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (ex: total de requisições)"""
+
+    tipo = 'counter'
+
+    def inc(self, valor=1, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+
+class Medidor(_Metrica):
+    """Valor que sobe e desce (ex: requisições em andamento)"""
+
+    tipo = 'gauge'
+
+    def inc(self, valor=1, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def dec(self, valor=1, **labels):
+        self.inc(-valor, **labels)
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores em buckets acumulados, com soma e contagem"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, labels=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, descricao, labels)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, **labels):
+        chave = self._chave(labels)
+        posicao = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._valores.get(chave)
+            if serie is None:
+                # contagens por bucket (+Inf no final), soma
+                serie = self._valores[chave] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][posicao] += 1
+            serie[1] += valor
+
+    def exportar(self):
+        linhas = [
+            f'# HELP {self.nome} {self.descricao}',
+            f'# TYPE {self.nome} {self.tipo}',
+        ]
+        with self._lock:
+            itens = sorted((k, (list(v[0]), v[1])) for k, v in self._valores.items())
+        for chave, (contagens, soma) in itens:
+            acumulado = 0
+            limites = [repr(b) for b in self.buckets] + ['+Inf']
+            for limite, contagem in zip(limites, contagens):
+                acumulado += contagem
+                labels = _formatar_labels(self.labels, chave, f'le="{limite}"')
+                linhas.append(f'{self.nome}_bucket{labels} {acumulado}')
+            labels = _formatar_labels(self.labels, chave)
+            linhas.append(f'{self.nome}_sum{labels} {soma}')
+            linhas.append(f'{self.nome}_count{labels} {acumulado}')
+        return linhas
+
+
+class Registro:
+    """Conjunto de métricas do worker, exportado em /metrics"""
+
+    def __init__(self):
+        self._metricas = []
+        self._coletores = []
+
+    def contador(self, nome, descricao, labels=()):
+        return self._registrar(Contador(nome, descricao, labels))
+
+    def medidor(self, nome, descricao, labels=()):
+        return self._registrar(Medidor(nome, descricao, labels))
+
+    def histograma(self, nome, descricao, labels=(), buckets=BUCKETS_LATENCIA):
+        return self._registrar(Histograma(nome, descricao, labels, buckets))
+
+    def coletor(self, funcao):
+        """
+        Registra uma função chamada na exportação que atualiza métricas
+        mantidas fora do registro (ex: contadores do single-flight).
+        """
+        self._coletores.append(funcao)
+        return funcao
+
+    def _registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def exportar(self):
+        for coletor in self._coletores:
+            coletor()
+        linhas = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
@@ -0,0 +1,91 @@
+"""
+Rankings ("top N por métrica") pré-calculados por pregão
+"""
+import threading
+from collections import OrderedDict
+
+
+# Métrica -> (campo do item usado na ordenação, ordem decrescente)
+METRICAS = {
+    'volume': ('volume', True),
+    'volume_financeiro': ('volume_financeiro', True),
+    'alta': ('variacao_pct', True),
+    'baixa': ('variacao_pct', False),
+    'amplitude': ('amplitude_pct', True),
+}
+
+
+class RankingDia:
+    """
+    Rankings de um pregão: as métricas de cada ticker são calculadas e cada
+    métrica é ordenada uma única vez. Um top N de qualquer métrica é só uma
+    fatia da ordem já calculada.
+
+    `rows` são linhas (ticker, abertura, minimo, maximo, fechamento,
+    quantidade). Variação é do dia (abertura -> fechamento) e amplitude é
+    (maximo - minimo) / minimo; tickers sem preço de abertura/mínimo ficam
+    fora desses dois rankings.
+    """
+
+    def __init__(self, data, rows):
+        self.data = data
+        self.itens = []
+        for ticker, abertura, minimo, maximo, fechamento, quantidade in rows:
+            abertura = float(abertura)
+            minimo = float(minimo)
+            fechamento = float(fechamento)
+            quantidade = int(quantidade)
+            self.itens.append({
+                'ticker': ticker,
+                'abertura': abertura,
+                'minimo': minimo,
+                'maximo': float(maximo),
+                'fechamento': fechamento,
+                'volume': quantidade,
+                'volume_financeiro': fechamento * quantidade,
+                'variacao_pct': (
+                    (fechamento / abertura - 1) * 100 if abertura > 0 else None
+                ),
+                'amplitude_pct': (
+                    (float(maximo) - minimo) / minimo * 100 if minimo > 0 else None
+                ),
+            })
+
+        self._ordens = {}
+        for metrica, (campo, decrescente) in METRICAS.items():
+            itens = [item for item in self.itens if item[campo] is not None]
+            itens.sort(key=lambda item: item[campo], reverse=decrescente)
+            self._ordens[metrica] = itens
+
+    @property
+    def total(self):
+        return len(self.itens)
+
+    def top(self, metrica, n):
+        return self._ordens[metrica][:n]
+
+
+class CacheRankings:
+    """
+    Cache LRU de rankings por chave (data, versão), limitado em número de
+    pregões.
+    """
+
+    def __init__(self, max_dias):
+        self.max_dias = max_dias
+        self._rankings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            ranking = self._rankings.get(chave)
+            if ranking is not None:
+                self._rankings.move_to_end(chave)
+            return ranking
+
+    def guardar(self, chave, ranking):
+        with self._lock:
+            self._rankings[chave] = ranking
+            self._rankings.move_to_end(chave)
+            while len(self._rankings) > self.max_dias:
+                self._rankings.popitem(last=False)
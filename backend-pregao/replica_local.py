@@ -0,0 +1,207 @@
+"""
+Réplica local (SQLite embutido no worker) dos últimos pregões
+
+Guarda os N pregões mais recentes de dbo.DadosPregao e é atualizada de
+forma incremental quando uma nova data_pregao aparece no Azure SQL.
+Consultas dentro da janela da réplica não saem do processo.
+"""
+import sqlite3
+import threading
+from datetime import date, datetime
+
+# Datas lidas/gravadas em texto ISO no SQLite
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(' '))
+sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter('DATETIME', lambda b: datetime.fromisoformat(b.decode()))
+
+COLUNAS = """
+    ticker,
+    data_pregao,
+    preco_abertura,
+    preco_min,
+    preco_max,
+    preco_medio,
+    preco_ultimo,
+    quantidade_negociada
+"""
+
+
+class ReplicaLocal:
+    """
+    Réplica em SQLite dos últimos `dias` pregões.
+
+    A carga é feita por `buscar(desde)`, função que consulta o Azure SQL e
+    retorna as linhas (COLUNAS + data_insercao) com data_pregao >= desde;
+    com desde=None deve retornar os `dias` pregões mais recentes.
+    """
+
+    def __init__(self, buscar, dias=30, caminho=':memory:'):
+        self.buscar = buscar
+        self.dias = dias
+        self._conn = sqlite3.connect(
+            caminho,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        self._lock = threading.Lock()
+        self._sincronizando = threading.Lock()
+        self._janela = (None, None)
+        self._versao = None
+
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS DadosPregao (
+                    ticker TEXT NOT NULL,
+                    data_pregao DATE NOT NULL,
+                    preco_abertura REAL NOT NULL,
+                    preco_min REAL NOT NULL,
+                    preco_max REAL NOT NULL,
+                    preco_medio REAL NOT NULL,
+                    preco_ultimo REAL NOT NULL,
+                    quantidade_negociada INTEGER NOT NULL,
+                    data_insercao DATETIME,
+                    PRIMARY KEY (ticker, data_pregao)
+                );
+                CREATE INDEX IF NOT EXISTS idx_data_ticker
+                    ON DadosPregao (data_pregao, ticker);
+            """)
+            self._atualizar_janela()
+
+    # --------------------------------------------------
+    # SINCRONIZAÇÃO
+    # --------------------------------------------------
+    def sincronizar(self, versao):
+        """
+        Atualiza a réplica quando a versão dos dados no Azure SQL (última
+        data, linhas da última data) muda: um pregão novo ou a carga do
+        último pregão avançando. A última data da réplica é recarregada
+        junto, para corrigir uma carga parcial.
+
+        Se outra thread já está sincronizando, retorna sem esperar e a
+        requisição usa os dados atuais (ou o Azure SQL).
+        """
+        if versao == self._versao or versao[0] is None:
+            return
+        if not self._sincronizando.acquire(blocking=False):
+            return
+        try:
+            fim = self._janela[1]
+            rows = self.buscar(fim)
+            with self._lock:
+                if fim is not None:
+                    self._conn.execute(
+                        "DELETE FROM DadosPregao WHERE data_pregao >= ?", (fim,)
+                    )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO DadosPregao VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                # Manter apenas os N pregões mais recentes
+                self._conn.execute("""
+                    DELETE FROM DadosPregao
+                    WHERE data_pregao < (
+                        SELECT MIN(data_pregao) FROM (
+                            SELECT DISTINCT data_pregao
+                            FROM DadosPregao
+                            ORDER BY data_pregao DESC
+                            LIMIT ?
+                        )
+                    )
+                """, (self.dias,))
+                self._conn.commit()
+                self._atualizar_janela()
+            self._versao = versao
+        finally:
+            self._sincronizando.release()
+
+    def _atualizar_janela(self):
+        # MIN/MAX não passam pelo conversor de DATE: vêm como texto ISO
+        row = self._conn.execute(
+            "SELECT MIN(data_pregao), MAX(data_pregao) FROM DadosPregao"
+        ).fetchone()
+        self._janela = (row[0], row[1])
+
+    @property
+    def ultima_data(self):
+        return self._janela[1]
+
+    def cobre(self, data):
+        """
+        Indica se a data (YYYY-MM-DD) está dentro da janela da réplica.
+        """
+        inicio, fim = self._janela
+        return bool(data and inicio and inicio <= data <= fim)
+
+    # --------------------------------------------------
+    # CONSULTAS (mesmo formato de linha das consultas no Azure SQL)
+    # --------------------------------------------------
+    def _consultar(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def cotacoes(self, data, ticker=None):
+        if ticker:
+            return self._consultar(f"""
+                SELECT {COLUNAS}
+                FROM DadosPregao
+                WHERE data_pregao = ? AND ticker = ?
+            """, (data, ticker))
+        return self._consultar(f"""
+            SELECT {COLUNAS}
+            FROM DadosPregao
+            WHERE data_pregao = ?
+            ORDER BY ticker
+        """, (data,))
+
+    def pregao(self, data):
+        """
+        Linhas do pregão usadas nos rankings (ver ranking.RankingDia).
+        """
+        return self._consultar("""
+            SELECT
+                ticker,
+                preco_abertura,
+                preco_min,
+                preco_max,
+                preco_ultimo,
+                quantidade_negociada
+            FROM DadosPregao
+            WHERE data_pregao = ?
+        """, (data,))
+
+    def comparacao(self, de, ate):
+        """
+        Linhas da comparação entre dois pregões (ver comparacao.comparar).
+        O SQLite embutido pode não ter FULL OUTER JOIN: os tickers só do
+        segundo pregão entram por um UNION ALL.
+        """
+        return self._consultar("""
+            SELECT a.ticker, a.preco_ultimo, b.preco_ultimo,
+                   a.quantidade_negociada, b.quantidade_negociada
+            FROM DadosPregao a
+            LEFT JOIN DadosPregao b
+                ON b.ticker = a.ticker AND b.data_pregao = ?
+            WHERE a.data_pregao = ?
+            UNION ALL
+            SELECT b.ticker, NULL, b.preco_ultimo,
+                   NULL, b.quantidade_negociada
+            FROM DadosPregao b
+            WHERE b.data_pregao = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM DadosPregao a
+                WHERE a.ticker = b.ticker AND a.data_pregao = ?
+            )
+        """, (ate, de, ate, de))
+
+    def resumo(self, data):
+        return self._consultar("""
+            SELECT
+                COUNT(*),
+                SUM(quantidade_negociada),
+                AVG(preco_ultimo),
+                MAX(preco_ultimo),
+                MIN(preco_ultimo)
+            FROM DadosPregao
+            WHERE data_pregao = ?
+        """, (data,))[0]
@@ -0,0 +1,60 @@
+"""
+Coalescência de requisições (single-flight) para consultas idênticas
+"""
+import threading
+
+
+class _Chamada:
+    """Consulta em andamento, compartilhada pelas requisições que esperam"""
+
+    __slots__ = ('evento', 'resultado', 'erro')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class SingleFlight:
+    """
+    Garante que, dentro de um worker, requisições concorrentes com a mesma
+    chave executem a consulta uma única vez: a primeira executa e as demais
+    esperam e recebem o mesmo resultado (ou a mesma exceção).
+
+    O resultado é compartilhado entre as requisições e não deve ser alterado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chamadas = {}
+        self.executadas = 0
+        self.coalescidas = 0
+
+    def executar(self, chave, funcao):
+        with self._lock:
+            chamada = self._chamadas.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada()
+                self._chamadas[chave] = chamada
+                self.executadas += 1
+            else:
+                self.coalescidas += 1
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+        except Exception as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._chamadas[chave]
+            chamada.evento.set()
+
+        return chamada.resultado
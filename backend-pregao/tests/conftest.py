@@ -0,0 +1,29 @@
+"""
+Configuração dos testes: o app é importado do diretório do backend, com o
+cache em disco num arquivo temporário
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "CACHE_DISCO_ARQUIVO",
+    os.path.join(tempfile.mkdtemp(), "pregao-cache.db")
+)
+
+
+class CursorFalso:
+    """
+    Substitui app.cursor_db nos testes: as linhas vêm do executar_consulta
+    trocado pelo teste
+    """
+
+    def __init__(self, destino=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
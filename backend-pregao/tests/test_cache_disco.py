@@ -0,0 +1,42 @@
+"""
+Testes de quais requisições consultam o cache em disco
+"""
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    chamadas = []
+
+    def consultar_versao(destino=None):
+        chamadas.append(backend.rota_atual())
+        return ('2024-01-02', 10)
+
+    monkeypatch.setattr(backend, 'consultar_versao', consultar_versao)
+    monkeypatch.setattr(backend, '_versao_dados', {'valor': (None, 0), 'expira': 0.0})
+    return chamadas
+
+
+def test_rotas_fora_de_api_nao_consultam_versao(consultas):
+    cliente = backend.app.test_client()
+    cliente.get('/')
+    cliente.get('/nao-existe')
+    assert consultas == []
+
+
+def test_disjuntores_abertos_nao_consultam_versao(consultas, monkeypatch):
+    for _, _, disjuntor in backend.destinos_db():
+        monkeypatch.setattr(disjuntor, 'estado', 'aberto')
+        monkeypatch.setattr(disjuntor, '_aberto_em', backend.time.monotonic())
+    with backend.app.test_request_context('/api/tickers'):
+        assert backend.cache_disco is not None
+        assert backend.servir_do_disco() is None
+    assert consultas == []
+
+
+def test_rotas_de_dados_consultam_versao(consultas):
+    with backend.app.test_request_context('/api/tickers'):
+        backend.servir_do_disco()
+    assert consultas == ['/api/tickers']
@@ -0,0 +1,72 @@
+"""
+Testes da comparação entre dois pregões (comparacao)
+"""
+import pytest
+
+from comparacao import comparar, ordenar
+
+# (ticker, fechamento_de, fechamento_ate, volume_de, volume_ate)
+JOIN = [
+    ('PETR4', 10.0, 11.0, 100, 300),
+    ('VALE3', 20.0, 18.0, 200, 100),
+    ('ITUB4', 30.0, 31.5, 0, 50),
+    ('NOVO3', None, 5.0, None, 10),
+    ('VELH3', 7.0, None, 70, None),
+]
+
+
+@pytest.fixture
+def itens():
+    return comparar(JOIN)
+
+
+def por_ticker(itens):
+    return {item['ticker']: item for item in itens}
+
+
+def tickers(itens):
+    return [item['ticker'] for item in itens]
+
+
+def test_variacoes_dos_mantidos(itens):
+    petr = por_ticker(itens)['PETR4']
+    assert petr['situacao'] == 'mantido'
+    assert petr['variacao'] == pytest.approx(1.0)
+    assert petr['variacao_pct'] == pytest.approx(10.0)
+    assert petr['razao_volume'] == pytest.approx(3.0)
+    # Sem volume no primeiro pregão não há razão
+    assert por_ticker(itens)['ITUB4']['razao_volume'] is None
+
+
+def test_novo_e_removido_sem_variacao(itens):
+    novo, velho = por_ticker(itens)['NOVO3'], por_ticker(itens)['VELH3']
+    assert novo['situacao'] == 'novo'
+    assert velho['situacao'] == 'removido'
+    for item in (novo, velho):
+        assert item['variacao'] is None
+        assert item['variacao_pct'] is None
+        assert item['razao_volume'] is None
+
+
+def test_ordenar_deixa_sem_valor_no_final(itens):
+    assert tickers(ordenar(itens, 'variacao_pct')) == [
+        'PETR4', 'ITUB4', 'VALE3', 'NOVO3', 'VELH3'
+    ]
+    assert tickers(ordenar(itens, 'variacao_pct', decrescente=False)) == [
+        'VALE3', 'ITUB4', 'PETR4', 'NOVO3', 'VELH3'
+    ]
+    assert tickers(ordenar(itens, 'ticker')) == sorted(row[0] for row in JOIN)
+
+
+
+@pytest.mark.parametrize('ordenacao', ['variacao_pct', 'variacao', 'razao_volume', 'volume', 'ticker'])
+@pytest.mark.parametrize('decrescente', [None, True, False])
+def test_top_n_igual_ao_prefixo_da_ordenacao_completa(itens, ordenacao, decrescente):
+    completa = ordenar(itens, ordenacao, decrescente)
+    for n in range(0, len(itens) + 2):
+        assert ordenar(itens, ordenacao, decrescente, n) == completa[:n]
+
+
+def test_top_n_completa_com_itens_sem_valor(itens):
+    # Só 2 itens têm razão de volume; o top 3 completa com os sem valor
+    assert tickers(ordenar(itens, 'razao_volume', n=3)) == ['PETR4', 'VALE3', 'ITUB4']
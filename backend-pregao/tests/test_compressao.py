@@ -0,0 +1,82 @@
+"""
+Testes do armazém de respostas (compressao.ArmazemRespostas)
+"""
+import gzip
+
+import pytest
+
+import app as backend
+from compressao import ArmazemRespostas
+from conftest import CursorFalso
+from disjuntor import CircuitoAberto
+
+
+def test_armazem_imutavel_mantem_primeira_resposta():
+    armazem = ArmazemRespostas(1024 * 1024)
+    armazem.guardar('/a', b'{"v": 1}', 'application/json')
+    armazem.guardar('/a', b'{"v": 2}', 'application/json')
+    assert armazem.obter('/a', None)[0] == b'{"v": 1}'
+
+
+def test_armazem_com_substituicao_guarda_resposta_mais_recente():
+    armazem = ArmazemRespostas(1024 * 1024, substituir=True)
+    corpo_antigo = b'{"v": "antigo"}' + b' ' * 2048
+    corpo_novo = b'{"v": "novo"}' + b' ' * 2048
+    armazem.guardar('/a', corpo_antigo, 'application/json')
+    armazem.obter('/a', 'gzip')  # gera a variante comprimida do antigo
+    armazem.guardar('/a', corpo_novo, 'application/json')
+
+    assert armazem.obter('/a', None)[0] == corpo_novo
+    corpo, _, encoding = armazem.obter('/a', 'gzip')
+    assert encoding == 'gzip'
+    assert gzip.decompress(corpo) == corpo_novo
+    assert armazem._bytes == ArmazemRespostas._tamanho(armazem._entradas['/a'])
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(backend, 'cache_disco', None)
+    backend.respostas_recentes._entradas.clear()
+    backend.respostas_recentes._bytes = 0
+    return backend.app.test_client()
+
+
+def test_banco_indisponivel_serve_a_resposta_mais_recente(cliente, monkeypatch):
+    respostas = iter([['PETR4'], ['PETR4', 'VALE3']])
+
+    def executar(cursor, sql, params=None):
+        return [(t,) for t in next(respostas)]
+
+    monkeypatch.setattr(backend, 'cursor_db', CursorFalso)
+    monkeypatch.setattr(backend, 'executar_consulta', executar)
+    assert cliente.get('/api/tickers').get_json()['total'] == 1
+    assert cliente.get('/api/tickers').get_json()['total'] == 2
+
+    def fora(destino=None):
+        raise CircuitoAberto("Banco de dados indisponível")
+
+    monkeypatch.setattr(backend, 'cursor_db', fora)
+    resposta = cliente.get('/api/tickers')
+    assert resposta.status_code == 200
+    assert resposta.headers['X-Cache'] == 'STALE'
+    assert resposta.get_json()['tickers'] == ['PETR4', 'VALE3']
+
+
+def test_health_nunca_e_servido_obsoleto(cliente, monkeypatch):
+    monkeypatch.setattr(backend, 'cursor_db', CursorFalso)
+    monkeypatch.setattr(
+        backend, 'executar_consulta',
+        lambda cursor, sql, params=None: [(None,) if 'MAX' in sql else (10,)]
+    )
+    for url in ('/', '/health'):
+        assert cliente.get(url).status_code == 200
+        assert backend.respostas_recentes.obter(url, None) is None
+
+    def fora(destino=None):
+        raise CircuitoAberto("Banco de dados indisponível")
+
+    monkeypatch.setattr(backend, 'cursor_db', fora)
+    resposta = cliente.get('/health')
+    assert resposta.status_code == 503
+    assert 'X-Cache' not in resposta.headers
+    assert resposta.get_json()['database'] == 'disconnected'
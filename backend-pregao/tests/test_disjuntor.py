@@ -0,0 +1,29 @@
+"""
+Testes da resposta com o banco indisponível (disjuntores abertos)
+"""
+import app as backend
+from compressao import ArmazemRespostas
+from disjuntor import CircuitoAberto, Disjuntor
+
+
+def test_retry_after_usa_o_primeiro_disjuntor_a_liberar(monkeypatch):
+    primario = Disjuntor(espera=30.0)
+    leitura = Disjuntor(espera=5.0)
+    for disjuntor in (primario, leitura):
+        disjuntor.estado = 'aberto'
+        disjuntor._aberto_em = backend.time.monotonic()
+
+    def fora(destino=None):
+        raise CircuitoAberto("Banco de dados indisponível")
+
+    monkeypatch.setattr(backend, 'LEITURA_CONFIGURADA', True)
+    monkeypatch.setattr(backend, 'disjuntor', primario)
+    monkeypatch.setattr(backend, 'disjuntor_leitura', leitura)
+    monkeypatch.setattr(backend, 'cache_disco', None)
+    monkeypatch.setattr(backend, 'cursor_db', fora)
+    monkeypatch.setattr(backend, 'respostas_recentes', ArmazemRespostas(1024 * 1024))
+
+    resposta = backend.app.test_client().get('/api/tickers')
+
+    assert resposta.status_code == 503
+    assert resposta.headers['Retry-After'] == '5'
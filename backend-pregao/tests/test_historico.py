@@ -0,0 +1,63 @@
+"""
+Testes do histórico de vários ativos (/api/historico)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+import app as backend
+from conftest import CursorFalso
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(backend, 'cache_disco', None)
+    monkeypatch.setattr(backend, 'cursor_db', CursorFalso)
+    return backend.app.test_client()
+
+
+def historico(ticker, dias):
+    # Do pregão mais recente para o mais antigo, como a consulta retorna
+    return [
+        (ticker, date(2024, 3, 1) - timedelta(days=i), 10.0, 9.0, 11.0, 10.0, 10.5, 100)
+        for i in range(dias)
+    ]
+
+
+@pytest.mark.parametrize('params', [
+    'inicio=2024-13-01',
+    'fim=ontem',
+    'inicio=2024-03-01&fim=2024-02-01',
+])
+def test_datas_invalidas(cliente, monkeypatch, params):
+    def executar(cursor, sql, params=None):
+        raise AssertionError('não deveria consultar o banco')
+
+    monkeypatch.setattr(backend, 'executar_consulta', executar)
+    resposta = cliente.get(f'/api/historico?tickers=PETR4&{params}')
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] is True
+
+
+def test_tickers_truncados_no_limite(cliente, monkeypatch):
+    consultas = []
+
+    def executar(cursor, sql, params=None):
+        if params is None:
+            # Versão dos dados (o período termina na última data carregada)
+            return [(date(2024, 3, 1), 2)]
+        consultas.append(params)
+        limite = params[-1]
+        return historico('PETR4', limite) + historico('VALE3', 2)
+
+    monkeypatch.setattr(backend, 'executar_consulta', executar)
+    dados = cliente.get(
+        '/api/historico?tickers=PETR4,VALE3&inicio=2020-01-01&fim=2024-03-01'
+    ).get_json()
+
+    assert consultas[0][-1] == backend.MAX_REGISTROS_POR_TICKER + 1
+    assert dados['limit'] == backend.MAX_REGISTROS_POR_TICKER
+    assert dados['truncados'] == ['PETR4']
+    assert len(dados['historicos']['PETR4']) == backend.MAX_REGISTROS_POR_TICKER
+    assert len(dados['historicos']['VALE3']) == 2
+    assert dados['total_registros'] == backend.MAX_REGISTROS_POR_TICKER + 2
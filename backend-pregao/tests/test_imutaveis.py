@@ -0,0 +1,64 @@
+"""
+Testes de quais respostas são guardadas como imutáveis
+"""
+import pytest
+
+import app as backend
+from compressao import ArmazemRespostas
+from ranking import RankingDia
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(backend, 'cache_disco', None)
+    monkeypatch.setattr(backend, 'versao_dados', lambda: ('2024-03-01', 10))
+    monkeypatch.setattr(backend, 'armazem_respostas', ArmazemRespostas(1024 * 1024))
+    return backend.app.test_client()
+
+
+def guardadas():
+    return set(backend.armazem_respostas._entradas)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/top-volume?data=1',
+    '/api/top-volume?data=0000',
+    '/api/resumo?data=1',
+])
+def test_data_mal_formada(cliente, url):
+    assert cliente.get(url).status_code == 400
+    assert guardadas() == set()
+
+
+def test_data_mal_formada_nunca_e_fechada():
+    with backend.app.test_request_context('/'):
+        assert not backend.data_fechada('1')
+        assert not backend.data_fechada('0000')
+
+
+def test_top_volume_vazio_nao_e_guardado(cliente, monkeypatch):
+    monkeypatch.setattr(backend, 'ranking_do_dia', lambda data=None: None)
+    resposta = cliente.get('/api/top-volume?data=2024-01-06')
+    assert resposta.get_json()['top_10_volume'] == []
+    assert guardadas() == set()
+
+
+def test_top_volume_de_pregao_fechado_e_guardado(cliente, monkeypatch):
+    linha = ('PETR4', 10.0, 9.0, 11.0, 10.5, 100)
+    ranking = RankingDia('2024-01-05', [linha])
+    monkeypatch.setattr(backend, 'ranking_do_dia', lambda data=None: ranking)
+    assert cliente.get('/api/top-volume?data=2024-01-05').status_code == 200
+    assert guardadas() == {'/api/top-volume?data=2024-01-05'}
+
+
+def test_resumo_sem_cotacoes(cliente, monkeypatch):
+    monkeypatch.setattr(backend, 'consultar_resumo', lambda data: None)
+    assert cliente.get('/api/resumo?data=2024-01-06').status_code == 404
+    assert guardadas() == set()
+
+
+def test_serie_resumo_sem_dados(cliente, monkeypatch):
+    monkeypatch.setattr(backend, 'versao_dados', lambda: (None, 0))
+    resposta = cliente.get('/api/resumo?inicio=2024-01-01')
+    assert resposta.status_code == 404
+    assert 'sem dados' in resposta.get_json()['message']
@@ -0,0 +1,78 @@
+"""
+Testes dos rankings pré-calculados por pregão (ranking.RankingDia)
+"""
+import pytest
+
+import app as backend
+from ranking import CacheRankings, RankingDia
+
+# (ticker, abertura, minimo, maximo, fechamento, quantidade)
+PREGAO = [
+    ('PETR4', 10.0, 9.0, 11.0, 11.0, 300),  # +10%, amplitude 22,2%
+    ('VALE3', 20.0, 18.0, 20.0, 18.0, 100),  # -10%, amplitude 11,1%
+    ('ITUB4', 30.0, 30.0, 33.0, 31.5, 200),  # +5%,  amplitude 10%
+    ('XPTO3', 0.0, 0.0, 5.0, 5.0, 50),       # sem abertura/mínimo
+]
+
+
+@pytest.fixture
+def ranking():
+    return RankingDia('2024-01-05', PREGAO)
+
+
+def tickers(itens):
+    return [item['ticker'] for item in itens]
+
+
+def test_ordem_de_cada_metrica(ranking):
+    assert tickers(ranking.top('volume', 10)) == ['PETR4', 'ITUB4', 'VALE3', 'XPTO3']
+    assert tickers(ranking.top('volume_financeiro', 10)) == ['ITUB4', 'PETR4', 'VALE3', 'XPTO3']
+    assert tickers(ranking.top('alta', 10)) == ['PETR4', 'ITUB4', 'VALE3']
+    assert tickers(ranking.top('amplitude', 10)) == ['PETR4', 'VALE3', 'ITUB4']
+
+
+def test_baixa_em_ordem_crescente_de_variacao(ranking):
+    baixa = ranking.top('baixa', 2)
+    assert tickers(baixa) == ['VALE3', 'ITUB4']
+    assert baixa[0]['variacao_pct'] == pytest.approx(-10.0)
+
+
+def test_sem_abertura_fica_fora_de_variacao_e_amplitude(ranking):
+    assert ranking.total == 4
+    xpto, = [item for item in ranking.itens if item['ticker'] == 'XPTO3']
+    assert xpto['variacao_pct'] is None and xpto['amplitude_pct'] is None
+
+
+def test_top_n_e_uma_fatia(ranking):
+    assert tickers(ranking.top('volume', 1)) == ['PETR4']
+    assert len(ranking.top('volume', 100)) == ranking.total
+    assert ranking.top('volume', 0) == []
+
+
+def test_cache_descarta_o_menos_usado():
+    cache = CacheRankings(max_dias=2)
+    cache.guardar(('2024-01-03', None), 'a')
+    cache.guardar(('2024-01-04', None), 'b')
+    cache.obter(('2024-01-03', None))
+    cache.guardar(('2024-01-05', None), 'c')
+    assert cache.obter(('2024-01-04', None)) is None
+    assert cache.obter(('2024-01-03', None)) == 'a'
+
+
+@pytest.fixture
+def cliente(monkeypatch, ranking):
+    monkeypatch.setattr(backend, 'cache_disco', None)
+    monkeypatch.setattr(backend, 'versao_dados', lambda: ('2024-01-05', 4))
+    monkeypatch.setattr(backend, 'ranking_do_dia', lambda data=None: ranking)
+    return backend.app.test_client()
+
+
+@pytest.mark.parametrize('params', ['n=0', 'n=-3', 'metrica=preco'])
+def test_parametros_invalidos(cliente, params):
+    assert cliente.get(f'/api/ranking?{params}').status_code == 400
+
+
+def test_n_maior_que_o_pregao(cliente):
+    dados = cliente.get('/api/ranking?metrica=baixa&n=50').get_json()
+    assert dados['total_ativos'] == 4
+    assert dados['total'] == 3
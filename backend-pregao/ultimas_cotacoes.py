@@ -0,0 +1,74 @@
+"""
+Snapshot em memória da cotação mais recente de cada ticker
+"""
+import threading
+
+
+class UltimasCotacoes:
+    """
+    Mapa ticker -> linha mais recente do ticker, para consultas de "última
+    cotação" por lookup em dicionário.
+
+    A carga é feita por `buscar(desde)`, função que consulta o Azure SQL:
+    com desde=None deve retornar a linha mais recente de cada ticker; com
+    uma data, as linhas com data_pregao >= desde. Cada linha começa por
+    (ticker, data_pregao, ...).
+
+    O mapa é substituído por inteiro a cada atualização, então as leituras
+    não precisam de lock.
+    """
+
+    def __init__(self, buscar):
+        self.buscar = buscar
+        self._mapa = {}
+        self._data = None
+        self._versao = None
+        self._sincronizando = threading.Lock()
+
+    @property
+    def carregado(self):
+        return self._versao is not None
+
+    def sincronizar(self, versao):
+        """
+        Atualiza o snapshot quando a versão dos dados (última data, linhas
+        da última data) muda. Só as linhas a partir da última data já
+        conhecida são buscadas.
+
+        Se outra thread já está sincronizando, retorna sem esperar.
+        """
+        if versao == self._versao or versao[0] is None:
+            return
+        if not self._sincronizando.acquire(blocking=False):
+            return
+        try:
+            rows = self.buscar(self._data)
+            mapa = dict(self._mapa)
+            for row in rows:
+                atual = mapa.get(row[0])
+                if atual is None or row[1] >= atual[1]:
+                    mapa[row[0]] = row
+            if mapa:
+                self._data = max(row[1] for row in mapa.values())
+            self._mapa = mapa
+            self._versao = versao
+        finally:
+            self._sincronizando.release()
+
+    def obter(self, ticker):
+        return self._mapa.get(ticker)
+
+    def obter_varios(self, tickers):
+        """
+        Retorna (linhas encontradas na ordem pedida, tickers não encontrados).
+        """
+        mapa = self._mapa
+        encontrados = []
+        nao_encontrados = []
+        for ticker in tickers:
+            row = mapa.get(ticker)
+            if row is None:
+                nao_encontrados.append(ticker)
+            else:
+                encontrados.append(row)
+        return encontrados, nao_encontrados
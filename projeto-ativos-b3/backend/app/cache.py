@@ -0,0 +1,217 @@
+"""
+Cache de respostas em duas camadas: memória do worker e disco (SQLite)
+compartilhado pelos workers do host
+
+O disco sobrevive a reciclagem de workers e deploys: workers novos
+começam com as respostas já calculadas pelos anteriores.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Intervalo mínimo entre atualizações do último acesso de uma entrada
+# (evita uma escrita no arquivo a cada leitura)
+INTERVALO_ACESSO = 60.0
+
+
+class CacheDisco:
+    """
+    Respostas por chave e versão dos dados em um arquivo SQLite (modo WAL,
+    compartilhado pelos workers), limitado a `max_bytes`: ao passar do
+    limite as entradas acessadas há mais tempo são removidas. Uma entrada
+    só vale na versão com que foi calculada; `invalidar` apaga as demais.
+    Além do corpo, cada entrada guarda os cabeçalhos da resposta (X-Total
+    das respostas em Arrow, Vary).
+
+    Erros do SQLite (arquivo travado, disco cheio) nunca chegam à
+    requisição: a operação é ignorada como um cache miss.
+    """
+
+    def __init__(self, caminho, max_bytes):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._executar(lambda conn: conn.executescript("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                versao TEXT NOT NULL,
+                mimetype TEXT NOT NULL,
+                corpo BLOB NOT NULL,
+                tamanho INTEGER NOT NULL,
+                acesso REAL NOT NULL,
+                cabecalhos TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE INDEX IF NOT EXISTS idx_respostas_acesso
+                ON respostas (acesso);
+        """))
+        self._executar(self._migrar)
+
+    @staticmethod
+    def _migrar(conn):
+        # Arquivos criados antes da coluna de cabeçalhos
+        colunas = {row[1] for row in conn.execute("PRAGMA table_info(respostas)")}
+        if "cabecalhos" not in colunas:
+            conn.execute(
+                "ALTER TABLE respostas ADD COLUMN cabecalhos TEXT NOT NULL DEFAULT '{}'"
+            )
+
+    def _conexao(self):
+        # Uma conexão por thread e por processo (workers do gunicorn/uvicorn)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _executar(self, funcao):
+        try:
+            return funcao(self._conexao())
+        except sqlite3.Error as e:
+            print(f"✗ Erro no cache em disco: {e}")
+            return None
+
+    def obter(self, chave, versao):
+        """
+        Retorna (corpo, media_type, cabecalhos) ou None.
+        """
+        def obter(conn):
+            row = conn.execute(
+                "SELECT corpo, mimetype, acesso, cabecalhos FROM respostas"
+                " WHERE chave = ? AND versao = ?",
+                (chave, versao)
+            ).fetchone()
+            if row is None:
+                return None
+            agora = time.time()
+            if agora - row[2] > INTERVALO_ACESSO:
+                conn.execute(
+                    "UPDATE respostas SET acesso = ? WHERE chave = ?", (agora, chave)
+                )
+            return bytes(row[0]), row[1], json.loads(row[3])
+        return self._executar(obter)
+
+    def guardar(self, chave, versao, corpo, media_type, cabecalhos):
+        if len(corpo) > self.max_bytes:
+            return
+
+        def guardar(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chave, versao, media_type, corpo, len(corpo), time.time(),
+                 json.dumps(cabecalhos))
+            )
+            self._liberar_espaco(conn)
+        self._executar(guardar)
+
+    def _liberar_espaco(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Remove as menos acessadas até ficar em 90% do limite
+        excesso = total - int(self.max_bytes * 0.9)
+        remover = []
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY acesso"
+        ):
+            remover.append((chave,))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        conn.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+
+    def invalidar(self, versao):
+        """
+        Apaga as entradas de versões diferentes de `versao`.
+        """
+        self._executar(lambda conn: conn.execute(
+            "DELETE FROM respostas WHERE versao != ?", (versao,)
+        ))
+
+
+class CacheMemoria:
+    """
+    Cache LRU em memória limitado em bytes: chave -> (versao, corpo,
+    media_type, cabecalhos).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+            return item
+
+    def guardar(self, chave, versao, corpo, media_type, cabecalhos):
+        if len(corpo) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior[1])
+            self._itens[chave] = (versao, corpo, media_type, cabecalhos)
+            self.bytes += len(corpo)
+            while self.bytes > self.max_bytes:
+                _, (_, removido, _, _) = self._itens.popitem(last=False)
+                self.bytes -= len(removido)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes = 0
+
+
+class CacheRespostas:
+    """
+    Respostas por chave (URL) e versão dos dados: primeiro a memória do
+    worker, depois o disco. Um acerto no disco volta para a memória.
+    """
+
+    def __init__(self, memoria_bytes, caminho_disco=None, disco_bytes=0):
+        self.memoria = CacheMemoria(memoria_bytes)
+        self.disco = None
+        if caminho_disco and disco_bytes:
+            self.disco = CacheDisco(caminho_disco, disco_bytes)
+        self._versao = None
+
+    def sincronizar(self, versao):
+        """
+        Descarta as respostas de outras versões quando a versão muda.
+        """
+        if versao == self._versao:
+            return
+        self._versao = versao
+        self.memoria.limpar()
+        if self.disco is not None:
+            self.disco.invalidar(versao)
+
+    def obter(self, chave, versao):
+        """
+        Retorna (corpo, media_type, cabecalhos) ou None.
+        """
+        item = self.memoria.obter(chave)
+        if item is not None and item[0] == versao:
+            return item[1:]
+        if self.disco is None:
+            return None
+        entrada = self.disco.obter(chave, versao)
+        if entrada is None:
+            return None
+        self.memoria.guardar(chave, versao, *entrada)
+        return entrada
+
+    def guardar(self, chave, versao, corpo, media_type, cabecalhos):
+        self.memoria.guardar(chave, versao, corpo, media_type, cabecalhos)
+        if self.disco is not None:
+            self.disco.guardar(chave, versao, corpo, media_type, cabecalhos)
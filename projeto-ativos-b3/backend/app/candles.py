@@ -0,0 +1,191 @@
+"""
+Candles OHLC-V por período (dia, semana, mês, trimestre) a partir dos
+pregões diários de um ticker
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Resoluções aceitas
+RESOLUCOES = ("day", "week", "month", "quarter")
+
+# Candles fechados guardados no total (somando todos os pares
+# ticker/resolução), para limitar a memória do worker
+MAX_CANDLES_CACHE = 100_000
+
+
+def inicio_periodo(datas: np.ndarray, resolucao: str) -> np.ndarray:
+    """
+    Primeiro dia do período de cada data (datetime64[D]); a semana
+    começa na segunda-feira
+    """
+    if resolucao == "day":
+        return datas
+    if resolucao == "week":
+        # 1970-01-01 foi uma quinta-feira
+        dias = datas.astype(np.int64)
+        return datas - ((dias + 3) % 7).astype("timedelta64[D]")
+    meses = datas.astype("datetime64[M]")
+    if resolucao == "quarter":
+        numero = meses.astype(np.int64)
+        meses = (numero - numero % 3).astype("datetime64[M]")
+    return meses.astype("datetime64[D]")
+
+
+def fim_periodo(inicio: np.ndarray, resolucao: str) -> np.ndarray:
+    """
+    Primeiro dia do período seguinte (fim exclusivo)
+    """
+    if resolucao == "day":
+        return inicio + np.timedelta64(1, "D")
+    if resolucao == "week":
+        return inicio + np.timedelta64(7, "D")
+    meses = 3 if resolucao == "quarter" else 1
+    return (inicio.astype("datetime64[M]") + np.timedelta64(meses, "M")).astype("datetime64[D]")
+
+
+def agregar(rows, resolucao: str) -> Tuple[List[dict], np.ndarray]:
+    """
+    Agrega as linhas diárias (data_pregao, preco_abertura, preco_max,
+    preco_min, preco_ultimo, quantidade_negociada), em ordem de data, em
+    candles: abertura do primeiro pregão, máxima e mínima do período,
+    fechamento do último e soma do volume.
+
+    Returns:
+        Tupla (candles, fim exclusivo de cada período)
+    """
+    if not rows:
+        return [], np.array([], dtype="datetime64[D]")
+
+    datas, abertura, maxima, minima, fechamento, volume = zip(*rows)
+    datas = np.array(datas, dtype="datetime64[D]")
+    abertura = np.array(abertura, dtype=np.float64)
+    maxima = np.array(maxima, dtype=np.float64)
+    minima = np.array(minima, dtype=np.float64)
+    fechamento = np.array(fechamento, dtype=np.float64)
+    volume = np.array(volume, dtype=np.int64)
+
+    periodos = inicio_periodo(datas, resolucao)
+    # Posição do primeiro pregão de cada período (datas já ordenadas)
+    primeiros = np.flatnonzero(np.r_[True, periodos[1:] != periodos[:-1]])
+    ultimos = np.r_[primeiros[1:], len(datas)] - 1
+
+    inicios = periodos[primeiros]
+    candles = [
+        {
+            "inicio": str(inicio),
+            "fim": str(fim),
+            "preco_abertura": float(a),
+            "preco_max": float(mx),
+            "preco_min": float(mn),
+            "preco_ultimo": float(f),
+            "quantidade_negociada": int(v),
+            "pregoes": int(n),
+        }
+        for inicio, fim, a, mx, mn, f, v, n in zip(
+            inicios,
+            datas[ultimos],
+            abertura[primeiros],
+            np.maximum.reduceat(maxima, primeiros),
+            np.minimum.reduceat(minima, primeiros),
+            fechamento[ultimos],
+            np.add.reduceat(volume, primeiros),
+            ultimos - primeiros + 1,
+        )
+    ]
+    return candles, fim_periodo(inicios, resolucao)
+
+
+class CacheCandles:
+    """
+    Candles de períodos fechados por (ticker, resolução), limitado a
+    `max_candles` candles no total (saem os pares usados há mais tempo).
+    Um período está fechado quando a base já tem pregão depois do seu fim;
+    os dados dele só mudam se um pregão antigo for carregado de novo, e
+    `descartar` remove os candles afetados. Só os pregões do período em
+    aberto voltam a ser lidos do banco.
+
+    Candles diários não passam por aqui: cada um é um pregão, não há
+    agregação a poupar.
+    """
+
+    def __init__(self, max_candles: int = MAX_CANDLES_CACHE):
+        self.max_candles = max_candles
+        self.candles = 0
+        self._entradas: "OrderedDict[tuple, Tuple[List[dict], date]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, ticker: str, resolucao: str) -> Tuple[List[dict], Optional[date]]:
+        """
+        Retorna (candles fechados, data a partir da qual ler os pregões);
+        data None quando não há nada guardado.
+        """
+        with self._lock:
+            entrada = self._entradas.get((ticker, resolucao))
+            if entrada is None:
+                return [], None
+            self._entradas.move_to_end((ticker, resolucao))
+            return entrada
+
+    def guardar(self, ticker: str, resolucao: str, fechados: List[dict], desde: date):
+        if len(fechados) > self.max_candles:
+            return
+        with self._lock:
+            anterior = self._entradas.pop((ticker, resolucao), None)
+            if anterior is not None:
+                self.candles -= len(anterior[0])
+            self._entradas[(ticker, resolucao)] = (fechados, desde)
+            self.candles += len(fechados)
+            while self.candles > self.max_candles:
+                _, (removidos, _) = self._entradas.popitem(last=False)
+                self.candles -= len(removidos)
+
+    def descartar(self, data_pregao: date):
+        """
+        Remove as entradas com candles fechados que incluem `data_pregao`
+        (pregão carregado depois de o período fechar)
+        """
+        with self._lock:
+            for chave, (fechados, desde) in list(self._entradas.items()):
+                if desde > data_pregao:
+                    del self._entradas[chave]
+                    self.candles -= len(fechados)
+
+
+def montar(
+    cache: CacheCandles,
+    ticker: str,
+    resolucao: str,
+    ultima_data: Optional[date],
+    buscar
+) -> List[dict]:
+    """
+    Candles do ticker: os fechados vêm do cache e só os pregões a partir do
+    período em aberto são lidos por `buscar(desde)` (desde=None lê tudo).
+    Em day, sem cache, `buscar(None)` lê todos os pregões pedidos.
+
+    Args:
+        cache: Cache dos candles fechados
+        ticker: Código do ticker
+        resolucao: day, week, month ou quarter
+        ultima_data: Última data de pregão da base (fecha os períodos)
+        buscar: Função que retorna as linhas diárias (ver agregar)
+    """
+    if resolucao == "day":
+        return agregar(buscar(None), resolucao)[0]
+
+    fechados, desde = cache.obter(ticker, resolucao)
+    novos, fins = agregar(buscar(desde), resolucao)
+    if ultima_data is None:
+        return fechados + novos
+
+    # Os fins estão em ordem: os fechados são um prefixo dos novos
+    n_fechados = int(np.count_nonzero(fins <= np.datetime64(ultima_data, "D")))
+    if n_fechados:
+        cache.guardar(
+            ticker, resolucao, fechados + novos[:n_fechados], fins[n_fechados - 1].item()
+        )
+    return fechados + novos
@@ -2,42 +2,157 @@
 Operações CRUD (Create, Read, Update, Delete) no banco de dados
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from . import models
+from sqlalchemy import Row, and_, func, or_, select
+from . import candles, models
+from .lttb import lttb
+from .database import versao_dados
+from .tickers import IndiceTickers
+from collections import OrderedDict
 from datetime import date
-from typing import Optional, Tuple, List
+from typing import Iterator, Optional, Tuple, List
+import base64
+import binascii
+import json
+import threading
 
+import numpy as np
 
-def get_assets(
+
+# Totais de /api/assets por filtro e versão dos dados (quantidade de filtros)
+MAX_TOTAIS_CACHE = 1024
+
+# Linhas lidas do banco por vez na exportação
+LOTE_EXPORTACAO = 5000
+
+# Pregões mais recentes somados no volume que ordena as sugestões de ticker
+DIAS_VOLUME_SUGESTAO = 5
+
+# Acima disso a busca de ticker volta a ser LIKE (SQL Server aceita até
+# 2100 parâmetros por consulta)
+MAX_TICKERS_IN = 2000
+
+# Colunas das listagens, na ordem de serializacao.CAMPOS_ASSET: as linhas
+# vêm como tuplas, sem objetos ORM no identity map da sessão
+COLUNAS_ASSET = (
+    models.Asset.ticker,
+    models.Asset.data_pregao,
+    models.Asset.preco_abertura,
+    models.Asset.preco_min,
+    models.Asset.preco_max,
+    models.Asset.preco_medio,
+    models.Asset.preco_ultimo,
+    models.Asset.quantidade_negociada,
+    models.Asset.id,
+)
+
+indice_tickers = IndiceTickers()
+
+cache_candles = candles.CacheCandles()
+
+_totais = OrderedDict()
+_totais_lock = threading.Lock()
+
+
+def resolve_tickers(db: Session, termo: str, match: str = "substring") -> List[str]:
+    """
+    Resolve a busca de ticker no índice em memória dos tickers distintos,
+    recarregado quando a versão dos dados muda
+    
+    Args:
+        db: Sessão do banco de dados
+        termo: Texto buscado (case-insensitive)
+        match: exact, prefix ou substring
+    
+    Returns:
+        Tickers que casam com o termo
+    """
+    return load_ticker_index(db).buscar(termo, match)
+
+
+def load_ticker_index(db: Session) -> IndiceTickers:
+    """
+    Índice em memória dos tickers, com o volume dos últimos pregões de
+    cada um; só vai ao banco quando a versão dos dados muda
+    
+    Args:
+        db: Sessão do banco de dados
+    
+    Returns:
+        Índice de tickers da versão atual
+    """
+    versao = versao_dados()
+    if indice_tickers.versao != versao:
+        tickers = [t[0] for t in get_available_tickers(db)]
+        indice_tickers.carregar(tickers, versao, get_recent_volumes(db))
+    return indice_tickers
+
+
+def suggest_tickers(
     db: Session,
-    ticker: Optional[str] = None,
-    data_inicio: Optional[date] = None,
-    data_fim: Optional[date] = None,
-    skip: int = 0,
-    limit: int = 30
-) -> Tuple[List[models.Asset], int]:
+    prefixo: str,
+    k: int = 10,
+    por_volume: bool = False
+) -> List[str]:
     """
-    Busca ativos com filtros e paginação
+    Sugestões de ticker para autocomplete, resolvidas no índice em memória
     
     Args:
         db: Sessão do banco de dados
-        ticker: Ticker para filtrar (busca parcial, case-insensitive)
-        data_inicio: Data inicial do período
-        data_fim: Data final do período
-        skip: Quantidade de registros a pular (para paginação)
-        limit: Quantidade máxima de registros a retornar
+        prefixo: Início do ticker (case-insensitive)
+        k: Quantidade máxima de sugestões
+        por_volume: Ordenar pelo volume recente em vez da ordem alfabética
     
     Returns:
-        Tupla (lista de assets, total de registros)
+        Até k tickers que começam com o prefixo
     """
-    query = db.query(models.Asset)
+    return load_ticker_index(db).sugerir(prefixo, k, por_volume)
+
+
+def get_recent_volumes(db: Session, dias: int = DIAS_VOLUME_SUGESTAO) -> dict:
+    """
+    Soma da quantidade negociada por ticker nos últimos N pregões
     
-    # Aplicar filtros
+    Args:
+        db: Sessão do banco de dados
+        dias: Quantidade de pregões somados
+    
+    Returns:
+        Dicionário ticker -> volume
+    """
+    datas = get_available_dates(db, dias)
+    if not datas:
+        return {}
+    rows = (
+        db.query(models.Asset.ticker, func.sum(models.Asset.quantidade_negociada))
+        .filter(models.Asset.data_pregao >= datas[-1][0])
+        .group_by(models.Asset.ticker)
+        .all()
+    )
+    return {ticker: volume for ticker, volume in rows}
+
+
+def _asset_filters(
+    db: Session,
+    ticker: Optional[str],
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    match: str = "substring"
+) -> List:
+    """
+    Filtros de ticker (case-insensitive) e período. A busca de ticker vira
+    um IN com os tickers que casam, que usa o índice (ticker, data_pregao)
+    """
     filters = []
     
     if ticker:
-        # Busca case-insensitive
-        filters.append(models.Asset.ticker.ilike(f"%{ticker}%"))
+        tickers = resolve_tickers(db, ticker, match)
+        if len(tickers) <= MAX_TICKERS_IN:
+            # Nenhum ticker casou: IN () é sempre falso
+            filters.append(models.Asset.ticker.in_(tickers))
+        elif match == "prefix":
+            filters.append(models.Asset.ticker.ilike(f"{ticker}%"))
+        else:
+            filters.append(models.Asset.ticker.ilike(f"%{ticker}%"))
     
     if data_inicio:
         filters.append(models.Asset.data_pregao >= data_inicio)
@@ -45,11 +160,84 @@ def get_assets(
     if data_fim:
         filters.append(models.Asset.data_pregao <= data_fim)
     
+    return filters
+
+
+def count_assets(
+    db: Session,
+    ticker: Optional[str] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    match: str = "substring"
+) -> int:
+    """
+    Conta os ativos do filtro. O total fica em cache por filtro até a
+    versão dos dados mudar, então só a primeira página de cada filtro paga
+    pelo COUNT.
+    
+    Args:
+        db: Sessão do banco de dados
+        ticker: Ticker para filtrar (case-insensitive)
+        data_inicio: Data inicial do período
+        data_fim: Data final do período
+        match: Busca de ticker exact, prefix ou substring
+    
+    Returns:
+        Total de registros do filtro
+    """
+    chave = (ticker.upper() if ticker else None, match, data_inicio, data_fim, versao_dados())
+    with _totais_lock:
+        total = _totais.get(chave)
+        if total is not None:
+            _totais.move_to_end(chave)
+            return total
+    
+    query = db.query(func.count(models.Asset.id))
+    filters = _asset_filters(db, ticker, data_inicio, data_fim, match)
+    if filters:
+        query = query.filter(and_(*filters))
+    total = query.scalar()
+    
+    with _totais_lock:
+        _totais[chave] = total
+        while len(_totais) > MAX_TOTAIS_CACHE:
+            _totais.popitem(last=False)
+    return total
+
+
+def get_assets(
+    db: Session,
+    ticker: Optional[str] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 30,
+    match: str = "substring"
+) -> Tuple[List[Row], int]:
+    """
+    Busca ativos com filtros e paginação (linhas com COLUNAS_ASSET)
+    
+    Args:
+        db: Sessão do banco de dados
+        ticker: Ticker para filtrar (case-insensitive)
+        data_inicio: Data inicial do período
+        data_fim: Data final do período
+        match: Busca de ticker exact, prefix ou substring
+        skip: Quantidade de registros a pular (para paginação)
+        limit: Quantidade máxima de registros a retornar
+    
+    Returns:
+        Tupla (lista de linhas, total de registros)
+    """
+    query = db.query(*COLUNAS_ASSET)
+    
+    # Aplicar filtros
+    filters = _asset_filters(db, ticker, data_inicio, data_fim, match)
     if filters:
         query = query.filter(and_(*filters))
     
-    # Contar total de registros (antes da paginação)
-    total = query.count()
+    # Total de registros (antes da paginação), em cache por filtro
+    total = count_assets(db, ticker, data_inicio, data_fim, match)
     
     # Aplicar ordenação e paginação
     assets = (
@@ -66,6 +254,149 @@ def get_assets(
     return assets, total
 
 
+def stream_assets(
+    db: Session,
+    ticker: Optional[str] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    match: str = "substring",
+    lote: int = LOTE_EXPORTACAO
+) -> Iterator[List[Row]]:
+    """
+    Lê os ativos do filtro em lotes (yield_per: fetchmany de `lote`
+    linhas), em ordem (ticker, data_pregao) do índice, sem carregar o
+    resultado inteiro. O dialeto do pymssql não tem cursor no servidor
+    (stream_results não se aplica): a memória fica limitada porque o
+    driver lê as linhas da conexão à medida que cada lote é pedido.
+    
+    Args:
+        db: Sessão do banco de dados
+        ticker: Ticker para filtrar (case-insensitive)
+        data_inicio: Data inicial do período
+        data_fim: Data final do período
+        match: Busca de ticker exact, prefix ou substring
+        lote: Linhas por lote
+    
+    Returns:
+        Iterador de lotes de linhas com COLUNAS_ASSET
+    """
+    query = select(*COLUNAS_ASSET)
+    filters = _asset_filters(db, ticker, data_inicio, data_fim, match)
+    if filters:
+        query = query.where(and_(*filters))
+    query = (
+        query
+        .order_by(models.Asset.ticker, models.Asset.data_pregao)
+        .execution_options(yield_per=lote)
+    )
+    for particao in db.execute(query).partitions():
+        yield particao
+
+
+def encode_cursor(asset: Row, direcao: str) -> str:
+    """
+    Token opaco de paginação: direção ("n" = próxima, "p" = anterior) e a
+    chave (data_pregao, ticker, id) do registro de referência
+    """
+    chave = [direcao, asset.data_pregao.isoformat(), asset.ticker, asset.id]
+    return base64.urlsafe_b64encode(json.dumps(chave).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[str, date, str, int]:
+    """
+    Lê um token de encode_cursor; levanta ValueError se for inválido
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        direcao, data_pregao, ticker, asset_id = json.loads(bruto)
+        if direcao not in ("n", "p"):
+            raise ValueError(direcao)
+        return direcao, date.fromisoformat(data_pregao), str(ticker), int(asset_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {token}") from e
+
+
+def get_assets_keyset(
+    db: Session,
+    ticker: Optional[str] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = 30,
+    match: str = "substring"
+) -> Tuple[List[Row], Optional[str], Optional[str]]:
+    """
+    Busca uma página de ativos por seek (keyset) na ordem
+    (data_pregao desc, ticker, id): a página começa logo depois (ou antes)
+    da chave do cursor, sem OFFSET, então qualquer página custa o mesmo que
+    a primeira. Linhas com COLUNAS_ASSET
+    
+    Args:
+        db: Sessão do banco de dados
+        ticker: Ticker para filtrar (case-insensitive)
+        data_inicio: Data inicial do período
+        data_fim: Data final do período
+        match: Busca de ticker exact, prefix ou substring
+        cursor: Token "next"/"prev" de uma página anterior (None = primeira)
+        limit: Quantidade máxima de registros a retornar
+    
+    Returns:
+        Tupla (lista de linhas, token da próxima página, token da anterior)
+    """
+    asset = models.Asset
+    filters = _asset_filters(db, ticker, data_inicio, data_fim, match)
+    
+    direcao = "n"
+    if cursor:
+        direcao, data_pregao, ticker_ref, id_ref = decode_cursor(cursor)
+        if direcao == "n":
+            # Registros depois da chave na ordem da listagem
+            filters.append(or_(
+                asset.data_pregao < data_pregao,
+                and_(asset.data_pregao == data_pregao, or_(
+                    asset.ticker > ticker_ref,
+                    and_(asset.ticker == ticker_ref, asset.id > id_ref)
+                ))
+            ))
+        else:
+            # Registros antes da chave, buscados em ordem inversa
+            filters.append(or_(
+                asset.data_pregao > data_pregao,
+                and_(asset.data_pregao == data_pregao, or_(
+                    asset.ticker < ticker_ref,
+                    and_(asset.ticker == ticker_ref, asset.id < id_ref)
+                ))
+            ))
+    
+    query = db.query(*COLUNAS_ASSET)
+    if filters:
+        query = query.filter(and_(*filters))
+    
+    if direcao == "n":
+        ordem = (asset.data_pregao.desc(), asset.ticker, asset.id)
+    else:
+        ordem = (asset.data_pregao, asset.ticker.desc(), asset.id.desc())
+    
+    # Um registro a mais indica se há outra página nessa direção
+    assets = query.order_by(*ordem).limit(limit + 1).all()
+    tem_mais = len(assets) > limit
+    assets = assets[:limit]
+    if direcao == "p":
+        assets.reverse()
+    
+    if not assets:
+        return assets, None, None
+    
+    if direcao == "n":
+        tem_proxima, tem_anterior = tem_mais, cursor is not None
+    else:
+        tem_proxima, tem_anterior = True, tem_mais
+    
+    proxima = encode_cursor(assets[-1], "n") if tem_proxima else None
+    anterior = encode_cursor(assets[0], "p") if tem_anterior else None
+    return assets, proxima, anterior
+
+
 def get_asset_by_id(db: Session, asset_id: int) -> Optional[models.Asset]:
     """
     Busca um ativo por ID
@@ -121,23 +452,163 @@ def get_available_dates(db: Session, limit: int = 30) -> List:
 def get_assets_by_ticker(
     db: Session,
     ticker: str,
-    limit: int = 30
-) -> List[models.Asset]:
+    limit: int = 30,
+    max_pontos: Optional[int] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None
+) -> List[Row]:
+    """
+    Busca histórico de um ticker específico (linhas com COLUNAS_ASSET),
+    do pregão mais recente para o mais antigo
+    
+    Args:
+        db: Sessão do banco de dados
+        ticker: Código do ticker
+        limit: Quantidade de registros (ignorado com max_pontos)
+        max_pontos: Reduzir o histórico do período inteiro a até N pontos
+            (LTTB do fechamento)
+        data_inicio: Data inicial
+        data_fim: Data final
+    
+    Returns:
+        Lista de linhas do ticker
+    """
+    query = db.query(*COLUNAS_ASSET).filter(models.Asset.ticker == ticker.upper())
+    if data_inicio:
+        query = query.filter(models.Asset.data_pregao >= data_inicio)
+    if data_fim:
+        query = query.filter(models.Asset.data_pregao <= data_fim)
+
+    if not max_pontos:
+        return query.order_by(models.Asset.data_pregao.desc()).limit(limit).all()
+
+    # O período inteiro, reduzido: o desenho é o da série completa
+    rows = query.order_by(models.Asset.data_pregao).all()
+    if len(rows) > max_pontos:
+        indices = lttb(
+            np.array([r.data_pregao for r in rows], dtype="datetime64[D]").astype(np.int64),
+            [r.preco_ultimo for r in rows],
+            max_pontos
+        )
+        rows = [rows[i] for i in indices]
+    rows.reverse()
+    return rows
+
+
+def get_candles(
+    db: Session,
+    ticker: str,
+    resolucao: str = "day",
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    max_pontos: Optional[int] = None
+) -> List[dict]:
     """
-    Busca histórico de um ticker específico
+    Candles OHLC-V do ticker na resolução pedida. Em week, month e
+    quarter os períodos fechados ficam em cache; só os pregões do período
+    em aberto são lidos de novo
     
     Args:
         db: Sessão do banco de dados
         ticker: Código do ticker
-        limit: Quantidade de registros
+        resolucao: day, week, month ou quarter
+        data_inicio: Data inicial do período
+        data_fim: Data final do período
+        max_pontos: Reduzir a até N candles (LTTB do fechamento)
+    
+    Returns:
+        Candles (em ordem de data) dos períodos que tocam o intervalo
+    """
+    ticker = ticker.upper()
+    ultima = versao_dados().split("/")[0]
+    ultima_data = date.fromisoformat(ultima[:10]) if ultima != "None" else None
+    
+    def buscar(desde: Optional[date]):
+        query = db.query(
+            models.Asset.data_pregao,
+            models.Asset.preco_abertura,
+            models.Asset.preco_max,
+            models.Asset.preco_min,
+            models.Asset.preco_ultimo,
+            models.Asset.quantidade_negociada
+        ).filter(models.Asset.ticker == ticker)
+        if desde is not None:
+            query = query.filter(models.Asset.data_pregao >= desde)
+        if resolucao == "day":
+            # Sem cache: só os pregões do intervalo pedido
+            if data_inicio:
+                query = query.filter(models.Asset.data_pregao >= data_inicio)
+            if data_fim:
+                query = query.filter(models.Asset.data_pregao <= data_fim)
+        return query.order_by(models.Asset.data_pregao).all()
+    
+    resultado = candles.montar(cache_candles, ticker, resolucao, ultima_data, buscar)
+    if data_inicio:
+        resultado = [c for c in resultado if c["fim"] >= data_inicio.isoformat()]
+    if data_fim:
+        resultado = [c for c in resultado if c["inicio"] <= data_fim.isoformat()]
+    if max_pontos and len(resultado) > max_pontos:
+        indices = lttb(
+            np.array([c["inicio"] for c in resultado], dtype="datetime64[D]").astype(np.int64),
+            [c["preco_ultimo"] for c in resultado],
+            max_pontos
+        )
+        resultado = [resultado[i] for i in indices]
+    return resultado
+
+
+def get_loads_after(db: Session, ultimo_id: Optional[int], limit: int = 50) -> List[models.CargaPregao]:
+    """
+    Cargas de pregão concluídas depois de ultimo_id (registro da tabela
+    CargaPregao), em ordem
+    
+    Args:
+        db: Sessão do banco de dados (primário: a réplica pode atrasar)
+        ultimo_id: Último id já visto; None retorna só a carga mais recente
+        limit: Quantidade máxima de cargas
     
     Returns:
-        Lista de assets do ticker
+        Lista de cargas
     """
+    query = db.query(models.CargaPregao)
+    if ultimo_id is None:
+        return query.order_by(models.CargaPregao.id.desc()).limit(1).all()
     return (
-        db.query(models.Asset)
-        .filter(models.Asset.ticker == ticker.upper())
-        .order_by(models.Asset.data_pregao.desc())
+        query
+        .filter(models.CargaPregao.id > ultimo_id)
+        .order_by(models.CargaPregao.id)
         .limit(limit)
         .all()
-    )
\ No newline at end of file
+    )
+
+
+def get_day_summary(db: Session, data_pregao: date) -> dict:
+    """
+    Resumo de um pregão: quantidade de ativos, volume total e preços de
+    fechamento médio, máximo e mínimo
+    
+    Args:
+        db: Sessão do banco de dados
+        data_pregao: Data do pregão
+    
+    Returns:
+        Dicionário com o resumo
+    """
+    ativos, volume, medio, maximo, minimo = (
+        db.query(
+            func.count(models.Asset.id),
+            func.sum(models.Asset.quantidade_negociada),
+            func.avg(models.Asset.preco_ultimo),
+            func.max(models.Asset.preco_ultimo),
+            func.min(models.Asset.preco_ultimo)
+        )
+        .filter(models.Asset.data_pregao == data_pregao)
+        .one()
+    )
+    return {
+        "ativos": ativos,
+        "volume_total": int(volume or 0),
+        "preco_medio": float(medio) if medio is not None else None,
+        "preco_max": float(maximo) if maximo is not None else None,
+        "preco_min": float(minimo) if minimo is not None else None
+    }
@@ -0,0 +1,94 @@
+"""
+Exportação em massa de DadosPregao em CSV, NDJSON ou Parquet
+
+Cada formato transforma os lotes de linhas (COLUNAS_ASSET) lidos do banco
+em pedaços de bytes para um StreamingResponse: só um lote fica em memória
+por vez, qualquer que seja o tamanho do intervalo exportado.
+"""
+import csv
+import io
+from typing import Iterable, Iterator, List
+
+from .serializacao import CAMPOS_ASSET, assets, json_bytes, tabela_arrow
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional, CSV e NDJSON sempre disponíveis
+    pq = None
+
+
+def exportar_csv(lotes: Iterable[List]) -> Iterator[bytes]:
+    saida = io.StringIO()
+    escritor = csv.writer(saida, lineterminator="\n")
+    escritor.writerow(CAMPOS_ASSET)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield saida.getvalue().encode("utf-8")
+        saida.seek(0)
+        saida.truncate()
+    if saida.tell():
+        yield saida.getvalue().encode("utf-8")
+
+
+def exportar_ndjson(lotes: Iterable[List]) -> Iterator[bytes]:
+    for lote in lotes:
+        yield b"".join(json_bytes(item) + b"\n" for item in assets(lote))
+
+
+class _Saida(io.RawIOBase):
+    """
+    Arquivo só de escrita que entrega o que foi escrito a cada `retirar`,
+    mantendo a posição total (o Parquet grava offsets no rodapé)
+    """
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def retirar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes = []
+        return dados
+
+
+def exportar_parquet(lotes: Iterable[List]) -> Iterator[bytes]:
+    # Um row group por lote
+    saida = _Saida()
+    escritor = None
+    try:
+        for lote in lotes:
+            tabela = tabela_arrow(lote)
+            if escritor is None:
+                escritor = pq.ParquetWriter(saida, tabela.schema)
+            escritor.write_table(tabela)
+            yield saida.retirar()
+        if escritor is None:
+            # Nenhuma linha: arquivo só com o schema
+            escritor = pq.ParquetWriter(saida, tabela_arrow([]).schema)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    yield saida.retirar()
+
+
+# Formato -> (função, media type, extensão do arquivo)
+FORMATOS = {
+    "csv": (exportar_csv, "text/csv", "csv"),
+    "ndjson": (exportar_ndjson, "application/x-ndjson", "ndjson"),
+    "parquet": (exportar_parquet, "application/vnd.apache.parquet", "parquet"),
+}
+
+
+def formato_disponivel(formato: str) -> bool:
+    return formato != "parquet" or pq is not None
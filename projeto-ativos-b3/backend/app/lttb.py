@@ -0,0 +1,48 @@
+"""
+Redução de séries de preço para gráficos (Largest-Triangle-Three-Buckets)
+"""
+import numpy as np
+
+
+def lttb(x, y, max_pontos: int) -> np.ndarray:
+    """
+    Índices (em ordem) de até `max_pontos` pontos que preservam o desenho
+    da série (x crescente). O primeiro e o último ponto ficam sempre; os
+    demais são divididos em baldes e de cada balde fica o ponto que forma
+    o maior triângulo com o ponto escolhido no balde anterior e a média do
+    balde seguinte. O mínimo e o máximo de y também ficam sempre, para o
+    gráfico não perder os extremos.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_pontos:
+        return np.arange(n)
+
+    extremos = {int(np.argmin(y)), int(np.argmax(y))} - {0, n - 1}
+    baldes = max(1, max_pontos - len(extremos) - 2)
+    x = np.asarray(x, dtype=np.float64)
+
+    # Pontos 1..n-2 em `baldes` faixas [bordas[i], bordas[i + 1])
+    bordas = np.linspace(1, n - 1, baldes + 1).astype(np.int64)
+    escolhidos = np.empty(baldes + 2, dtype=np.int64)
+    escolhidos[0] = 0
+    escolhidos[-1] = n - 1
+
+    a = 0
+    for i in range(baldes):
+        inicio, fim = bordas[i], bordas[i + 1]
+        if i + 1 < baldes:
+            seguinte = slice(bordas[i + 1], bordas[i + 2])
+        else:
+            seguinte = slice(n - 1, n)
+        mx, my = x[seguinte].mean(), y[seguinte].mean()
+
+        # Dobro da área do triângulo (a, ponto do balde, média do seguinte)
+        areas = np.abs(
+            (x[a] - mx) * (y[inicio:fim] - y[a])
+            - (x[a] - x[inicio:fim]) * (my - y[a])
+        )
+        a = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = a
+
+    return np.union1d(escolhidos, np.array(sorted(extremos), dtype=np.int64))
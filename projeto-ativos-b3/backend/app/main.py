@@ -1,15 +1,24 @@
 """
 API FastAPI para consulta de dados de pregão da B3
 """
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date
+import asyncio
 import math
+import os
+import tempfile
 
-from . import crud, models, schemas
-from .database import engine, get_db
+from . import crud, exportacao, models, schemas, serializacao
+from .cache import CacheRespostas
+from .database import (
+    SessionLocal, engine, expirar_versao_dados, get_db, run_db, versao_dados
+)
+from .notificacoes import Notificador, formatar_evento
 
 # Criar tabelas (se não existirem)
 models.Base.metadata.create_all(bind=engine)
@@ -22,7 +31,164 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# CORS - Permitir requisições do frontend
+# Cache das respostas de /api/assets por URL e versão dos dados: memória do
+# worker + disco compartilhado pelos workers do host (CACHE_DISCO_MB=0
+# desativa o disco)
+cache_respostas = CacheRespostas(
+    int(os.getenv("CACHE_MEMORIA_MB", "64")) * 1024 * 1024,
+    os.getenv(
+        "CACHE_DISCO_ARQUIVO",
+        os.path.join(tempfile.gettempdir(), "ativos-b3-cache.db")
+    ),
+    int(os.getenv("CACHE_DISCO_MB", "256")) * 1024 * 1024
+)
+
+# Respostas em streaming, grandes demais para o cache
+ROTAS_SEM_CACHE = {"/api/assets/export"}
+
+# Exportações simultâneas por worker: cada uma prende uma conexão do pool
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) até terminar
+MAX_EXPORTACOES = int(os.getenv("MAX_EXPORTACOES", "2"))
+exportacoes = asyncio.Semaphore(MAX_EXPORTACOES)
+
+
+def _encerrar_exportacao(partes, db):
+    partes.close()
+    db.close()
+
+# Formato alternativo das listagens, para o OpenAPI
+RESPOSTA_ARROW = {
+    200: {"content": {serializacao.ARROW_STREAM: {}}, "description": "Registros em Arrow IPC"}
+}
+
+
+# --------------------------------------------------
+# AVISOS DE CARGA (SSE)
+# --------------------------------------------------
+# Intervalo entre consultas à tabela CargaPregao (uma por worker, qualquer
+# que seja o número de clientes em /api/events)
+NOTIFICACOES_INTERVALO = float(os.getenv("NOTIFICACOES_INTERVALO", "15"))
+
+# Comentário enviado aos clientes sem eventos, para proxies não fecharem
+# a conexão
+SSE_HEARTBEAT = 15.0
+
+
+def _cargas_depois(ultimo_id: Optional[int]):
+    db = SessionLocal(info={"primario": True})
+    try:
+        return crud.get_loads_after(db, ultimo_id)
+    finally:
+        db.close()
+
+
+def _evento_carga(carga: models.CargaPregao):
+    db = SessionLocal(info={"primario": True})
+    try:
+        resumo = crud.get_day_summary(db, carga.data_pregao)
+    finally:
+        db.close()
+    return carga.id, {
+        "data_pregao": carga.data_pregao.isoformat(),
+        "registros": carga.registros,
+        "concluida_em": carga.concluida_em.isoformat() if carga.concluida_em else None,
+        "resumo": resumo
+    }
+
+
+async def _buscar_cargas(ultimo_id: Optional[int]):
+    cargas = await run_db(_cargas_depois, ultimo_id)
+    if ultimo_id is not None and cargas:
+        # Dados novos (haja ou não clientes inscritos): versão e caches
+        # passam a valer já, sem esperar o TTL; a carga de um pregão antigo
+        # muda candles de períodos já fechados
+        expirar_versao_dados()
+        for carga in cargas:
+            crud.cache_candles.descartar(carga.data_pregao)
+    return cargas
+
+
+async def _montar_evento(carga: models.CargaPregao):
+    return await run_db(_evento_carga, carga)
+
+
+notificador = Notificador(
+    _buscar_cargas,
+    _montar_evento,
+    NOTIFICACOES_INTERVALO
+)
+
+
+@app.on_event("startup")
+async def iniciar_notificador():
+    app.state.notificador = asyncio.create_task(notificador.vigiar())
+
+
+@app.on_event("shutdown")
+async def parar_notificador():
+    app.state.notificador.cancel()
+
+
+# Tipos de resposta guardados no cache
+MEDIA_TYPES_CACHE = {"application/json", serializacao.ARROW_STREAM}
+
+# Cabeçalhos recalculados a cada resposta (não vão para o cache)
+CABECALHOS_FORA_DO_CACHE = {"content-length", "content-type"}
+
+
+@app.middleware("http")
+async def cache_de_respostas(request: Request, call_next):
+    """
+    Serve GETs de /api/assets do cache quando a resposta já foi calculada
+    na versão atual dos dados, e guarda as respostas 200 calculadas. O
+    formato pedido no Accept (JSON ou Arrow) faz parte da chave.
+    """
+    formato = serializacao.formato_listagem(request)
+    if (request.method != "GET"
+            or not request.url.path.startswith("/api/assets")
+            or request.url.path in ROTAS_SEM_CACHE
+            or formato is None):
+        return await call_next(request)
+
+    try:
+        versao = await run_db(versao_dados)
+    except Exception as e:
+        print(f"✗ Erro ao obter versão dos dados: {e}")
+        return await call_next(request)
+
+    chave = f"{formato}:{request.url.path}?{request.url.query}"
+    await run_in_threadpool(cache_respostas.sincronizar, versao)
+    armazenada = await run_in_threadpool(cache_respostas.obter, chave, versao)
+    if armazenada is not None:
+        corpo, media_type, cabecalhos = armazenada
+        return Response(
+            content=corpo,
+            media_type=media_type,
+            headers={**cabecalhos, "X-Cache": "HIT"}
+        )
+
+    resposta = await call_next(request)
+    media_type = resposta.headers.get("content-type")
+    if resposta.status_code != 200 or media_type not in MEDIA_TYPES_CACHE:
+        return resposta
+
+    corpo = b"".join([parte async for parte in resposta.body_iterator])
+    cabecalhos = {
+        nome: valor for nome, valor in resposta.headers.items()
+        if nome not in CABECALHOS_FORA_DO_CACHE
+    }
+    await run_in_threadpool(cache_respostas.guardar, chave, versao, corpo, media_type, cabecalhos)
+    return Response(
+        content=corpo,
+        status_code=resposta.status_code,
+        headers=dict(resposta.headers),
+        media_type=media_type
+    )
+
+
+# CORS - Permitir requisições do frontend. Registrado depois do cache para
+# ficar por fora dele: respostas servidas do cache também levam os
+# cabeçalhos de CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Em produção, especificar domínios permitidos
@@ -56,49 +222,207 @@ async def health_check():
     }
 
 
-@app.get("/api/assets", response_model=schemas.AssetListResponse)
+@app.get("/api/events")
+async def load_events(request: Request):
+    """
+    Avisos de carga de pregão concluída (Server-Sent Events)
+    
+    Cada evento `carga` traz a data do pregão, a quantidade de registros e
+    o resumo do dia, assim que a carga termina: não é preciso consultar
+    /api/assets/meta/dates de tempos em tempos. Ao reconectar com
+    `Last-Event-ID`, as cargas perdidas nesse meio tempo são reenviadas.
+    """
+    ultimo_evento = request.headers.get("last-event-id")
+    fila = notificador.inscrever()
+    
+    async def eventos():
+        try:
+            yield "retry: 5000\n\n"
+            enviado = 0
+            if ultimo_evento and ultimo_evento.isdigit():
+                for carga in await run_db(_cargas_depois, int(ultimo_evento)):
+                    evento_id, dados = await _montar_evento(carga)
+                    yield formatar_evento(evento_id, dados)
+                    enviado = evento_id
+            while not await request.is_disconnected():
+                try:
+                    evento_id, dados = await asyncio.wait_for(fila.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if evento_id > enviado:
+                    yield formatar_evento(evento_id, dados)
+                    enviado = evento_id
+        finally:
+            notificador.cancelar(fila)
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get(
+    "/api/assets",
+    response_model=schemas.AssetListResponse,
+    responses=RESPOSTA_ARROW
+)
 async def list_assets(
+    request: Request,
     q: Optional[str] = Query(None, description="Ticker para buscar (ex: PETR4)"),
+    match: str = Query("substring", pattern="^(exact|prefix|substring)$", description="Busca do ticker: exact, prefix ou substring"),
     data_inicio: Optional[date] = Query(None, alias="from", description="Data inicial (formato: YYYY-MM-DD)"),
     data_fim: Optional[date] = Query(None, alias="to", description="Data final (formato: YYYY-MM-DD)"),
     page: int = Query(0, ge=0, description="Número da página (começa em 0)"),
     size: int = Query(30, ge=1, le=100, description="Quantidade de registros por página"),
+    cursor: Optional[str] = Query(None, description="Cursor next/prev de uma resposta anterior (substitui page)"),
+    include_total: Optional[bool] = Query(None, description="Incluir o total de registros (default: sim por página, não por cursor)"),
     db: Session = Depends(get_db)
 ):
     """
     Lista ativos com filtros e paginação
     
-    - **q**: Ticker para filtrar (busca parcial, case-insensitive)
+    - **q**: Ticker para filtrar (case-insensitive)
+    - **match**: Como `q` casa com o ticker: exato, prefixo ou trecho
+      (default); resolvido no índice em memória dos tickers
     - **from**: Data inicial do período
     - **to**: Data final do período
     - **page**: Número da página (começa em 0)
     - **size**: Quantidade de registros por página (máximo 100)
-    """
-    skip = page * size
+    - **cursor**: Token `next`/`prev` de uma resposta anterior; a página é
+      buscada por seek em (data_pregao, ticker, id), com custo constante
+    - **include_total**: Calcular o total de registros do filtro
     
+    As linhas são serializadas direto para JSON (ver serializacao), no
+    formato de AssetListResponse. Com `Accept: application/vnd.apache.arrow.stream`
+    o conteúdo vem em Arrow IPC e os demais campos nos cabeçalhos
+    (X-Total, X-Page, X-Size, X-Total-Pages, X-Next, X-Prev).
+    """
     try:
-        assets, total = crud.get_assets(
+        if cursor:
+            # Paginação por cursor: total só quando pedido
+            assets, proxima, anterior = await run_db(
+                crud.get_assets_keyset,
+                db=db,
+                ticker=q,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                cursor=cursor,
+                limit=size,
+                match=match
+            )
+            total = None
+            if include_total:
+                total = await run_db(crud.count_assets, db, q, data_inicio, data_fim, match)
+            
+            return serializacao.resposta_listagem(request, {
+                "content": assets,
+                "total": total,
+                "page": None,
+                "size": size,
+                "total_pages": math.ceil(total / size) if total else total,
+                "next": proxima,
+                "prev": anterior
+            }, "content")
+        
+        if page == 0 and include_total is False:
+            # Primeira página sem total: já por seek
+            assets, proxima, anterior = await run_db(
+                crud.get_assets_keyset,
+                db=db,
+                ticker=q,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                limit=size,
+                match=match
+            )
+            return serializacao.resposta_listagem(request, {
+                "content": assets,
+                "total": None,
+                "page": 0,
+                "size": size,
+                "total_pages": None,
+                "next": proxima,
+                "prev": None
+            }, "content")
+        
+        skip = page * size
+        assets, total = await run_db(
+            crud.get_assets,
             db=db,
             ticker=q,
             data_inicio=data_inicio,
             data_fim=data_fim,
             skip=skip,
-            limit=size
+            limit=size,
+            match=match
         )
         
         total_pages = math.ceil(total / size) if total > 0 else 0
         
-        return {
+        return serializacao.resposta_listagem(request, {
             "content": assets,
             "total": total,
             "page": page,
             "size": size,
-            "total_pages": total_pages
-        }
+            "total_pages": total_pages,
+            "next": crud.encode_cursor(assets[-1], "n") if assets and skip + len(assets) < total else None,
+            "prev": crud.encode_cursor(assets[0], "p") if assets and page > 0 else None
+        }, "content")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar ativos: {str(e)}")
 
 
+@app.get("/api/assets/export")
+async def export_assets(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$", description="Formato do arquivo: csv, ndjson ou parquet"),
+    q: Optional[str] = Query(None, description="Ticker para buscar (ex: PETR4)"),
+    match: str = Query("substring", pattern="^(exact|prefix|substring)$", description="Busca do ticker: exact, prefix ou substring"),
+    data_inicio: Optional[date] = Query(None, alias="from", description="Data inicial (formato: YYYY-MM-DD)"),
+    data_fim: Optional[date] = Query(None, alias="to", description="Data final (formato: YYYY-MM-DD)")
+):
+    """
+    Exporta os ativos do filtro em uma única requisição, em streaming
+    
+    - **format**: csv (default), ndjson ou parquet (requer pyarrow)
+    - **q**, **match**, **from**, **to**: Mesmos filtros de /api/assets
+    
+    As linhas são lidas em lotes e enviadas à medida que chegam, em ordem
+    (ticker, data_pregao): a memória usada não depende do tamanho do
+    intervalo. Cada exportação ocupa uma conexão enquanto dura; além de
+    MAX_EXPORTACOES simultâneas, as seguintes esperam a vez.
+    """
+    if not exportacao.formato_disponivel(format):
+        raise HTTPException(status_code=400, detail=f"Formato {format} indisponível no servidor")
+    exportar, media_type, extensao = exportacao.FORMATOS[format]
+    
+    async def conteudo():
+        async with exportacoes:
+            # Sessão própria: vive enquanto o streaming durar. Cada lote é
+            # lido e convertido no executor do banco, como as demais rotas
+            db = SessionLocal()
+            partes = exportar(crud.stream_assets(db, q, data_inicio, data_fim, match))
+            try:
+                while True:
+                    parte = await run_db(next, partes, None)
+                    if parte is None:
+                        break
+                    yield parte
+            finally:
+                await run_db(_encerrar_exportacao, partes, db)
+    
+    return StreamingResponse(
+        conteudo(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="dados-pregao.{extensao}"'}
+    )
+
+
 @app.get("/api/assets/{asset_id}", response_model=schemas.Asset)
 async def get_asset(
     asset_id: int,
@@ -109,7 +433,7 @@ async def get_asset(
     
     - **asset_id**: ID do ativo no banco de dados
     """
-    asset = crud.get_asset_by_id(db, asset_id)
+    asset = await run_db(crud.get_asset_by_id, db, asset_id)
     if not asset:
         raise HTTPException(
             status_code=404,
@@ -124,7 +448,7 @@ async def get_tickers(db: Session = Depends(get_db)):
     Lista todos os tickers disponíveis no banco
     """
     try:
-        tickers = crud.get_available_tickers(db)
+        tickers = await run_db(crud.get_available_tickers, db)
         return {
             "tickers": [t[0] for t in tickers],
             "total": len(tickers)
@@ -133,6 +457,31 @@ async def get_tickers(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erro ao buscar tickers: {str(e)}")
 
 
+@app.get("/api/assets/meta/tickers/suggest")
+async def suggest_tickers(
+    prefix: str = Query("", max_length=20, description="Início do ticker (case-insensitive)"),
+    k: int = Query(10, ge=1, le=50, description="Quantidade máxima de sugestões"),
+    rank: str = Query("alpha", pattern="^(alpha|volume)$", description="Ordem das sugestões: alpha ou volume"),
+    db: Session = Depends(get_db)
+):
+    """
+    Sugestões de ticker para autocomplete, resolvidas em memória
+    
+    - **prefix**: Início do ticker (ex: PETR)
+    - **k**: Quantidade máxima de sugestões (máximo 50)
+    - **rank**: alpha (ordem alfabética, default) ou volume (maior volume
+      nos últimos pregões primeiro)
+    
+    O índice dos tickers é montado uma vez por versão dos dados; as
+    chamadas seguintes não vão ao banco.
+    """
+    try:
+        tickers = await run_db(crud.suggest_tickers, db, prefix, k, rank == "volume")
+        return {"prefix": prefix.strip().upper(), "tickers": tickers}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao sugerir tickers: {str(e)}")
+
+
 @app.get("/api/assets/meta/dates")
 async def get_dates(
     limit: int = Query(30, ge=1, le=365, description="Quantidade de datas a retornar"),
@@ -144,7 +493,7 @@ async def get_dates(
     - **limit**: Quantidade de datas a retornar (máximo 365)
     """
     try:
-        dates = crud.get_available_dates(db, limit)
+        dates = await run_db(crud.get_available_dates, db, limit)
         return {
             "dates": [d[0].isoformat() for d in dates],
             "total": len(dates)
@@ -153,31 +502,89 @@ async def get_dates(
         raise HTTPException(status_code=500, detail=f"Erro ao buscar datas: {str(e)}")
 
 
-@app.get("/api/assets/ticker/{ticker}")
+@app.get("/api/assets/ticker/{ticker}", responses=RESPOSTA_ARROW)
 async def get_assets_by_ticker(
+    request: Request,
     ticker: str,
     limit: int = Query(30, ge=1, le=365, description="Quantidade de registros"),
+    max_points: Optional[int] = Query(None, ge=5, le=5000, description="Reduzir o período inteiro a até N pontos preservando o desenho da série"),
+    data_inicio: Optional[date] = Query(None, alias="from", description="Data inicial (formato: YYYY-MM-DD)"),
+    data_fim: Optional[date] = Query(None, alias="to", description="Data final (formato: YYYY-MM-DD)"),
     db: Session = Depends(get_db)
 ):
     """
     Busca histórico de um ticker específico
     
     - **ticker**: Código do ticker (ex: PETR4)
-    - **limit**: Quantidade de registros a retornar
+    - **limit**: Quantidade de registros a retornar, dos mais recentes
+      (máximo 365)
+    - **max_points**: No lugar de `limit`, lê o histórico inteiro (ou o
+      período de from/to) e o reduz a até N pregões por LTTB
+      (Largest-Triangle-Three-Buckets) do fechamento; mínimo e máximo do
+      período são mantidos
+    - **from**: Data inicial do período
+    - **to**: Data final do período
+    
+    Com `Accept: application/vnd.apache.arrow.stream` os registros vêm em
+    Arrow IPC (ticker e total nos cabeçalhos X-Ticker e X-Total).
     """
     try:
-        assets = crud.get_assets_by_ticker(db, ticker, limit)
+        assets = await run_db(
+            crud.get_assets_by_ticker, db, ticker, limit, max_points, data_inicio, data_fim
+        )
         if not assets:
             raise HTTPException(
                 status_code=404,
                 detail=f"Nenhum registro encontrado para o ticker {ticker}"
             )
-        return {
+        return serializacao.resposta_listagem(request, {
             "ticker": ticker,
             "data": assets,
             "total": len(assets)
-        }
+        }, "data")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar ticker: {str(e)}")
+
+
+@app.get("/api/assets/ticker/{ticker}/candles", response_model=schemas.CandleListResponse)
+async def get_candles(
+    ticker: str,
+    resolution: str = Query("day", pattern="^(day|week|month|quarter)$", description="Resolução: day, week, month ou quarter"),
+    data_inicio: Optional[date] = Query(None, alias="from", description="Data inicial (formato: YYYY-MM-DD)"),
+    data_fim: Optional[date] = Query(None, alias="to", description="Data final (formato: YYYY-MM-DD)"),
+    max_points: Optional[int] = Query(None, ge=5, le=5000, description="Reduzir a até N candles preservando o desenho da série"),
+    db: Session = Depends(get_db)
+):
+    """
+    Candles OHLC-V de um ticker agregados no servidor
+    
+    - **ticker**: Código do ticker (ex: PETR4)
+    - **resolution**: day, week (começa na segunda), month ou quarter
+    - **from**: Data inicial do período
+    - **to**: Data final do período
+    - **max_points**: Reduz a até N candles por LTTB do fechamento
+    
+    Um gráfico de vários anos fica com algumas centenas de pontos em
+    week/month. Candles de períodos fechados ficam em cache no worker.
+    """
+    try:
+        candles = await run_db(
+            crud.get_candles, db, ticker, resolution, data_inicio, data_fim, max_points
+        )
+        if not candles:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Nenhum registro encontrado para o ticker {ticker}"
+            )
+        return serializacao.resposta_json({
+            "ticker": ticker.upper(),
+            "resolution": resolution,
+            "candles": candles,
+            "total": len(candles)
+        })
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar ticker: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar candles: {str(e)}")
@@ -1,7 +1,7 @@
 """
 Models SQLAlchemy para a tabela DadosPregao
 """
-from sqlalchemy import Column, Integer, String, Float, Date, BigInteger, DateTime, Index
+from sqlalchemy import Column, Integer, String, Float, Date, BigInteger, DateTime, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -33,4 +33,22 @@ class Asset(Base):
     )
     
     def __repr__(self):
-        return f"<Asset(ticker='{self.ticker}', data='{self.data_pregao}', preco={self.preco_ultimo})>"
\ No newline at end of file
+        return f"<Asset(ticker='{self.ticker}', data='{self.data_pregao}', preco={self.preco_ultimo})>"
+
+class CargaPregao(Base):
+    """
+    Model para a tabela CargaPregao
+    Uma linha por carga de pregão concluída (gravada pela Azure Function
+    CargaPregaoXml depois de inserir os registros do dia). A tabela é
+    criada só aqui (create_all); concluida_em tem default no banco para
+    INSERTs que não a informam.
+    """
+    __tablename__ = "CargaPregao"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data_pregao = Column(Date, nullable=False)
+    registros = Column(Integer, nullable=False)
+    concluida_em = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    
+    def __repr__(self):
+        return f"<CargaPregao(data='{self.data_pregao}', registros={self.registros})>"
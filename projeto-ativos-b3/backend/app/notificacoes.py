@@ -0,0 +1,86 @@
+"""
+Avisos de carga de pregão concluída para clientes conectados (SSE)
+
+Um único laço por worker acompanha dbo.CargaPregao e repassa cada carga
+nova a todos os inscritos, no lugar de cada cliente consultar as datas
+disponíveis de tempos em tempos.
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, List, Optional, Set
+
+# Eventos guardados por cliente lento antes de descartar os mais antigos
+MAX_FILA = 16
+
+
+class Notificador:
+    """
+    Consulta as cargas a cada `intervalo` segundos (uma consulta pela
+    chave primária de uma tabela pequena, qualquer que seja o número de
+    inscritos) e publica um evento por carga nova.
+
+    `buscar(ultimo_id)` retorna as cargas com id maior que ultimo_id, em
+    ordem; com None, só a mais recente (marca o ponto de partida, sem
+    publicar). `montar(carga)` transforma uma carga no evento (id, dados).
+    """
+
+    def __init__(
+        self,
+        buscar: Callable[[Optional[int]], Awaitable[List]],
+        montar: Callable[[object], Awaitable[tuple]],
+        intervalo: float = 15.0
+    ):
+        self.buscar = buscar
+        self.montar = montar
+        self.intervalo = intervalo
+        self.ultimo_id: Optional[int] = None
+        self._filas: Set[asyncio.Queue] = set()
+
+    # --------------------------------------------------
+    # INSCRITOS
+    # --------------------------------------------------
+    def inscrever(self) -> asyncio.Queue:
+        fila = asyncio.Queue(maxsize=MAX_FILA)
+        self._filas.add(fila)
+        return fila
+
+    def cancelar(self, fila: asyncio.Queue):
+        self._filas.discard(fila)
+
+    def publicar(self, evento: tuple):
+        for fila in self._filas:
+            if fila.full():
+                fila.get_nowait()
+            fila.put_nowait(evento)
+
+    # --------------------------------------------------
+    # LAÇO DE CONSULTA
+    # --------------------------------------------------
+    async def vigiar(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await self.verificar()
+            except Exception as e:
+                print(f"✗ Erro ao verificar cargas de pregão: {e}")
+
+    async def verificar(self):
+        """
+        Uma consulta às cargas; publica as novas desde a última vista
+        (só monta o evento se houver inscritos).
+        """
+        cargas = await self.buscar(self.ultimo_id)
+        if self.ultimo_id is None:
+            self.ultimo_id = cargas[-1].id if cargas else 0
+            return
+        for carga in cargas:
+            if self._filas:
+                self.publicar(await self.montar(carga))
+            self.ultimo_id = carga.id
+
+
+def formatar_evento(evento_id: int, dados: dict, tipo: str = "carga") -> str:
+    """
+    Evento no formato text/event-stream
+    """
+    return f"id: {evento_id}\nevent: {tipo}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
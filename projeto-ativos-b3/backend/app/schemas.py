@@ -3,7 +3,7 @@ Schemas Pydantic para validação e serialização de dados
 """
 from pydantic import BaseModel, Field
 from datetime import date
-from typing import List
+from typing import List, Optional
 
 
 class AssetBase(BaseModel):
@@ -42,10 +42,12 @@ class Asset(AssetBase):
 class AssetListResponse(BaseModel):
     """Schema para resposta paginada de assets"""
     content: List[Asset] = Field(..., description="Lista de ativos")
-    total: int = Field(..., description="Total de registros", ge=0)
-    page: int = Field(..., description="Página atual", ge=0)
+    total: Optional[int] = Field(None, description="Total de registros (omitido na paginação por cursor, a menos que include_total=true)", ge=0)
+    page: Optional[int] = Field(None, description="Página atual (omitida na paginação por cursor)", ge=0)
     size: int = Field(..., description="Tamanho da página", ge=1)
-    total_pages: int = Field(..., description="Total de páginas", ge=0)
+    total_pages: Optional[int] = Field(None, description="Total de páginas", ge=0)
+    next: Optional[str] = Field(None, description="Cursor da próxima página")
+    prev: Optional[str] = Field(None, description="Cursor da página anterior")
     
     class Config:
         json_schema_extra = {
@@ -66,6 +68,48 @@ class AssetListResponse(BaseModel):
                 "total": 150,
                 "page": 0,
                 "size": 30,
-                "total_pages": 5
+                "total_pages": 5,
+                "next": "WyJuIiwgIjIwMjQtMTEtMTgiLCAiUEVUUjQiLCAxXQ",
+                "prev": None
             }
-        }
\ No newline at end of file
+        }
+
+class Candle(BaseModel):
+    """Schema para um candle OHLC-V de um período"""
+    inicio: date = Field(..., description="Primeiro dia do período")
+    fim: date = Field(..., description="Último pregão do período")
+    preco_abertura: float = Field(..., description="Abertura do primeiro pregão", ge=0)
+    preco_max: float = Field(..., description="Máxima do período", ge=0)
+    preco_min: float = Field(..., description="Mínima do período", ge=0)
+    preco_ultimo: float = Field(..., description="Fechamento do último pregão", ge=0)
+    quantidade_negociada: int = Field(..., description="Quantidade negociada no período", ge=0)
+    pregoes: int = Field(..., description="Pregões no período", ge=1)
+
+
+class CandleListResponse(BaseModel):
+    """Schema para os candles de um ticker"""
+    ticker: str = Field(..., description="Código do ticker")
+    resolution: str = Field(..., description="Resolução: day, week, month ou quarter")
+    candles: List[Candle] = Field(..., description="Candles em ordem de data")
+    total: int = Field(..., description="Quantidade de candles", ge=0)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ticker": "PETR4",
+                "resolution": "week",
+                "candles": [
+                    {
+                        "inicio": "2024-11-18",
+                        "fim": "2024-11-22",
+                        "preco_abertura": 42.50,
+                        "preco_max": 44.10,
+                        "preco_min": 41.80,
+                        "preco_ultimo": 43.90,
+                        "quantidade_negociada": 75000000,
+                        "pregoes": 5
+                    }
+                ],
+                "total": 1
+            }
+        }
@@ -0,0 +1,173 @@
+"""
+Serialização direta das linhas do banco para JSON
+
+As listagens selecionam só as colunas de schemas.Asset (crud.COLUNAS_ASSET)
+e as linhas viram JSON aqui, sem objetos ORM nem validação Pydantic por
+linha: os dados vêm do banco e já respeitam o schema. O formato é o mesmo
+que o FastAPI geraria com o response_model.
+
+Clientes de análise podem pedir as mesmas linhas em Arrow IPC (Accept:
+application/vnd.apache.arrow.stream): as colunas viram arrays Arrow direto
+das tuplas, sem dicionário por linha, e o cliente lê sem cópia.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional
+
+from fastapi import HTTPException, Request, Response
+
+try:
+    import pyarrow as pa
+except ImportError:  # sem pyarrow, pedidos só de Arrow recebem 406
+    pa = None
+
+# Media type do formato de streaming IPC do Arrow
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Campos de schemas.Asset, na ordem em que o Pydantic os serializa
+CAMPOS_ASSET = (
+    "ticker",
+    "data_pregao",
+    "preco_abertura",
+    "preco_min",
+    "preco_max",
+    "preco_medio",
+    "preco_ultimo",
+    "quantidade_negociada",
+    "id",
+)
+
+if pa is not None:
+    # Tipos Arrow dos campos de CAMPOS_ASSET
+    SCHEMA_ASSET = pa.schema([
+        ("ticker", pa.string()),
+        ("data_pregao", pa.date32()),
+        ("preco_abertura", pa.float64()),
+        ("preco_min", pa.float64()),
+        ("preco_max", pa.float64()),
+        ("preco_medio", pa.float64()),
+        ("preco_ultimo", pa.float64()),
+        ("quantidade_negociada", pa.int64()),
+        ("id", pa.int64()),
+    ])
+
+
+def _converter(valor: Any):
+    # Tipos do driver que o json não conhece
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def assets(rows: Iterable) -> List[dict]:
+    """
+    Linhas (na ordem de CAMPOS_ASSET) como dicionários de schemas.Asset
+    """
+    return [dict(zip(CAMPOS_ASSET, row)) for row in rows]
+
+
+def json_bytes(dados: Any) -> bytes:
+    """
+    JSON compacto em UTF-8, como o JSONResponse do FastAPI
+    """
+    return json.dumps(
+        dados,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_converter
+    ).encode("utf-8")
+
+
+def resposta_json(dados: Any, headers: dict = None) -> Response:
+    """
+    Resposta já serializada; o FastAPI não revalida um Response contra o
+    response_model, que continua valendo para o OpenAPI
+    """
+    return Response(content=json_bytes(dados), media_type="application/json", headers=headers)
+
+
+def aceita_arrow(request: Request) -> bool:
+    """
+    Indica se o cliente pediu Arrow IPC no Accept
+    """
+    return ARROW_STREAM in request.headers.get("accept", "")
+
+
+def aceita_json(request: Request) -> bool:
+    """
+    Indica se o Accept admite JSON (sem Accept, qualquer formato serve)
+    """
+    accept = request.headers.get("accept", "")
+    return not accept or any(
+        tipo in accept for tipo in ("application/json", "application/*", "*/*")
+    )
+
+
+def formato_listagem(request: Request) -> Optional[str]:
+    """
+    Formato de uma listagem para o Accept: "arrow", "json" ou None se só
+    Arrow foi aceito e o pyarrow não está instalado
+    """
+    if aceita_arrow(request):
+        if pa is not None:
+            return "arrow"
+        if not aceita_json(request):
+            return None
+    return "json"
+
+
+def tabela_arrow(rows: List) -> "pa.Table":
+    """
+    Linhas (na ordem de CAMPOS_ASSET) como tabela Arrow, coluna a coluna
+    """
+    colunas = list(zip(*rows)) or [()] * len(SCHEMA_ASSET)
+    return pa.Table.from_arrays(
+        [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, SCHEMA_ASSET)],
+        schema=SCHEMA_ASSET
+    )
+
+
+def resposta_arrow(rows: List, metadados: dict) -> Response:
+    """
+    Linhas em Arrow IPC (stream). Os demais campos da resposta JSON
+    (total, next, prev...) vão nos cabeçalhos X-Total, X-Next etc.
+    """
+    tabela = tabela_arrow(rows)
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    headers = {
+        "X-" + chave.replace("_", "-").title(): str(valor)
+        for chave, valor in metadados.items()
+        if valor is not None
+    }
+    headers["Vary"] = "Accept"
+    return Response(
+        content=saida.getvalue().to_pybytes(),
+        media_type=ARROW_STREAM,
+        headers=headers
+    )
+
+
+def resposta_listagem(request: Request, dados: dict, campo: str) -> Response:
+    """
+    Resposta de uma listagem cujas linhas estão em dados[campo]: JSON, ou
+    Arrow IPC se o cliente pediu. O formato depende do Accept (Vary: Accept
+    nos dois casos); se só Arrow foi aceito e o pyarrow não está instalado,
+    406.
+    """
+    rows = dados[campo]
+    formato = formato_listagem(request)
+    if formato is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"{ARROW_STREAM} indisponível no servidor; use application/json"
+        )
+    if formato == "arrow":
+        metadados = {chave: valor for chave, valor in dados.items() if chave != campo}
+        return resposta_arrow(rows, metadados)
+    return resposta_json({**dados, campo: assets(rows)}, headers={"Vary": "Accept"})
@@ -0,0 +1,88 @@
+"""
+Índice em memória dos tickers distintos de DadosPregao
+"""
+import bisect
+import heapq
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Modos de busca de ticker aceitos
+MODOS_BUSCA = ("exact", "prefix", "substring")
+
+
+class IndiceTickers:
+    """
+    Lista ordenada dos tickers distintos, recarregada quando a versão dos
+    dados muda. Resolve uma busca (exata, por prefixo ou por trecho) na
+    lista de tickers que ela casa, para o filtro virar um IN exato que usa
+    o índice (ticker, data_pregao) em vez de um LIKE '%...%'.
+    """
+
+    def __init__(self):
+        self._tickers: List[str] = []
+        self._conjunto = frozenset()
+        self._volumes: Dict[str, int] = {}
+        self.versao: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def carregar(
+        self,
+        tickers: Iterable[str],
+        versao: str,
+        volumes: Optional[Dict[str, int]] = None
+    ):
+        """
+        Troca a lista de tickers; `volumes` (ticker -> volume recente) é
+        usado para ordenar as sugestões por volume.
+        """
+        ordenados = sorted({t.upper() for t in tickers})
+        volumes = {t.upper(): int(v or 0) for t, v in (volumes or {}).items()}
+        with self._lock:
+            self._tickers = ordenados
+            self._conjunto = frozenset(ordenados)
+            self._volumes = volumes
+            self.versao = versao
+
+    @property
+    def tickers(self) -> List[str]:
+        return self._tickers
+
+    def buscar(self, termo: str, modo: str = "substring") -> List[str]:
+        """
+        Tickers que casam com o termo (case-insensitive), em ordem.
+        """
+        termo = termo.strip().upper()
+        tickers = self._tickers
+        if not termo:
+            return list(tickers)
+        if modo == "exact":
+            return [termo] if termo in self._conjunto else []
+        if modo == "prefix":
+            inicio, fim = self._faixa(tickers, termo)
+            return tickers[inicio:fim]
+        return [t for t in tickers if termo in t]
+
+    def sugerir(self, prefixo: str, k: int = 10, por_volume: bool = False) -> List[str]:
+        """
+        Até k tickers que começam com o prefixo: os primeiros em ordem
+        alfabética ou, com por_volume, os de maior volume recente (empate
+        em ordem alfabética). Só a faixa do prefixo é percorrida.
+        """
+        prefixo = prefixo.strip().upper()
+        tickers = self._tickers
+        inicio, fim = self._faixa(tickers, prefixo)
+        if not por_volume:
+            return tickers[inicio:min(fim, inicio + k)]
+        volumes = self._volumes
+        return heapq.nsmallest(
+            k,
+            (tickers[i] for i in range(inicio, fim)),
+            key=lambda t: (-volumes.get(t, 0), t)
+        )
+
+    @staticmethod
+    def _faixa(tickers: List[str], prefixo: str):
+        # Posições [inicio, fim) dos tickers com o prefixo na lista ordenada
+        inicio = bisect.bisect_left(tickers, prefixo)
+        fim = bisect.bisect_left(tickers, prefixo + "￿", inicio)
+        return inicio, fim
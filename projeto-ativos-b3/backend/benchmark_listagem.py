@@ -0,0 +1,105 @@
+"""
+Benchmark da serialização das listagens de ativos
+
+Compara, por linha, o caminho antigo (objetos ORM + validação de
+schemas.AssetListResponse + jsonable_encoder, como o FastAPI faz com o
+response_model) com o caminho enxuto (colunas como tuplas + serializacao)
+em respostas de 100 e de alguns milhares de linhas.
+
+Usa um SQLite temporário, para medir só CPU da aplicação:
+
+    cd backend
+    python benchmark_listagem.py [repeticoes]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+_arquivo = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_arquivo}")
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas, serializacao
+
+TAMANHOS = (100, 5000)
+TICKERS = ["ABEV3", "BBAS3", "BBDC4", "ITUB4", "PETR4", "VALE3", "WEGE3", "MGLU3"]
+
+
+def popular(db, linhas):
+    inicio = date(2020, 1, 1)
+    registros = []
+    for i in range(linhas):
+        preco = 10 + (i % 97) * 0.37
+        registros.append(models.Asset(
+            ticker=TICKERS[i % len(TICKERS)],
+            data_pregao=inicio + timedelta(days=i // len(TICKERS)),
+            preco_abertura=preco,
+            preco_min=preco * 0.98,
+            preco_max=preco * 1.02,
+            preco_medio=preco,
+            preco_ultimo=preco * 1.01,
+            quantidade_negociada=1000 + i
+        ))
+    db.add_all(registros)
+    db.commit()
+
+
+def via_orm(Sessao, n):
+    with Sessao() as db:
+        assets = db.query(models.Asset).limit(n).all()
+        resposta = schemas.AssetListResponse.model_validate({
+            "content": assets, "total": n, "page": 0, "size": n, "total_pages": 1
+        })
+        conteudo = jsonable_encoder(resposta)
+        return json.dumps(conteudo, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def via_colunas(Sessao, n):
+    with Sessao() as db:
+        rows = db.query(*crud.COLUNAS_ASSET).limit(n).all()
+        return serializacao.json_bytes({
+            "content": serializacao.assets(rows),
+            "total": n,
+            "page": 0,
+            "size": n,
+            "total_pages": 1,
+            "next": None,
+            "prev": None
+        })
+
+
+def medir(funcao, Sessao, n, repeticoes):
+    funcao(Sessao, n)
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        funcao(Sessao, n)
+    return (time.process_time() - inicio) / repeticoes
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.create_all(bind=engine)
+    Sessao = sessionmaker(bind=engine)
+    with Sessao() as db:
+        if db.query(models.Asset.id).count() < max(TAMANHOS):
+            popular(db, max(TAMANHOS))
+
+    print(f"{'linhas':>8} {'ORM+Pydantic':>14} {'colunas':>10} {'µs/linha poupados':>18}")
+    for n in TAMANHOS:
+        orm = medir(via_orm, Sessao, n, repeticoes)
+        colunas = medir(via_colunas, Sessao, n, repeticoes)
+        print(
+            f"{n:>8} {orm * 1000:>12.2f}ms {colunas * 1000:>8.2f}ms "
+            f"{(orm - colunas) / n * 1e6:>18.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
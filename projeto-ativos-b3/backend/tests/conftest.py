@@ -0,0 +1,59 @@
+"""
+Configuração dos testes: a API usa um SQLite temporário, com as tabelas
+criadas pelos models, e o cache de respostas só em memória
+"""
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'ativos-b3.db')}"
+)
+os.environ.setdefault("CACHE_DISCO_MB", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import database, main, models  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    sessao = database.SessionLocal(info={"primario": True})
+    try:
+        yield sessao
+    finally:
+        sessao.query(models.Asset).delete()
+        sessao.query(models.CargaPregao).delete()
+        sessao.commit()
+        sessao.close()
+        database.expirar_versao_dados()
+        main.cache_respostas.memoria.limpar()
+
+
+@pytest.fixture
+def cliente():
+    return TestClient(main.app)
+
+
+def criar_assets(db, ticker, dias, inicio=date(2024, 1, 1)):
+    """
+    Grava `dias` pregões seguidos do ticker, com preço subindo 1 por dia
+    """
+    for i in range(dias):
+        preco = 10.0 + i
+        db.add(models.Asset(
+            ticker=ticker,
+            data_pregao=inicio + timedelta(days=i),
+            preco_abertura=preco,
+            preco_min=preco - 1,
+            preco_max=preco + 1,
+            preco_medio=preco,
+            preco_ultimo=preco,
+            quantidade_negociada=100 + i
+        ))
+    db.commit()
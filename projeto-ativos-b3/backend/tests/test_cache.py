@@ -0,0 +1,58 @@
+"""
+Testes do cache de respostas em memória e disco (app.cache)
+"""
+import os
+import sqlite3
+
+from app.cache import CacheDisco, CacheRespostas
+
+
+def test_disco_so_vale_na_mesma_versao(tmp_path):
+    disco = CacheDisco(os.path.join(tmp_path, "cache.db"), 1024 * 1024)
+    disco.guardar("/api/assets?", "2024-01-02/10", b"[1]", "application/json", {"vary": "Accept"})
+
+    assert disco.obter("/api/assets?", "2024-01-02/10") == (
+        b"[1]", "application/json", {"vary": "Accept"}
+    )
+    assert disco.obter("/api/assets?", "2024-01-03/10") is None
+
+    disco.invalidar("2024-01-03/10")
+    assert disco.obter("/api/assets?", "2024-01-02/10") is None
+
+
+def test_disco_compartilhado_entre_workers(tmp_path):
+    caminho = os.path.join(tmp_path, "cache.db")
+    CacheRespostas(1024, caminho, 1024 * 1024).guardar(
+        "/api/assets?", "v1", b"[1]", "application/json", {}
+    )
+    novo_worker = CacheRespostas(1024, caminho, 1024 * 1024)
+    assert novo_worker.obter("/api/assets?", "v1") == (b"[1]", "application/json", {})
+    assert novo_worker.memoria.obter("/api/assets?") == ("v1", b"[1]", "application/json", {})
+
+
+def test_disco_remove_as_menos_acessadas(tmp_path):
+    disco = CacheDisco(os.path.join(tmp_path, "cache.db"), 250)
+    for i in range(3):
+        disco.guardar(f"/api/assets?page={i}", "v1", b"x" * 100, "application/json", {})
+
+    assert disco.obter("/api/assets?page=0", "v1") is None
+    assert disco.obter("/api/assets?page=2", "v1") is not None
+
+
+def test_disco_de_versao_anterior_ganha_coluna_de_cabecalhos(tmp_path):
+    caminho = os.path.join(tmp_path, "cache.db")
+    conn = sqlite3.connect(caminho)
+    conn.execute("""
+        CREATE TABLE respostas (
+            chave TEXT PRIMARY KEY, versao TEXT, mimetype TEXT NOT NULL,
+            corpo BLOB NOT NULL, tamanho INTEGER NOT NULL, acesso REAL NOT NULL
+        )
+    """)
+    conn.execute("INSERT INTO respostas VALUES ('/a', 'v1', 'application/json', X'5b315d', 3, 0)")
+    conn.commit()
+    conn.close()
+
+    disco = CacheDisco(caminho, 1024 * 1024)
+    assert disco.obter("/a", "v1") == (b"[1]", "application/json", {})
+    disco.guardar("/b", "v1", b"[2]", "application/json", {"vary": "Accept"})
+    assert disco.obter("/b", "v1")[2] == {"vary": "Accept"}
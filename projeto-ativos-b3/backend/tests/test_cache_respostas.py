@@ -0,0 +1,55 @@
+"""
+Testes do cache de respostas de /api/assets (middleware cache_de_respostas)
+"""
+import pytest
+
+from app import serializacao
+from conftest import criar_assets
+
+ORIGEM = {"Origin": "https://frontend.exemplo"}
+
+
+def test_resposta_do_cache_tem_cabecalhos_de_cors(cliente, db):
+    criar_assets(db, "PETR4", 3)
+
+    primeira = cliente.get("/api/assets?page=0&size=10", headers=ORIGEM)
+    segunda = cliente.get("/api/assets?page=0&size=10", headers=ORIGEM)
+
+    assert primeira.status_code == segunda.status_code == 200
+    assert "x-cache" not in primeira.headers
+    assert segunda.headers["x-cache"] == "HIT"
+    assert segunda.content == primeira.content
+    for resposta in (primeira, segunda):
+        assert resposta.headers["access-control-allow-origin"] == "*"
+
+
+def test_json_e_arrow_ficam_em_entradas_separadas(cliente, db):
+    pa = pytest.importorskip("pyarrow")
+    criar_assets(db, "VALE3", 3)
+    url = "/api/assets/ticker/VALE3?limit=2"
+
+    for _ in range(2):
+        arrow = cliente.get(url, headers={"Accept": serializacao.ARROW_STREAM})
+        json = cliente.get(url)
+
+        assert arrow.headers["content-type"] == serializacao.ARROW_STREAM
+        assert arrow.headers["x-total"] == "2"
+        assert pa.ipc.open_stream(arrow.content).read_all().num_rows == 2
+        assert json.headers["content-type"] == "application/json"
+        assert json.json()["total"] == 2
+        for resposta in (arrow, json):
+            assert resposta.headers["vary"] == "Accept"
+
+    assert arrow.headers["x-cache"] == json.headers["x-cache"] == "HIT"
+
+
+def test_arrow_sem_pyarrow(cliente, db, monkeypatch):
+    monkeypatch.setattr(serializacao, "pa", None)
+    criar_assets(db, "VALE3", 3)
+    url = "/api/assets?q=VALE3"
+
+    com_json = {"Accept": f"{serializacao.ARROW_STREAM}, application/json;q=0.5"}
+    for _ in range(2):
+        assert cliente.get(url, headers=com_json).json()["total"] == 3
+        so_arrow = cliente.get(url, headers={"Accept": serializacao.ARROW_STREAM})
+        assert so_arrow.status_code == 406
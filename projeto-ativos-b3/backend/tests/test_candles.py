@@ -0,0 +1,131 @@
+"""
+Testes dos candles agregados no servidor (app.candles)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app import candles
+
+
+def pregoes(inicio, dias):
+    # (data_pregao, abertura, máxima, mínima, fechamento, volume), só dias úteis
+    linhas = []
+    dia = inicio
+    while len(linhas) < dias:
+        if dia.weekday() < 5:
+            preco = 10.0 + len(linhas)
+            linhas.append((dia, preco, preco + 1, preco - 1, preco + 0.5, 100))
+        dia += timedelta(days=1)
+    return linhas
+
+
+def test_cache_limitado_pelo_total_de_candles():
+    cache = candles.CacheCandles(max_candles=10)
+    cache.guardar("PETR4", "week", [{}] * 4, date(2024, 1, 1))
+    cache.guardar("VALE3", "week", [{}] * 4, date(2024, 1, 1))
+    cache.guardar("ITUB4", "week", [{}] * 4, date(2024, 1, 1))
+
+    assert cache.candles == 8
+    assert cache.obter("PETR4", "week") == ([], None)
+    assert cache.obter("ITUB4", "week")[1] == date(2024, 1, 1)
+
+    # Maior que o cache inteiro: não guarda
+    cache.guardar("BBAS3", "week", [{}] * 11, date(2024, 1, 1))
+    assert cache.obter("BBAS3", "week") == ([], None)
+
+
+def test_descartar_remove_periodos_fechados_com_a_data():
+    cache = candles.CacheCandles()
+    cache.guardar("PETR4", "month", [{}] * 2, date(2024, 3, 1))
+    cache.guardar("VALE3", "month", [{}] * 1, date(2024, 2, 1))
+
+    cache.descartar(date(2024, 2, 15))
+
+    assert cache.obter("PETR4", "month") == ([], None)
+    assert cache.obter("VALE3", "month")[1] == date(2024, 2, 1)
+    assert cache.candles == 1
+
+
+def test_day_nao_usa_cache():
+    cache = candles.CacheCandles()
+    linhas = pregoes(date(2024, 1, 1), 10)
+    pedidos = []
+
+    def buscar(desde):
+        pedidos.append(desde)
+        return linhas
+
+    resultado = candles.montar(cache, "PETR4", "day", linhas[-1][0], buscar)
+
+    assert len(resultado) == 10
+    assert pedidos == [None]
+    assert cache.candles == 0
+
+
+@pytest.mark.parametrize("resolucao, inicios, fins, pregoes_por_candle", [
+    # 2024-01-01 é segunda-feira; 23 dias úteis até 2024-01-31, 21 em fevereiro
+    ("week", ["2024-01-01", "2024-01-08"], ["2024-01-05", "2024-01-12"], [5, 5]),
+    ("month", ["2024-01-01", "2024-02-01", "2024-03-01"], ["2024-01-31", "2024-02-29", "2024-03-29"], [23, 21, 21]),
+    ("quarter", ["2024-01-01", "2024-04-01"], ["2024-03-29", "2024-04-30"], [65, 22]),
+])
+def test_agregar_limites_dos_periodos(resolucao, inicios, fins, pregoes_por_candle):
+    linhas = pregoes(date(2024, 1, 1), sum(pregoes_por_candle))
+
+    resultado, fins_exclusivos = candles.agregar(linhas, resolucao)
+
+    assert [c["inicio"] for c in resultado] == inicios
+    assert [c["fim"] for c in resultado] == fins
+    assert [c["pregoes"] for c in resultado] == pregoes_por_candle
+    assert len(fins_exclusivos) == len(resultado)
+
+
+def test_agregar_ohlcv():
+    linhas = pregoes(date(2024, 1, 1), 10)
+
+    semana, _ = candles.agregar(linhas, "week")
+
+    primeira = semana[0]
+    assert primeira["preco_abertura"] == linhas[0][1]
+    assert primeira["preco_max"] == max(l[2] for l in linhas[:5])
+    assert primeira["preco_min"] == min(l[3] for l in linhas[:5])
+    assert primeira["preco_ultimo"] == linhas[4][4]
+    assert primeira["quantidade_negociada"] == 500
+
+
+def test_semana_comeca_na_segunda():
+    # Quarta 2024-01-03 e terça 2024-01-09: semanas diferentes
+    linhas = [
+        (date(2024, 1, 3), 1.0, 1.0, 1.0, 1.0, 1),
+        (date(2024, 1, 5), 1.0, 1.0, 1.0, 1.0, 1),
+        (date(2024, 1, 9), 1.0, 1.0, 1.0, 1.0, 1),
+    ]
+    resultado, fins = candles.agregar(linhas, "week")
+    assert [c["inicio"] for c in resultado] == ["2024-01-01", "2024-01-08"]
+    assert [str(f) for f in fins] == ["2024-01-08", "2024-01-15"]
+
+
+def test_montar_so_le_o_periodo_em_aberto():
+    cache = candles.CacheCandles()
+    linhas = pregoes(date(2024, 1, 1), 50)
+    pedidos = []
+
+    def buscar(desde):
+        pedidos.append(desde)
+        return [l for l in linhas if desde is None or l[0] >= desde]
+
+    ultima = linhas[-1][0]
+    primeira = candles.montar(cache, "PETR4", "month", ultima, buscar)
+    segunda = candles.montar(cache, "PETR4", "month", ultima, buscar)
+
+    assert segunda == primeira
+    assert [c["inicio"] for c in primeira] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    # Janeiro e fevereiro fecharam: a segunda leitura começa em março
+    assert pedidos == [None, date(2024, 3, 1)]
+
+    # Pregão novo no período em aberto: só ele muda
+    linhas.append((ultima + timedelta(days=3), 99.0, 100.0, 98.0, 99.5, 7))
+    terceira = candles.montar(cache, "PETR4", "month", linhas[-1][0], buscar)
+    assert terceira[:2] == primeira[:2]
+    assert terceira[2]["preco_ultimo"] == 99.5
+    assert terceira[2]["pregoes"] == primeira[2]["pregoes"] + 1
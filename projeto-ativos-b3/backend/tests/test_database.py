@@ -0,0 +1,25 @@
+"""
+Testes do roteamento de leituras e escritas (database.SessaoRoteada)
+"""
+from sqlalchemy import text
+
+from app import database, models
+
+
+def test_leituras_da_sessao_ficam_no_mesmo_banco(monkeypatch):
+    replica = object()
+    disponivel = iter([True, False, False])
+    monkeypatch.setattr(database, "engine_leitura", replica)
+    monkeypatch.setattr(database, "leitura_disponivel", lambda: next(disponivel))
+
+    sessao = database.SessionLocal()
+    consulta = text("SELECT 1")
+    assert sessao.get_bind(clause=consulta) is replica
+    # A réplica saiu de uso, mas a sessão continua nela
+    assert sessao.get_bind(clause=consulta) is replica
+    assert sessao.get_bind(clause=models.Asset.__table__.delete()) is database.engine
+
+    # Uma sessão nova escolhe de novo
+    sessao.close()
+    assert sessao.get_bind(clause=consulta) is database.engine
+    assert database.SessionLocal().get_bind(clause=consulta) is database.engine
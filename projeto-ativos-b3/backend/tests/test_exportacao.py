@@ -0,0 +1,30 @@
+"""
+Testes da exportação em massa (/api/assets/export)
+"""
+import threading
+
+from app import crud, main
+from conftest import criar_assets
+
+
+def test_exportacao_csv_le_os_lotes_no_executor_do_banco(cliente, db, monkeypatch):
+    criar_assets(db, "PETR4", 5)
+    criar_assets(db, "VALE3", 5)
+    threads = set()
+    stream_assets = crud.stream_assets
+
+    def stream_vigiado(*args, **kwargs):
+        for lote in stream_assets(*args, lote=3, **kwargs):
+            threads.add(threading.current_thread().name)
+            yield lote
+
+    monkeypatch.setattr(crud, "stream_assets", stream_vigiado)
+    resposta = cliente.get("/api/assets/export?format=csv&q=PETR4&match=exact")
+
+    linhas = resposta.text.strip().split("\n")
+    assert resposta.status_code == 200
+    assert linhas[0].startswith("ticker,data_pregao")
+    assert len(linhas) == 6
+    assert all(linha.startswith("PETR4,") for linha in linhas[1:])
+    assert threads and all(nome.startswith("db") for nome in threads)
+    assert not main.exportacoes.locked()
@@ -0,0 +1,36 @@
+"""
+Testes do histórico de um ticker (/api/assets/ticker/{ticker})
+"""
+from conftest import criar_assets
+
+
+def test_limit_limitado_a_365(cliente, db):
+    criar_assets(db, "PETR4", 3)
+    assert cliente.get("/api/assets/ticker/PETR4?limit=365").status_code == 200
+    assert cliente.get("/api/assets/ticker/PETR4?limit=366").status_code == 422
+
+
+def test_max_points_reduz_o_historico_inteiro(cliente, db):
+    criar_assets(db, "PETR4", 1000)
+
+    dados = cliente.get("/api/assets/ticker/PETR4?max_points=50").json()["data"]
+
+    assert len(dados) <= 50
+    datas = [item["data_pregao"] for item in dados]
+    assert datas == sorted(datas, reverse=True)
+    # Mais antigo e mais recente do histórico todo, não só dos 30 últimos
+    assert datas[-1] == "2024-01-01"
+    assert datas[0] == "2026-09-26"
+
+
+def test_max_points_no_periodo(cliente, db):
+    criar_assets(db, "PETR4", 100)
+
+    resposta = cliente.get(
+        "/api/assets/ticker/PETR4?max_points=10&from=2024-01-11&to=2024-02-09"
+    )
+
+    datas = [item["data_pregao"] for item in resposta.json()["data"]]
+    assert len(datas) <= 10
+    assert datas[0] == "2024-02-09"
+    assert datas[-1] == "2024-01-11"
@@ -0,0 +1,66 @@
+"""
+Testes da paginação por cursor (keyset) de /api/assets
+"""
+import base64
+import json
+
+import pytest
+
+from conftest import criar_assets
+
+
+@pytest.fixture
+def ativos(db):
+    for ticker in ("VALE3", "ITUB4", "PETR4"):
+        criar_assets(db, ticker, 4)
+
+
+def chaves(pagina):
+    return [(item["data_pregao"], item["ticker"]) for item in pagina["content"]]
+
+
+def test_next_percorre_tudo_na_ordem_e_prev_volta(cliente, ativos):
+    ordem = chaves(cliente.get("/api/assets?size=100").json())
+    assert ordem == sorted(ordem, key=lambda c: (-int(c[0].replace("-", "")), c[1]))
+
+    paginas = [cliente.get("/api/assets?size=5&include_total=false").json()]
+    assert paginas[0]["prev"] is None
+    while paginas[-1]["next"]:
+        paginas.append(cliente.get(f"/api/assets?size=5&cursor={paginas[-1]['next']}").json())
+
+    assert [len(p["content"]) for p in paginas] == [5, 5, 2]
+    assert sum((chaves(p) for p in paginas), []) == ordem
+
+    # prev da última página é a do meio; prev dela é a primeira
+    meio = cliente.get(f"/api/assets?size=5&cursor={paginas[2]['prev']}").json()
+    assert chaves(meio) == chaves(paginas[1])
+    assert meio["next"] and meio["prev"]
+    primeira = cliente.get(f"/api/assets?size=5&cursor={meio['prev']}").json()
+    assert chaves(primeira) == chaves(paginas[0])
+    assert primeira["prev"] is None
+
+
+def test_cursor_com_total(cliente, ativos):
+    primeira = cliente.get("/api/assets?size=5&include_total=false").json()
+    segunda = cliente.get(
+        f"/api/assets?size=5&cursor={primeira['next']}&include_total=true"
+    ).json()
+    assert segunda["total"] == 12
+    assert segunda["total_pages"] == 3
+
+
+def token(valor):
+    return base64.urlsafe_b64encode(json.dumps(valor).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "nao-e-base64!",
+    token(["x", "2024-01-01", "PETR4", 1]),
+    token(["n", "2024-13-01", "PETR4", 1]),
+    token(["n", "2024-01-01", "PETR4"]),
+    token({"n": 1}),
+])
+def test_cursor_invalido(cliente, ativos, cursor):
+    resposta = cliente.get(f"/api/assets?cursor={cursor}")
+    assert resposta.status_code == 400
+    assert "Cursor inválido" in resposta.json()["detail"]
@@ -0,0 +1,47 @@
+"""
+Testes da redução de séries (app.lttb)
+"""
+import numpy as np
+import pytest
+
+from app.lttb import lttb
+
+
+@pytest.fixture
+def serie():
+    gerador = np.random.default_rng(42)
+    y = np.cumsum(gerador.normal(size=2000))
+    return np.arange(2000), y
+
+
+@pytest.mark.parametrize("max_pontos", [5, 10, 50, 400])
+def test_quantidade_e_extremos(serie, max_pontos):
+    x, y = serie
+    indices = lttb(x, y, max_pontos)
+
+    assert len(indices) <= max_pontos
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert int(np.argmin(y)) in indices
+    assert int(np.argmax(y)) in indices
+
+
+def test_serie_curta_fica_inteira():
+    assert list(lttb([1, 2, 3], [5.0, 1.0, 3.0], 5)) == [0, 1, 2]
+
+
+def test_pico_isolado_e_mantido():
+    y = np.zeros(1000)
+    y[500] = 10.0
+    y[700] = -10.0
+    indices = lttb(np.arange(1000), y, 20)
+    assert 500 in indices and 700 in indices
+
+
+def test_x_irregular():
+    # Datas com buracos (fins de semana, feriados)
+    x = np.cumsum(np.where(np.arange(300) % 5 == 4, 3, 1))
+    y = np.sin(np.arange(300) / 10)
+    indices = lttb(x, y, 30)
+    assert len(indices) <= 30
+    assert indices[0] == 0 and indices[-1] == 299
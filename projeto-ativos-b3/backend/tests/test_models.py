@@ -0,0 +1,21 @@
+"""
+Testes das tabelas criadas pelos models
+"""
+from datetime import date
+
+from sqlalchemy import text
+
+from app import crud, models
+
+
+def test_carga_sem_concluida_em_recebe_a_hora_do_banco(db):
+    # Como o INSERT da Azure Function, só com as colunas de dados
+    db.execute(
+        text("INSERT INTO CargaPregao (data_pregao, registros) VALUES (:data, :registros)"),
+        {"data": date(2024, 1, 2), "registros": 420}
+    )
+    db.commit()
+
+    carga, = db.query(models.CargaPregao).all()
+    assert carga.concluida_em is not None
+    assert [c.id for c in crud.get_loads_after(db, 0)] == [carga.id]
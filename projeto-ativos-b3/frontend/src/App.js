@@ -11,7 +11,7 @@ import {
 import Filters from './components/Filters';
 import AssetTable from './components/AssetTable';
 import AssetChart from './components/AssetChart';
-import { fetchAssets, checkHealth } from './services/api';
+import { fetchAssets, checkHealth, subscribeToLoads } from './services/api';
 
 export default function App() {
   const [data, setData] = useState(null);
@@ -33,6 +33,16 @@ export default function App() {
     // eslint-disable-next-line
   }, [filters, page, rowsPerPage]);
 
+  // Recarregar quando um pregão novo termina de ser carregado
+  const [ultimaCarga, setUltimaCarga] = useState(null);
+
+  useEffect(() => subscribeToLoads(setUltimaCarga), []);
+
+  useEffect(() => {
+    if (ultimaCarga) loadData();
+    // eslint-disable-next-line
+  }, [ultimaCarga]);
+
   const loadData = async () => {
     setLoading(true);
     setError(null);
@@ -97,7 +107,7 @@ export default function App() {
         ) : (
           <Box display="grid" gap={3}>
             {data && data.content && data.content.length > 0 && (
-              <AssetChart data={data} />
+              <AssetChart data={data} filters={filters} />
             )}
             <AssetTable
               data={data}
@@ -1,5 +1,5 @@
-import React from 'react';
-import { Paper, Typography } from '@mui/material';
+import React, { useState, useEffect } from 'react';
+import { Box, Paper, Typography, ToggleButton, ToggleButtonGroup } from '@mui/material';
 import {
   LineChart,
   Line,
@@ -10,31 +10,89 @@ import {
   Legend,
   ResponsiveContainer
 } from 'recharts';
+import { fetchCandles } from '../services/api';
 
-export default function AssetChart({ data }) {
-  if (!data?.content || data.content.length === 0) {
-    return null;
-  }
+const RESOLUCOES = [
+  { valor: 'day', rotulo: 'Dia' },
+  { valor: 'week', rotulo: 'Semana' },
+  { valor: 'month', rotulo: 'Mês' },
+  { valor: 'quarter', rotulo: 'Trimestre' }
+];
+
+// Pontos desenhados no máximo (o servidor reduz a série por LTTB)
+const MAX_PONTOS = 400;
+
+const formatarData = (data, resolution) =>
+  new Date(data + 'T00:00:00').toLocaleDateString('pt-BR', resolution === 'day' || resolution === 'week'
+    ? { day: '2-digit', month: '2-digit' }
+    : { month: '2-digit', year: 'numeric' });
 
-  const chartData = data.content
-    .slice()
-    .reverse()
-    .map(item => ({
-      data: new Date(item.data_pregao + 'T00:00:00').toLocaleDateString('pt-BR', {
-        day: '2-digit',
-        month: '2-digit'
-      }),
+export default function AssetChart({ data, filters = {} }) {
+  const [resolution, setResolution] = useState('day');
+  const [candles, setCandles] = useState(null);
+  const { ticker, dataInicio, dataFim } = filters;
+
+  // Com um ticker filtrado, o gráfico usa os candles agregados no
+  // servidor (todo o período) em vez da página da tabela
+  useEffect(() => {
+    if (!ticker) {
+      setCandles(null);
+      return;
+    }
+    let cancelado = false;
+    fetchCandles(ticker, resolution, { dataInicio, dataFim, maxPoints: MAX_PONTOS })
+      .then(data => { if (!cancelado) setCandles(data); })
+      .catch(error => {
+        console.error('Erro ao carregar candles:', error);
+        if (!cancelado) setCandles(null);
+      });
+    return () => { cancelado = true; };
+  }, [ticker, dataInicio, dataFim, resolution]);
+
+  let chartData;
+  if (candles) {
+    chartData = candles.map(item => ({
+      data: formatarData(item.inicio, resolution),
       Abertura: item.preco_abertura,
       Fechamento: item.preco_ultimo,
       Mínimo: item.preco_min,
       Máximo: item.preco_max
     }));
+  } else {
+    if (!data?.content || data.content.length === 0) {
+      return null;
+    }
+    chartData = data.content
+      .slice()
+      .reverse()
+      .map(item => ({
+        data: formatarData(item.data_pregao, 'day'),
+        Abertura: item.preco_abertura,
+        Fechamento: item.preco_ultimo,
+        Mínimo: item.preco_min,
+        Máximo: item.preco_max
+      }));
+  }
 
   return (
     <Paper sx={{ p: 2, boxShadow: 2 }}>
-      <Typography variant="h6" gutterBottom sx={{ color: 'primary.main' }}>
-        📈 Evolução de Preços
-      </Typography>
+      <Box display="flex" justifyContent="space-between" alignItems="center">
+        <Typography variant="h6" gutterBottom sx={{ color: 'primary.main' }}>
+          📈 Evolução de Preços
+        </Typography>
+        {ticker && (
+          <ToggleButtonGroup
+            value={resolution}
+            exclusive
+            size="small"
+            onChange={(e, valor) => valor && setResolution(valor)}
+          >
+            {RESOLUCOES.map(({ valor, rotulo }) => (
+              <ToggleButton key={valor} value={valor}>{rotulo}</ToggleButton>
+            ))}
+          </ToggleButtonGroup>
+        )}
+      </Box>
       
       <ResponsiveContainer width="100%" height={350}>
         <LineChart data={chartData} margin={{ top: 5, right: 30, left: 20, bottom: 5 }}>
@@ -1,25 +1,33 @@
 import React, { useState, useEffect } from 'react';
 import { Box, TextField, Button, Autocomplete } from '@mui/material';
-import { fetchAvailableTickers } from '../services/api';
+import { fetchTickerSuggestions } from '../services/api';
+
+// Espera entre a digitação e a busca de sugestões (ms)
+const DEBOUNCE_SUGESTOES = 200;
 
 export default function Filters({ onFilter }) {
   const [tickers, setTickers] = useState([]);
   const [ticker, setTicker] = useState('');
   const [dataInicio, setDataInicio] = useState('');
   const [dataFim, setDataFim] = useState('');
+  const [prefixo, setPrefixo] = useState('');
 
+  // Sugestões do servidor para o que foi digitado, em vez da lista inteira
   useEffect(() => {
-    loadTickers();
-  }, []);
-
-  const loadTickers = async () => {
-    try {
-      const data = await fetchAvailableTickers();
-      setTickers(data);
-    } catch (error) {
-      console.error('Erro ao carregar tickers:', error);
-    }
-  };
+    let cancelado = false;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await fetchTickerSuggestions(prefixo);
+        if (!cancelado) setTickers(data);
+      } catch (error) {
+        console.error('Erro ao carregar tickers:', error);
+      }
+    }, DEBOUNCE_SUGESTOES);
+    return () => {
+      cancelado = true;
+      clearTimeout(timer);
+    };
+  }, [prefixo]);
 
   const handleSearch = () => {
     onFilter({
@@ -32,6 +40,7 @@ export default function Filters({ onFilter }) {
 
   const handleClear = () => {
     setTicker('');
+    setPrefixo('');
     setDataInicio('');
     setDataFim('');
     onFilter({});
@@ -43,7 +52,10 @@ export default function Filters({ onFilter }) {
         <Autocomplete
           value={ticker}
           onChange={(e, newValue) => setTicker(newValue || '')}
+          inputValue={prefixo}
+          onInputChange={(e, newInputValue) => setPrefixo(newInputValue)}
           options={tickers}
+          filterOptions={(options) => options}
           sx={{ minWidth: 200 }}
           renderInput={(params) => (
             <TextField {...params} label="Ticker" placeholder="Ex: PETR4" size="small" />
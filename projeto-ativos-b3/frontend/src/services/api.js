@@ -49,6 +49,23 @@ export const fetchAvailableTickers = async () => {
   return response.data.tickers || [];
 };
 
+export const fetchTickerSuggestions = async (prefix, k = 10, rank = 'volume') => {
+  const response = await api.get('/api/assets/meta/tickers/suggest', {
+    params: { prefix, k, rank }
+  });
+  return response.data.tickers || [];
+};
+
+export const fetchCandles = async (ticker, resolution = 'day', filters = {}) => {
+  const params = { resolution };
+  if (filters.dataInicio) params.from = filters.dataInicio;
+  if (filters.dataFim) params.to = filters.dataFim;
+  if (filters.maxPoints) params.max_points = filters.maxPoints;
+  
+  const response = await api.get(`/api/assets/ticker/${ticker}/candles`, { params });
+  return response.data.candles || [];
+};
+
 export const fetchAvailableDates = async (limit = 30) => {
   const response = await api.get('/api/assets/meta/dates', {
     params: { limit }
@@ -56,6 +73,15 @@ export const fetchAvailableDates = async (limit = 30) => {
   return response.data.dates || [];
 };
 
+// Avisos de carga de pregão concluída (Server-Sent Events); retorna a
+// função que encerra a conexão. O EventSource reconecta sozinho e recebe
+// as cargas perdidas.
+export const subscribeToLoads = (onCarga) => {
+  const source = new EventSource(`${API_BASE_URL}/api/events`);
+  source.addEventListener('carga', (event) => onCarga(JSON.parse(event.data)));
+  return () => source.close();
+};
+
 export const checkHealth = async () => {
   try {
     const response = await api.get('/api/health');